@@ -0,0 +1,635 @@
+"""
+  File    : benchmark.py
+  Purpose : Measure the performance of the workflow building pipeline (make.py).
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import copy
+import math
+import time
+import random
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+import make
+import jsonio
+import linkgraph
+import console
+from console import disable_colors, fatal_error
+
+# default directory where to look for source files
+DEFAULT_SOURCE_DIR = "src"
+
+#--------------------------------- HELPERS ---------------------------------#
+
+def measure(function, min_time: float = 0.2, repeat: int = 5) -> float:
+    """
+    Measures the time a function takes to run.
+
+    The function is called in batches large enough to last at least `min_time`
+    seconds; the best average of `repeat` batches is returned.
+    Args:
+        function: The function to measure (called without arguments).
+        min_time: The minimum duration of each batch in seconds.
+        repeat  : The number of batches to run.
+    Returns:
+        The time taken by a single call, in seconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1000000:
+            break
+        number *= 2 if elapsed <= 0 else max(2, int(min_time / elapsed) + 1)
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def scale_template(template_json: dict, factor: int) -> dict:
+    """
+    Creates a synthetic template by replicating the nodes, links and groups of another.
+
+    Each replica receives new node and link ids, and is placed below the
+    previous one, so the result is a valid (although meaningless) workflow.
+    Args:
+        template_json: The dictionary containing the full comfyui workflow to replicate.
+        factor       : The number of copies of the original content.
+    Returns:
+        The new workflow dictionary.
+    """
+    nodes  = template_json.get("nodes" , [])
+    links  = template_json.get("links" , [])
+    groups = template_json.get("groups", [])
+    node_id_offset = max([node.get("id", 0) for node in nodes], default=0) + 1
+    link_id_offset = max([link[0] for link in links], default=0) + 1
+    height         = max([group["bounding"][1] + group["bounding"][3] for group in groups], default=0) + 1000
+
+    scaled = copy.deepcopy(template_json)
+    scaled["nodes"], scaled["links"], scaled["groups"] = [], [], []
+    for replica in range(factor):
+        dnode, dlink, dy = replica * node_id_offset, replica * link_id_offset, replica * height
+
+        for node in copy.deepcopy(nodes):
+            node["id"] += dnode
+            if isinstance(node.get("pos"), list):
+                node["pos"][1] += dy
+            for input in node.get("inputs") or []:
+                if input.get("link") is not None:
+                    input["link"] += dlink
+            for output in node.get("outputs") or []:
+                if output.get("links"):
+                    output["links"] = [link + dlink for link in output["links"]]
+            scaled["nodes"].append(node)
+
+        for link in copy.deepcopy(links):
+            link[0] += dlink
+            link[1] += dnode
+            link[3] += dnode
+            scaled["links"].append(link)
+
+        for group in copy.deepcopy(groups):
+            group["bounding"][1] += dy
+            scaled["groups"].append(group)
+
+    scaled["last_node_id"] = factor * node_id_offset
+    scaled["last_link_id"] = factor * link_id_offset
+    return scaled
+
+
+def print_table(headers: list[str], rows: list[list]) -> None:
+    """Prints a list of rows as a table with aligned columns."""
+    rows   = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(header), *(len(row[i]) for row in rows)) for i, header in enumerate(headers)]
+    print("  " + "  ".join(f"{console.CYAN}{header:<{widths[i]}}{console.RESET}" for i, header in enumerate(headers)))
+    for row in rows:
+        print("  " + "  ".join(f"{cell:<{widths[i]}}" for i, cell in enumerate(row)))
+    print()
+
+
+#---------------------------- SYNTHETIC INPUTS -----------------------------#
+
+# node types used to populate the synthetic templates
+SYNTHETIC_NODE_TYPES = ["KSamplerAdvanced", "CLIPTextEncode", "VAEDecode", "Reroute",
+                        "StringReplace", "PrimitiveNode", "ImageScaleBy", "EmptyLatentImage"]
+
+# number of variables defined by the synthetic configs (and used by the templates)
+SYNTHETIC_VARS = 100
+
+
+def nested_properties(depth: int, index: int) -> dict:
+    """Returns a chain of nested dicts and lists `depth` levels deep."""
+    properties = {"level": 0, "values": [index, "leaf", True]}
+    for level in range(1, depth):
+        properties = {"level": level, "items": [level, f"item {index}", properties], "meta": {"index": index}}
+    return properties
+
+
+def generate_synthetic_template(num_nodes : int,
+                                num_groups: int,
+                                num_styles: int,
+                                depth     : int = 8,
+                                seed      : int = 0
+                                ) -> dict:
+    """
+    Generates a synthetic workflow template with the structure make.py expects.
+
+    The template contains a "STYLES" group with `num_styles` style nodes, a
+    "PROMPT" node, and the rest of the nodes distributed among `num_groups`
+    groups laid out on a grid; the nodes of each group are chained by links.
+    About 1 in 20 nodes contains a placeholder, and 1 in 10 carries nested
+    properties `depth` levels deep.
+    Args:
+        num_nodes : The total number of nodes.
+        num_groups: The number of groups (besides the "STYLES" group).
+        num_styles: The number of style nodes inside the "STYLES" group.
+        depth     : The nesting level of the properties of each node.
+        seed      : The seed of the random generator (the output is deterministic).
+    Returns:
+        The dictionary containing the full comfyui workflow.
+    """
+    rng        = random.Random(seed)
+    nodes      = []
+    links      = []
+    groups     = []
+    group_size = 2000
+    columns    = math.ceil(math.sqrt(num_groups))
+
+    def add_node(type: str, title: str, pos: list[float], **extra) -> dict:
+        node = {"id": len(nodes) + 1, "type": type, "pos": pos, "size": [300, 120],
+                "flags": {}, "order": len(nodes), "mode": 0, "inputs": [], "outputs": [],
+                "title": title, "properties": {"Node name for S&R": type}, **extra}
+        nodes.append(node)
+        return node
+
+    # the STYLES group (far to the left, as in the real templates)
+    groups.append({"id": 1, "title": "STYLES", "bounding": [-5000, 0, 600, num_styles * 200 + 200],
+                   "color": "#3f789e", "font_size": 24, "flags": {}})
+    for index in range(num_styles):
+        add_node("PrimitiveStringMultiline", f"STYLE {index}", [-4950, 100 + index * 200],
+                 mode=(0 if index == 0 else 2), widgets_values=[""])
+    add_node("PrimitiveStringMultiline", "PROMPT", [-6000, 0], widgets_values=["{#PROMPT}"])
+
+    # the rest of the nodes, distributed among the groups
+    remaining = max(num_nodes - len(nodes), 0)
+    for group_index in range(num_groups):
+        left = (group_index %  columns) * (group_size + 200)
+        top  = (group_index // columns) * (group_size + 200)
+        groups.append({"id": group_index + 2, "title": f"GROUP {group_index} {{#VAR_{group_index % SYNTHETIC_VARS}}}"
+                                                       if group_index % 10 == 0 else f"GROUP {group_index}",
+                       "bounding": [left, top, group_size, group_size],
+                       "color": "#8a8", "font_size": 24, "flags": {}})
+
+        count    = remaining // num_groups + (1 if group_index < remaining % num_groups else 0)
+        previous = None
+        for _ in range(count):
+            index = len(nodes)
+            type  = SYNTHETIC_NODE_TYPES[index % len(SYNTHETIC_NODE_TYPES)]
+            title = f"Shared {index % 50}" if index % 10 == 0 else f"{type} {index}"
+            pos   = [left + rng.uniform(10, group_size - 310), top + rng.uniform(40, group_size - 130)]
+            value = f"value {{#VAR_{index % SYNTHETIC_VARS}}}" if index % 20 == 0 else f"value {index}"
+            node  = add_node(type, title, pos, widgets_values=[value, index, 0.5])
+            if index % 10 == 0:
+                node["properties"]["meta"] = nested_properties(depth, index)
+            if previous:
+                link_id = len(links) + 1
+                links.append([link_id, previous["id"], 0, node["id"], 0, "LATENT"])
+                previous["outputs"].append({"name": "LATENT", "type": "LATENT", "links": [link_id], "slot_index": 0})
+                node["inputs"].append({"name": "latent", "type": "LATENT", "link": link_id})
+            previous = node
+
+    return {"id": "00000000-0000-0000-0000-000000000000", "revision": 0,
+            "last_node_id": len(nodes), "last_link_id": len(links),
+            "nodes": nodes, "links": links, "groups": groups,
+            "config": {}, "extra": {"ds": {"scale": 1.0, "offset": [0, 0]}}, "version": 0.4}
+
+
+def generate_synthetic_config(template_json   : dict,
+                              num_styles      : int,
+                              num_modifications: int,
+                              seed            : int = 0
+                              ) -> str:
+    """
+    Generates the text of a synthetic ZCONFIG file for a synthetic template.
+    Args:
+        template_json    : The synthetic template (see `generate_synthetic_template`).
+        num_styles       : The number of styles to define.
+        num_modifications: The number of node modifications (enable/disable/pin/unpin),
+                           a quarter of them targeting titles that don't exist and
+                           an eighth of them using glob patterns (e.g. "KSampler 1*").
+        seed             : The seed of the random generator (the output is deterministic).
+    Returns:
+        The content of the configuration file.
+    """
+    rng    = random.Random(seed)
+    titles = [node["title"] for node in template_json["nodes"] if not node["title"].startswith("STYLE")]
+    groups = [group["title"] for group in template_json["groups"] if "{" not in group["title"]]
+
+    lines = ["#!ZCONFIG", "{#FILEPREFIX}", "synthetic-", "{#PROMPT}", "A synthetic prompt"]
+    for index in range(SYNTHETIC_VARS):
+        lines += [f"{{#VAR_{index}}}", f"variable {index} of the synthetic config"]
+    for index in range(num_styles):
+        lines += [f">>>Synthetic Style {index}", f"A style number {index}, {{$@}}, with many details."]
+
+    commands = [">>:ENABLE", ">>:DISABLE", ">>:PIN", ">>:UNPIN"]
+    for command_index, command in enumerate(commands):
+        lines.append(command)
+        for index in range(num_modifications // len(commands)):
+            if index % 4 == 0:
+                lines.append(f"Missing Node {command_index}-{index}")
+            elif index % 8 == 1:
+                title = rng.choice(titles)
+                lines.append(title[:max(3, len(title) - 2)] + "*")
+            else:
+                lines.append(rng.choice(titles))
+
+    for command in (">>:PIN-GROUP", ">>:DISABLE-GROUP"):
+        lines.append(command)
+        lines += rng.sample(groups, k=min(len(groups), max(1, len(groups) // 4)))
+
+    return "\n".join(lines) + "\n"
+
+
+def generate_synthetic_graph(num_nodes: int, inputs_per_node: int = 2, window: int = 50, seed: int = 0) -> dict:
+    """
+    Generates a synthetic workflow where each node is linked to a few previous nodes.
+    Args:
+        num_nodes      : The number of nodes of the workflow.
+        inputs_per_node: The number of inputs of each node (except the first one), each with its own link.
+        window         : How far back the origin of each link can be, in nodes.
+        seed           : The seed of the random generator, so the same graph is always generated.
+    Returns:
+        The synthetic workflow, with the nodes in reverse order and a shuffled "order" field
+        (so the execution order has to be computed).
+    """
+    rng   = random.Random(seed)
+    nodes = [{"id": node_id, "type": "Synthetic", "order": 0, "mode": 0, "inputs": [],
+              "outputs": [{"name": "OUT", "type": "ANY", "links": []}]} for node_id in range(1, num_nodes + 1)]
+    links = []
+    for target in nodes[1:]:
+        for slot in range(inputs_per_node):
+            origin  = nodes[rng.randrange(max(0, target["id"] - 1 - window), target["id"] - 1)]
+            link_id = len(links) + 1
+            links.append([link_id, origin["id"], 0, target["id"], slot, "ANY"])
+            origin["outputs"][0]["links"].append(link_id)
+            target["inputs"].append({"name": f"in_{slot}", "type": "ANY", "link": link_id})
+    orders = list(range(num_nodes))
+    rng.shuffle(orders)
+    for node, order in zip(nodes, orders):
+        node["order"] = order
+    return {"last_node_id": num_nodes, "last_link_id": len(links), "nodes": nodes[::-1], "links": links}
+
+
+#------------------------------- BENCHMARKS --------------------------------#
+
+def bench_slots(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Compares resolving variables by walking the whole template (`resolve_vars_in_json`)
+    against rendering only the precompiled placeholder slots (`Workflow.resolve_vars`).
+    """
+    print(f"{console.GREEN}Variable resolution: full walk vs. precompiled placeholder slots{console.RESET}")
+    rows, records = [], []
+    for template_path in json_templates:
+        base_template = make.load_template(template_path)
+        if not base_template:
+            fatal_error(f"Unable to load template '{template_path}'.")
+
+        for scale in (1, options.factor):
+            if scale == 1:
+                template, label = base_template, os.path.basename(template_path)
+            else:
+                template = make.WorkflowTemplate(template_path, scale_template(base_template.json, scale))
+                label    = f"{os.path.basename(template_path)} x{scale}"
+
+            config_vars  = make.read_config(text_configs[0])
+            compile_time = measure(lambda: make.compile_placeholder_slots(template.json), repeat=3)
+            walk_time    = measure(lambda: make.resolve_vars_in_json(template.json, config_vars))
+            slots_time   = measure(lambda: make.Workflow(template).resolve_vars(config_vars))
+            rows.append([label,
+                         len(template.json["nodes"]),
+                         len(template.slots),
+                         f"{compile_time*1000:.3f}",
+                         f"{walk_time*1000:.3f}",
+                         f"{slots_time*1000:.3f}",
+                         f"{walk_time/slots_time:.1f}x"])
+            records.append({"template": label, "nodes": len(template.json["nodes"]), "slots": len(template.slots),
+                            "compile": compile_time, "full_walk": walk_time, "slots_render": slots_time})
+
+    print_table(["template", "nodes", "slots", "compile ms", "full walk ms", "slots ms", "speedup"], rows)
+    return records
+
+
+def bench_groups(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Compares finding the nodes of every group with one linear scan per group
+    (`find_nodes_in_rectangle`) against a single pass over a spatial grid (`find_nodes_in_groups`).
+    """
+    print(f"{console.GREEN}Group membership: one scan per group vs. spatial grid{console.RESET}")
+    rows, records = [], []
+    for template_path in json_templates:
+        base_template = make.load_template(template_path)
+        if not base_template:
+            fatal_error(f"Unable to load template '{template_path}'.")
+
+        for scale in (1, options.factor):
+            if scale == 1:
+                template_json, label = base_template.json, os.path.basename(template_path)
+            else:
+                template_json = scale_template(base_template.json, scale)
+                label         = f"{os.path.basename(template_path)} x{scale}"
+
+            groups    = template_json["groups"]
+            scan_time = measure(lambda: [make.find_nodes_in_rectangle(template_json, group["bounding"]) for group in groups])
+            grid_time = measure(lambda: make.find_nodes_in_groups(template_json))
+            rows.append([label,
+                         len(template_json["nodes"]),
+                         len(groups),
+                         f"{scan_time*1000:.3f}",
+                         f"{grid_time*1000:.3f}",
+                         f"{scan_time/grid_time:.1f}x"])
+            records.append({"template": label, "nodes": len(template_json["nodes"]), "groups": len(groups),
+                            "scans": scan_time, "grid": grid_time})
+
+    print_table(["template", "nodes", "groups", "scans ms", "grid ms", "speedup"], rows)
+    return records
+
+
+def bench_json(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Compares the parse and dump times of the available JSON backends,
+    and the size of the output generated in each format (see `jsonio`).
+    """
+    backends = ["json", "orjson"] if jsonio.ORJSON_AVAILABLE else ["json"]
+    print(f"{console.GREEN}JSON backends: parse and dump times, output sizes{console.RESET}")
+    if not jsonio.ORJSON_AVAILABLE:
+        print(f"  {console.DKGRAY}(orjson is not installed, only the standard library is measured){console.RESET}")
+
+    rows, records = [], []
+    for template_path in json_templates:
+        with open(template_path, 'rb') as file:
+            data = file.read()
+        template_json = jsonio.loads(data)
+        label         = os.path.basename(template_path)
+
+        for backend in backends:
+            parse_time = measure(lambda: jsonio.loads(data, backend=backend))
+            rows.append([label, backend, "(parse)", f"{parse_time*1000:.3f}", f"{len(data)/1024:.1f}"])
+            records.append({"template": label, "backend": backend, "operation": "parse", "time": parse_time, "bytes": len(data)})
+
+        for format in jsonio.FORMATS:
+            # "pretty" and "canonical" are always generated with the standard library
+            for backend in (backends if format == "compact" else ["json"]):
+                dump_time = measure(lambda: jsonio.dumps_bytes(template_json, format=format, backend=backend))
+                size      = len(jsonio.dumps_bytes(template_json, format=format, backend=backend))
+                rows.append([label, backend, format, f"{dump_time*1000:.3f}", f"{size/1024:.1f}"])
+                records.append({"template": label, "backend": backend, "operation": f"dump:{format}", "time": dump_time, "bytes": size})
+
+    print_table(["template", "backend", "format", "ms", "KB"], rows)
+    return records
+
+
+# phases of `make_workflow` in the order they are executed (see `make.PhaseTimer`)
+PIPELINE_PHASES = ["config", "cache", "load", "resolve", "styles", "prompt", "modifications", "gallery", "dump"]
+
+def bench_pipeline(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Times every phase of `make_workflow` on synthetic templates and configs of increasing size.
+
+    Each run starts with cold caches (templates, included configs and file
+    hashes), the fastest time of each phase among `options.repeat` runs is
+    reported. The full-walk variable resolution (`resolve_vars_in_json`) is
+    also measured, for comparison with the "resolve" phase.
+    """
+    print(f"{console.GREEN}make_workflow pipeline on synthetic inputs (ms per phase){console.RESET}")
+    rows, records = [], []
+    for num_nodes in options.sizes:
+        num_groups        = min(400, max(12, num_nodes // 5))
+        num_styles        = min(2000, max(20, num_nodes // 10))
+        num_modifications = min(20000, max(100, num_nodes))
+
+        with tempfile.TemporaryDirectory() as temp_dir, contextlib.chdir(temp_dir):
+            template_json = generate_synthetic_template(num_nodes, num_groups, num_styles)
+            config_text   = generate_synthetic_config(template_json, num_styles, num_modifications)
+            jsonio.write_json("template_SYNTHETIC.json", template_json, format="pretty")
+            with open("synthetic.txt", "w") as file:
+                file.write(config_text)
+
+            best = {}
+            for _ in range(options.repeat):
+                make._loaded_templates.clear()
+                make._config_fragments.clear()
+                make._file_hashes.clear()
+                timings = {}
+                start   = time.perf_counter()
+                with contextlib.redirect_stderr(open(os.devnull, "w")):
+                    success = make.make_workflow("template_SYNTHETIC.json", "synthetic.txt",
+                                                 create_styles_txt=True, overwrite=True,
+                                                 build_cache={"outputs": {}}, force=True, timings=timings)
+                if not success:
+                    fatal_error(f"Unable to build the synthetic workflow with {num_nodes} nodes.")
+                timings["total"] = time.perf_counter() - start
+                for phase, seconds in timings.items():
+                    best[phase] = min(best.get(phase, seconds), seconds)
+
+            config_vars = make.read_workflow_config("template_SYNTHETIC.json", "synthetic.txt")
+            start       = time.perf_counter()
+            make.resolve_vars_in_json(template_json, config_vars)
+            walk_time   = time.perf_counter() - start
+            output_size = os.path.getsize("synthetic-SYNTHETIC.json")
+
+        rows.append([num_nodes, len(template_json["groups"]), num_styles, num_modifications,
+                     *(f"{best.get(phase, 0)*1000:.1f}" for phase in PIPELINE_PHASES),
+                     f"{walk_time*1000:.1f}", f"{best['total']*1000:.1f}"])
+        records.append({"nodes": num_nodes, "groups": len(template_json["groups"]),
+                        "styles": num_styles, "modifications": num_modifications,
+                        "output_bytes": output_size,
+                        "phases": {phase: best.get(phase, 0.0) for phase in PIPELINE_PHASES},
+                        "resolve_vars_in_json": walk_time, "total": best["total"]})
+
+    print_table(["nodes", "groups", "styles", "mods", *PIPELINE_PHASES, "full walk", "total"], rows)
+    return records
+
+
+# modules that a lightweight command should never import (they take tens of ms or more)
+HEAVY_MODULES = ["torch", "safetensors", "PIL", "numpy", "http.server", "concurrent.futures"]
+
+def bench_startup(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Measures the wall time of running each subcommand of `zimage.py` in a new process.
+
+    The bare interpreter start is included as a baseline. For each command,
+    the heavy modules it imports (see `HEAVY_MODULES`) are listed too,
+    detected with `python -X importtime`.
+    """
+    print(f"{console.GREEN}Startup time of each zimage command, in a new process (ms){console.RESET}")
+    zimage_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "zimage.py")
+    source_dir  = os.path.dirname(json_templates[0])
+    commands = [
+        ("python -c pass"        , ["-c", "pass"]),
+        ("zimage --help"         , [zimage_path, "--help"]),
+        ("zimage make --help"    , [zimage_path, "make", "--help"]),
+        ("zimage make"           , [zimage_path, "make", "-s", source_dir, "--no-cache", "--no-color", "-w", "-f"]),
+        ("zimage check (json)"   , [zimage_path, "check", json_templates[0]]),
+        ("zimage gallery --help" , [zimage_path, "gallery", "--help"]),
+        ("zimage pth2safe --help", [zimage_path, "pth2safe", "--help"]),
+    ]
+    rows, records = [], []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for label, arguments in commands:
+            best = math.inf
+            for _ in range(options.repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *arguments], cwd=temp_dir,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                best = min(best, time.perf_counter() - start)
+
+            result = subprocess.run([sys.executable, "-X", "importtime", *arguments], cwd=temp_dir,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()
+                        if line.startswith("import time:")}
+            heavy = [module for module in HEAVY_MODULES if module in imported]
+            rows.append([label, f"{best*1000:.1f}", ", ".join(heavy) or "-"])
+            records.append({"command": label, "time": best, "heavy_imports": heavy})
+
+    print_table(["command", "ms", "heavy imports"], rows)
+    return records
+
+
+def bench_linkgraph(json_templates: list[str], text_configs: list[str], options: argparse.Namespace) -> list[dict]:
+    """
+    Measures building the link graph of a workflow and computing its execution order
+    (see `linkgraph`), for the templates and for synthetic graphs of each of the `--sizes`.
+    """
+    print(f"{console.GREEN}Link graph: graph building, execution order and order rewriting (ms){console.RESET}")
+    workflows = []
+    for template_path in json_templates:
+        template = make.load_template(template_path)
+        if not template:
+            fatal_error(f"Unable to load template '{template_path}'.")
+        workflows.append( (os.path.basename(template_path), template.json) )
+    for size in options.sizes:
+        workflows.append( (f"synthetic {size}", generate_synthetic_graph(size)) )
+
+    rows, records = [], []
+    for label, workflow_json in workflows:
+        graph        = linkgraph.LinkGraph(workflow_json)
+        build_time   = measure(lambda: linkgraph.LinkGraph(workflow_json), repeat=options.repeat)
+        order_time   = measure(lambda: graph.topological_order(), repeat=options.repeat)
+        rewrite_time = measure(lambda: linkgraph.update_node_order(workflow_json), repeat=options.repeat)
+        rows.append([label,
+                     len(workflow_json["nodes"]),
+                     len(workflow_json["links"]),
+                     f"{build_time*1000:.3f}",
+                     f"{order_time*1000:.3f}",
+                     f"{rewrite_time*1000:.3f}"])
+        records.append({"workflow": label, "nodes": len(workflow_json["nodes"]), "links": len(workflow_json["links"]),
+                        "build": build_time, "order": order_time, "rewrite": rewrite_time})
+
+    print_table(["workflow", "nodes", "links", "graph ms", "order ms", "graph+order+rewrite ms"], rows)
+    return records
+
+
+#===========================================================================#
+#////////////////////////////////// MAIN ///////////////////////////////////#
+#===========================================================================#
+
+BENCHMARKS = {
+    "slots"    : bench_slots,
+    "groups"   : bench_groups,
+    "json"     : bench_json,
+    "pipeline" : bench_pipeline,
+    "startup"  : bench_startup,
+    "linkgraph": bench_linkgraph,
+}
+
+def main(args=None, parent_script=None):
+    """
+    Main entry point for the script.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    prog = None
+    if parent_script:
+        prog = parent_script + " " + os.path.basename(__file__).split('.')[0]
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Measure the performance of the workflow building pipeline (make.py).",
+        formatter_class=argparse.RawTextHelpFormatter
+        )
+    parser.add_argument('benchmarks'       , nargs="*",
+                        help=f"The benchmarks to run (default: all). Available: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--no-color'       , action='store_true', help="Disable colored output.")
+    parser.add_argument('-s','--source-dir', type=str,            help="The source dir containing templates and config files (default: /src)")
+    parser.add_argument('--factor'         , type=int, default=10, help="Size multiplier of the synthetic templates (default: 10)")
+    parser.add_argument('--sizes'          , type=str, default="1000,10000,100000",
+                        help="Comma-separated node counts of the synthetic pipeline inputs (default: 1000,10000,100000)")
+    parser.add_argument('--repeat'         , type=int, default=3, help="Number of runs of each pipeline measurement (default: 3)")
+    parser.add_argument('-o','--output'    , type=str, help="Write the results to a JSON file, to track regressions between releases.")
+    args = parser.parse_args(args=args)
+
+    if args.no_color:
+        disable_colors()
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            fatal_error(f"Unknown benchmark '{name}'.",
+                        f"Available benchmarks: {', '.join(BENCHMARKS)}")
+    try:
+        args.sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        fatal_error(f"Invalid list of sizes '{args.sizes}'.")
+    if args.repeat < 1:
+        fatal_error("The number of runs must be a positive integer.")
+
+    # get source directory and convert it to absolute path
+    source_dir = args.source_dir or DEFAULT_SOURCE_DIR
+    source_dir = os.path.realpath(os.path.join(os.getcwd(), source_dir))
+    if not os.path.isdir(source_dir):
+        fatal_error(f"The source directory '{source_dir}' does not exist.")
+
+    json_templates, text_configs = make.find_source_files(source_dir)
+    if not json_templates:
+        fatal_error("No JSON template files found in the source directory.")
+    if not text_configs:
+        fatal_error("No valid text configuration files found in the source directory.")
+
+    print()
+    results = {}
+    for name in (args.benchmarks or BENCHMARKS.keys()):
+        results[name] = BENCHMARKS[name](json_templates, text_configs, args)
+
+    # save the results (times are in seconds)
+    if args.output:
+        report = {"timestamp"   : datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                  "python"      : platform.python_version(),
+                  "platform"    : platform.platform(),
+                  "json_backend": jsonio.DEFAULT_BACKEND,
+                  "results"     : results}
+        jsonio.write_json(args.output, report, format="pretty")
+        print(f" Results saved to '{args.output}'")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,15 @@
    Z-Image workflow with customizable image styles and GPU-friendly versions
  _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
+from __future__ import annotations
 import os
-import sys
-import json
 import argparse
-from PIL import Image, ImageDraw, ImageFont
-from PIL.PngImagePlugin import PngInfo
+import jsonio
+from console import warning, fatal_error
+
+# the PIL modules take a while to import,
+# they are imported only when a gallery is built (see `import_pil`)
+Image = ImageDraw = ImageFont = PngInfo = None
 
 # Default label metrics
 DEFAULT_FONT_SIZE    = 64
@@ -44,49 +47,19 @@ def get_text_color(style_name: str, default_color: str=None) -> str:
     return default_color
 
 
-# ANSI escape codes for colored terminal output
-RED    = '\033[91m'
-GREEN  = '\033[92m'
-YELLOW = '\033[93m'
-CYAN   = '\033[96m'
-DKGRAY = '\033[90m'
-RESET  = '\033[0m'
-
-#----------------------------- ERROR MESSAGES ------------------------------#
-
-def disable_colors():
-    global RED, GREEN, YELLOW, CYAN, DKGRAY, RESET
-    RED, GREEN, YELLOW, CYAN, DKGRAY, RESET = "", "", "", "", "", ""
-
-def warning(message: str, *info_messages: str) -> None:
-    """Displays and logs a warning message to the standard error stream.
-    """
-    print()
-    print(f"{CYAN}[{YELLOW}WARNING{CYAN}]{RESET} {message}", file=sys.stderr)
-    for info_message in info_messages:
-        print(f"          {YELLOW}{info_message}{RESET}", file=sys.stderr)
-
-def error(message: str, *info_messages: str) -> None:
-    """Displays and logs an error message to the standard error stream.
-    """
-    print()
-    print(f"{CYAN}[{RED}ERROR{CYAN}]{RESET} {message}", file=sys.stderr)
-    for info_message in info_messages:
-        print(f"          {RED}{info_message}{RESET}", file=sys.stderr)
+#--------------------------------- HELPERS ---------------------------------#
 
-def fatal_error(message: str, *info_messages: str) -> None:
-    """Displays and logs an fatal error to the standard error stream and exits.
-    Args:
-        message       : The fatal error message to display.
-        *info_messages: Optional informational messages to display after the error.
+def import_pil() -> None:
+    """Imports the PIL modules used to build the galleries, exits with an error if Pillow is not installed.
     """
-    error(message)
-    for info_message in info_messages:
-        print(f" {CYAN}\u24d8  {info_message}{RESET}", file=sys.stderr)
-    print()
-    exit(1)
+    global Image, ImageDraw, ImageFont, PngInfo
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+        from PIL.PngImagePlugin import PngInfo
+    except ImportError:
+        fatal_error("The Pillow library is not installed.",
+                    "Install the packages listed in 'requirements.txt' (or run 'build-gallery.sh --create-venv').")
 
-#--------------------------------- HELPERS ---------------------------------#
 
 def is_valid_png_image(path: str, valid_prefix: str = "") -> bool:
     """Check if a given path is a PNG image file with a valid prefix.
@@ -180,7 +153,7 @@ def get_workflow_from_image(image_path: str) -> dict[str, any] | None:
 
     # try to parse the workflow as JSON
     try:
-        workflow = json.loads(workflow)
+        workflow = jsonio.loads(workflow)
     except:
         return None
 
@@ -1013,7 +986,8 @@ def main(args=None, parent_script=None):
     # parser.add_argument(      '--font'        ,                      help="Path to font file")
     # parser.add_argument(      '--font-size'   , type=int,            help="Font size for the label")
 
-    args  = parser.parse_args()
+    args  = parser.parse_args(args=args)
+    import_pil()
 
     # default values
     scale              = 0.5
@@ -12,50 +12,11 @@
 """
 import os
 import sys
-import json
 import argparse
-try:
-    # PIL is used to read workflow data embedded in images
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    print("Warning: The Pillow library is not installed: functionality will be limited.")
-    PIL_AVAILABLE = False
-
-
-#----------------------------- ERROR MESSAGES ------------------------------#
-
-def disable_colors():
-    global RED, GREEN, YELLOW, CYAN, DKGRAY, RESET
-    RED, GREEN, YELLOW, CYAN, DKGRAY, RESET = "", "", "", "", "", ""
-
-def warning(message: str, *info_messages: str) -> None:
-    """Displays and logs a warning message to the standard error stream.
-    """
-    print()
-    print(f"{CYAN}[{YELLOW}WARNING{CYAN}]{RESET} {message}", file=sys.stderr)
-    for info_message in info_messages:
-        print(f"          {YELLOW}{info_message}{RESET}", file=sys.stderr)
-
-def error(message: str, *info_messages: str) -> None:
-    """Displays and logs an error message to the standard error stream.
-    """
-    print()
-    print(f"{CYAN}[{RED}ERROR{CYAN}]{RESET} {message}", file=sys.stderr)
-    for info_message in info_messages:
-        print(f"          {RED}{info_message}{RESET}", file=sys.stderr)
-
-def fatal_error(message: str, *info_messages: str) -> None:
-    """Displays and logs an fatal error to the standard error stream and exits.
-    Args:
-        message       : The fatal error message to display.
-        *info_messages: Optional informational messages to display after the error.
-    """
-    error(message)
-    for info_message in info_messages:
-        print(f" {CYAN}\u24d8  {info_message}{RESET}", file=sys.stderr)
-    print()
-    exit(1)
+import jsonio
+import linkgraph
+import console
+from console import disable_colors, warning
 
 #--------------------------------- HELPERS ---------------------------------#
 
@@ -166,6 +127,20 @@ def check_node_dimensions(workflow):
     return pos_bug_count, size_bug_count
 
 
+def check_links(workflow: dict) -> tuple[list, list, list]:
+    """Checks the links between the nodes of the workflow (see `linkgraph.LinkGraph`).
+
+    Returns:
+        A tuple (dangling_links, cycle, order_errors) with the ids of the links
+        that don't exist, the ids of the nodes of a cycle (if any), and the ids
+        of the nodes whose 'order' doesn't follow the links.
+    """
+    graph = linkgraph.LinkGraph(workflow)
+    cycle = graph.find_cycle()
+    order_errors = [] if cycle else linkgraph.get_order_errors(workflow, graph)
+    return graph.dangling_links, cycle, order_errors
+
+
 def get_workflow_view(workflow):
     view_x, view_y, view_scale = 0.0, 0.0, 1.0
     ds = workflow.get('extra',{}).get('ds',{})
@@ -188,11 +163,8 @@ def read_workflow_from_json(filename: str) -> dict:
         or None if no workflow data is found.
     """
     try:
-        workflow = None
-        with open(filename, 'r') as f:
-            workflow = json.load(f)
-        return workflow
-    except (FileNotFoundError, IOError, json.JSONDecodeError):
+        return jsonio.read_json(filename)
+    except (FileNotFoundError, IOError, jsonio.JSONDecodeError):
         return None
 
 
@@ -204,15 +176,19 @@ def read_workflow_from_png(filename: str) -> dict:
         A dictionary containing the workflow data,
         or None if no workflow data is found.
     """
-    if not PIL_AVAILABLE:
+    try:
+        # PIL is imported only when an image is read (it's slow to import)
+        from PIL import Image
+    except ImportError:
+        warning("The Pillow library is not installed, workflows embedded in images can't be read.")
         return None
     try:
         workflow = None
         with Image.open(filename) as image:
             if 'prompt' in image.info and 'workflow' in image.info:
                 workflow = image.info.get('workflow')
-        return json.loads(workflow) if isinstance(workflow,str) else None
-    except (IOError, OSError):
+        return jsonio.loads(workflow) if isinstance(workflow,str) else None
+    except (IOError, OSError, jsonio.JSONDecodeError):
         return None
 
 
@@ -236,7 +212,7 @@ def main(args=None, parent_script=None):
     parser.add_argument('--color-always'      , action="store_true", help="always use color output")
     parser.add_argument("--verbose"           , action="store_true", help="Show additional information about unpinned nodes.")
 
-    args = parser.parse_args()
+    args = parser.parse_args(args=args)
 
     # determine if color should be used
     use_color = args.color_always or (args.color and is_terminal_output())
@@ -256,39 +232,50 @@ def main(args=None, parent_script=None):
             workflow = None
 
         if not workflow:
-            print(f"{YELLOW} - Imposible leer el workflow del archivo.{RESET}")
+            print(f"{console.YELLOW} - Imposible leer el workflow del archivo.{console.RESET}")
             continue
 
         unpinned_nodes , total_num_of_nodes  = get_unpinned_elements(workflow, type="nodes")
         unpinned_groups, total_num_of_groups = get_unpinned_elements(workflow, type="groups")
         pos_bug_count, size_bug_count = check_node_dimensions(workflow);
+        dangling_links, cycle, order_errors = check_links(workflow)
         view_displaced_error, view_scaled_error = False, False
         if args.extra_checks:
             view_x, view_y, view_scale    = get_workflow_view(workflow)
             view_displaced_error = view_x != 0 or view_y != 0
             view_scaled_error    = view_scale != 1
 
-        if not unpinned_nodes and not unpinned_groups and not view_displaced_error and not view_scaled_error:
-            print(f"{GREEN}  - The {total_num_of_nodes} nodes and {total_num_of_groups} groups are pinned and no errors found.{RESET}")
+        link_errors = dangling_links or cycle or order_errors
+        if not unpinned_nodes and not unpinned_groups and not view_displaced_error and not view_scaled_error and not link_errors:
+            print(f"{console.GREEN}  - The {total_num_of_nodes} nodes and {total_num_of_groups} groups are pinned and no errors found.{console.RESET}")
 
         if pos_bug_count > 0:
-            print(f"{RED}  - Potential issues with 'pos' attribute : {pos_bug_count}{RESET}")
+            print(f"{console.RED}  - Potential issues with 'pos' attribute : {pos_bug_count}{console.RESET}")
         if size_bug_count > 0:
-            print(f"{RED}  - Potential issues with 'size' attribute: {size_bug_count}{RESET}")
+            print(f"{console.RED}  - Potential issues with 'size' attribute: {size_bug_count}{console.RESET}")
+
+        if dangling_links:
+            print(f"{console.RED}  - Links referenced but not defined (dangling): {', '.join(map(str, dangling_links))}{console.RESET}")
+        if cycle:
+            print(f"{console.RED}  - The links form a cycle: {' -> '.join(map(str, cycle))}{console.RESET}")
+        if order_errors:
+            print(f"{console.RED}  - Nodes with an 'order' before their inputs: {len(order_errors)}{console.RESET}")
+            if args.verbose:
+                print(f"       {', '.join(map(str, order_errors))}")
 
         if view_displaced_error:
-            print(f"{RED} - The view is not at the origin.{RESET}")
+            print(f"{console.RED} - The view is not at the origin.{console.RESET}")
 
         if view_scaled_error:
-            print(f"{RED} - The view is not at 100% scale.{RESET}")
+            print(f"{console.RED} - The view is not at 100% scale.{console.RESET}")
 
         if unpinned_nodes:
-            print(f"{RED}  - Found {len(unpinned_nodes)} unpinned nodes:{RESET}")
+            print(f"{console.RED}  - Found {len(unpinned_nodes)} unpinned nodes:{console.RESET}")
             for node in unpinned_nodes:
                 print(f"       ({node.x:>4},{node.y:>4}) {node.name}")
 
         if unpinned_groups:
-            print(f"{RED}  - Found {len(unpinned_groups)} unpinned groups:{RESET}")
+            print(f"{console.RED}  - Found {len(unpinned_groups)} unpinned groups:{console.RESET}")
             for group in unpinned_groups:
                 print(f"       ({group.x:>4},{group.y:>4}) {group.name}")
 
@@ -0,0 +1,91 @@
+"""
+  File    : console.py
+  Purpose : Colored terminal output and error messages shared by all the scripts.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import sys
+import threading
+import contextlib
+
+# ANSI escape codes for colored terminal output
+# (the scripts read them as `console.RED`, ... so `disable_colors` affects all of them)
+RED      = '\033[91m'
+DKRED    = '\033[31m'
+YELLOW   = '\033[93m'
+DKYELLOW = '\033[33m'
+GREEN    = '\033[92m'
+CYAN     = '\033[96m'
+DKGRAY   = '\033[90m'
+RESET    = '\033[0m'
+
+
+def disable_colors():
+    global RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET
+    RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET = "", "", "", "", "", "", "", ""
+
+
+#----------------------------- MESSAGE STREAMS -----------------------------#
+
+# the stream where each thread writes its messages (see `capture_messages`)
+_message_streams = threading.local()
+
+def get_message_stream():
+    """Returns the stream where the messages of the current thread are written (by default `sys.stderr`)."""
+    return getattr(_message_streams, "stream", None) or sys.stderr
+
+
+@contextlib.contextmanager
+def capture_messages(stream):
+    """
+    Writes the messages reported by the current thread to `stream` while the context is active.
+
+    Unlike `contextlib.redirect_stderr`, the global `sys.stderr` is not
+    replaced, so each thread (e.g. each request of the workflow server)
+    captures only its own messages.
+    """
+    previous = getattr(_message_streams, "stream", None)
+    _message_streams.stream = stream
+    try:
+        yield stream
+    finally:
+        _message_streams.stream = previous
+
+
+#----------------------------- ERROR MESSAGES ------------------------------#
+# (the `file` argument of these functions defaults to the message stream
+#  of the current thread, resolved at call time, see `capture_messages`)
+
+def info(message: str, padding: int = 0, file=None) -> None:
+    """Displays an informational message to the error stream.
+    """
+    print(f"{" "*padding}{CYAN}\u24d8 {message}{RESET}", file=file or get_message_stream())
+
+
+def warning(message: str, *info_messages: str, padding: int = 0, file=None) -> None:
+    """Displays a warning message to the standard error stream.
+    """
+    print(f"{" "*padding}{CYAN}[{YELLOW}WARNING{CYAN}]{DKYELLOW} {message}{RESET}", file=file or get_message_stream())
+    for info_message in info_messages:
+        info(info_message, padding=padding, file=file)
+
+
+def error(message: str, *info_messages: str, padding: int = 0, file=None) -> None:
+    """Displays an error message to the standard error stream.
+    """
+    print(f"{" "*padding}{DKRED}[{RED}ERROR!{DKRED}]{DKYELLOW} {message}{RESET}", file=file or get_message_stream())
+    for info_message in info_messages:
+        info(info_message, padding=padding, file=file)
+
+
+def fatal_error(message: str, *info_messages: str, padding: int = 0, file=None) -> None:
+    """Displays a fatal error message to the standard error stream and exits with status code 1.
+    """
+    error(message, *info_messages, padding=padding, file=file)
+    sys.exit(1)
@@ -0,0 +1,373 @@
+"""
+  File    : estimate-cost.py
+  Purpose : Estimate the relative render cost of ComfyUI workflows, by stage.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import re
+import sys
+import math
+import argparse
+from typing import NamedTuple
+import jsonio
+import make
+import console
+from console import disable_colors, error, fatal_error
+
+# types of the nodes that produce the final images, the cost
+# is estimated only for the nodes needed to produce them
+OUTPUT_NODE_TYPES = ("SaveImage", "PreviewImage", "Image Comparer (rgthree)")
+
+# relative cost of each stage, in "steps": the cost of one sampling step at 1 megapixel
+# (rough weights for capacity planning, the cost of every stage grows with the megapixels)
+STAGE_COST_WEIGHTS = {
+    "sampling"  : 1.0,   #< per step and megapixel of latent
+    "vae-decode": 0.6,   #< per megapixel of decoded image
+    "vae-encode": 0.3,   #< per megapixel of encoded image
+    "upscale"   : 3.0,   #< per megapixel of the image upscaled by a model (input size)
+    "resize"    : 0.01,  #< per megapixel of resized image
+    "output"    : 0.0,   #< (the final images, only recorded to report their size)
+}
+
+# scale of the upscale models when it can't be read from their names (e.g. "4x_foolhardy_Remacri")
+DEFAULT_UPSCALE_FACTOR = 4
+
+
+#--------------------------------- SIGMAS ----------------------------------#
+# (the sigma schedules are computed as comfyui does, so the number of
+#  steps of each sampler is exact even when the sigmas are split or extended)
+
+def linspace(start: float, stop: float, count: int) -> list[float]:
+    if count == 1:
+        return [start]
+    return [start + (stop - start) * index / (count - 1) for index in range(count)]
+
+
+def get_karras_sigmas(steps: int, sigma_max: float, sigma_min: float, rho: float) -> list[float]:
+    """Returns the sigmas of the `KarrasScheduler` node (`steps` + 1 values, ending in zero)."""
+    min_inv_rho = sigma_min ** (1 / rho)
+    max_inv_rho = sigma_max ** (1 / rho)
+    return [(max_inv_rho + ramp * (min_inv_rho - max_inv_rho)) ** rho for ramp in linspace(0, 1, steps)] + [0.0]
+
+
+def extend_sigmas(sigmas: list[float], steps: int, start_at_sigma: float, end_at_sigma: float, spacing: str) -> list[float]:
+    """Returns the sigmas of the `ExtendIntermediateSigmas` node."""
+    if start_at_sigma < 0:
+        start_at_sigma = math.inf
+    interpolate = {"linear": lambda x: x,
+                   "cosine": lambda x: 1 - math.cos(x * math.pi / 2),
+                   "sine"  : lambda x: math.sin(x * math.pi / 2)}.get(spacing, lambda x: x)
+    spacings = [interpolate(x) for x in linspace(0, 1, steps + 1)[1:-1]]
+    extended = []
+    for current, next in zip(sigmas, sigmas[1:]):
+        extended.append(current)
+        if end_at_sigma <= current <= start_at_sigma:
+            extended.extend(spacing * (next - current) + current for spacing in spacings)
+    return extended + sigmas[-1:]
+
+
+#-------------------------------- ESTIMATOR --------------------------------#
+
+class Image(NamedTuple):
+    """The size of an image or latent."""
+    width : int
+    height: int
+    batch : int
+
+    @property
+    def megapixels(self) -> float:
+        return self.width * self.height * self.batch / (1024 * 1024)
+
+    def __str__(self) -> str:
+        return f"{self.width}x{self.height}" + (f" (x{self.batch})" if self.batch != 1 else "")
+
+
+class Stage(NamedTuple):
+    """A stage of the render (see `STAGE_COST_WEIGHTS`)."""
+    kind   : str
+    node_id: str
+    title  : str
+    size   : Image
+    steps  : int | None  #< the sampling steps, None for the stages that don't sample
+    cost   : float
+
+
+def get_upscale_factor(model_name: str) -> int:
+    match = re.search(r'(?:^|[^0-9])([1-8])x|x([1-8])(?:[^0-9]|$)', os.path.basename(str(model_name)), re.IGNORECASE)
+    return int(match.group(1) or match.group(2)) if match else DEFAULT_UPSCALE_FACTOR
+
+
+def resize_image(image: Image, measurement: str, width: float, height: float) -> Image:
+    """Returns the size of an image resized by the `Image Resize (rgthree)` node (0 keeps the aspect ratio)."""
+    source_width, source_height, batch = image
+    if measurement == "percentage":
+        width, height = width or height, height or width
+        if not width:
+            return image
+        return Image(round(source_width * width / 100), round(source_height * height / 100), batch)
+    if width and not height:
+        height = source_height * width / source_width
+    elif height and not width:
+        width = source_width * height / source_height
+    elif not width:
+        return image
+    return Image(round(width), round(height), batch)
+
+
+def estimate_prompt_cost(prompt: dict, weights: dict = STAGE_COST_WEIGHTS) -> list[Stage]:
+    """
+    Estimates the cost of each stage of the render of a workflow in the comfyui API format.
+
+    Only the nodes needed to produce the final images (see `OUTPUT_NODE_TYPES`)
+    are evaluated, so the disabled branches of the workflow don't count. The
+    size of each latent and image is followed along the graph (empty latents,
+    resizes, upscale models, encoders and decoders), and the steps of each
+    sampler are taken from its settings or from its sigma schedule.
+    Args:
+        prompt : The workflow compiled to the comfyui API format (see `make.compile_workflow`).
+        weights: The relative cost of each kind of stage (see `STAGE_COST_WEIGHTS`).
+    Returns:
+        The list of costed stages, in execution order; the size of each final
+        image is recorded as an "output" stage.
+    """
+    values = {}  #< (node_id, output_slot) -> evaluated value
+    stages = []
+
+    def evaluate(value):
+        # values connected to another node are [node_id, output_slot]
+        if isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and value[0] in prompt:
+            return evaluate_node(value[0], value[1])
+        return value
+
+    def evaluate_node(node_id: str, slot: int):
+        key = (node_id, slot)
+        if key not in values:
+            values[key] = None  #< (guards against cycles)
+            values[key] = evaluate_output(node_id, slot)
+        return values[key]
+
+    def add_stage(kind: str, node_id: str, size, steps: int | None, units: float) -> None:
+        node = prompt[node_id]
+        stages.append( Stage(kind, node_id, node["_meta"]["title"], size, steps, units * weights.get(kind, 0.0)) )
+
+    def evaluate_output(node_id: str, slot: int):
+        node   = prompt[node_id]
+        inputs = {name: evaluate(value) for name, value in node["inputs"].items()}
+        type   = node["class_type"]
+
+        if type in ("EmptyLatentImage", "EmptySD3LatentImage"):
+            return Image(int(inputs["width"]), int(inputs["height"]), int(inputs.get("batch_size", 1)))
+        if type == "KarrasScheduler":
+            return get_karras_sigmas(int(inputs["steps"]), inputs["sigma_max"], inputs["sigma_min"], inputs["rho"])
+        if type == "SplitSigmas":
+            sigmas, step = inputs.get("sigmas") or [], int(inputs["step"])
+            return sigmas[:step + 1] if slot == 0 else sigmas[step:]
+        if type == "SetFirstSigma":
+            sigmas = inputs.get("sigmas") or []
+            return [inputs["sigma"], *sigmas[1:]] if sigmas else sigmas
+        if type == "ExtendIntermediateSigmas":
+            return extend_sigmas(inputs.get("sigmas") or [], int(inputs["steps"]),
+                                 inputs["start_at_sigma"], inputs["end_at_sigma"], inputs["spacing"])
+        if type == "KSamplerAdvanced":
+            image = inputs.get("latent_image")
+            steps = max(0, min(int(inputs["end_at_step"]), int(inputs["steps"])) - int(inputs["start_at_step"]))
+            if image:
+                add_stage("sampling", node_id, image, steps, steps * image.megapixels)
+            return image
+        if type in ("SamplerCustom", "SamplerCustomAdvanced"):
+            image = inputs.get("latent_image")
+            steps = max(0, len(inputs.get("sigmas") or []) - 1)
+            if image:
+                add_stage("sampling", node_id, image, steps, steps * image.megapixels)
+            return image
+        if type == "VAEDecode":
+            image = inputs.get("samples")
+            if image:
+                add_stage("vae-decode", node_id, image, None, image.megapixels)
+            return image
+        if type == "VAEEncode":
+            image = inputs.get("pixels")
+            if image:
+                add_stage("vae-encode", node_id, image, None, image.megapixels)
+            return image
+        if type == "ImageUpscaleWithModel":
+            image  = inputs.get("image")
+            factor = get_upscale_factor(inputs.get("upscale_model"))
+            if not image:
+                return image
+            add_stage("upscale", node_id, image, None, image.megapixels)
+            return Image(image[0] * factor, image[1] * factor, image[2])
+        if type == "UpscaleModelLoader":
+            return inputs.get("model_name")
+        if type == "Image Resize (rgthree)":
+            image = inputs.get("image")
+            if not image:
+                return image
+            image = resize_image(image, inputs.get("measurement"), inputs.get("width", 0), inputs.get("height", 0))
+            add_stage("resize", node_id, image, None, image.megapixels)
+            return image
+        if type == "Any Switch (rgthree)":
+            # (the first connected input that has a value)
+            for name in sorted(inputs):
+                if inputs[name] is not None:
+                    return inputs[name]
+            return None
+        # any other node passes through the first image, latent or sigmas of its inputs
+        for value in inputs.values():
+            if isinstance(value, (Image, list)):
+                return value
+        return None
+
+    # evaluates the nodes needed by the outputs
+    for node_id, node in prompt.items():
+        if node["class_type"] in OUTPUT_NODE_TYPES:
+            for value in node["inputs"].values():
+                image = evaluate(value)
+                if isinstance(image, Image):
+                    add_stage("output", node_id, image, None, image.megapixels)
+    return stages
+
+
+def estimate_workflow_cost(filepath: str) -> list[Stage]:
+    """
+    Estimates the cost of each stage of the render of a workflow file.
+    Args:
+        filepath: The path to a workflow, either in the UI format (.json) or compiled to the API format (.api.json).
+    Returns:
+        The list of costed stages (see `estimate_prompt_cost`).
+    Raises:
+        OSError, JSONDecodeError: If the file can't be read.
+        BuildError: If the workflow can't be compiled to the API format.
+    """
+    workflow = jsonio.read_json(filepath)
+    if isinstance(workflow, dict) and "nodes" in workflow:
+        workflow = make.compile_workflow(workflow)
+    if not isinstance(workflow, dict):
+        raise make.BuildError("The file doesn't contain a ComfyUI workflow.")
+    return estimate_prompt_cost(workflow)
+
+
+def find_workflow_files(paths: list[str]) -> list[str]:
+    """Returns the workflow files in the given paths, expanding the directories (JSON patches are skipped)."""
+    filepaths = []
+    for path in paths:
+        if not os.path.isdir(path):
+            filepaths.append(path)
+            continue
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(".json") and not filename.endswith(".patch.json") and not filename.startswith("."):
+                filepaths.append(os.path.join(path, filename))
+    return filepaths
+
+
+#--------------------------------- REPORTS ---------------------------------#
+
+def print_table(headers: list[str], rows: list[list]) -> None:
+    """Prints a list of rows as a table with aligned columns."""
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  " + "  ".join(f"{console.CYAN}{header:<{width}}{console.RESET}" for header, width in zip(headers, widths)))
+    for row in rows:
+        print("  " + "  ".join(f"{str(value):<{width}}" for value, width in zip(row, widths)))
+
+
+def print_breakdown(filepath: str, stages: list[Stage]) -> None:
+    """Prints the cost of each stage of a workflow, and the total."""
+    total = sum(stage.cost for stage in stages)
+    print(f"{console.GREEN}{filepath}{console.RESET}")
+    if not stages:
+        print(f"{console.YELLOW}  - No render stage found (is there an enabled output node?){console.RESET}")
+        return
+    rows = [[stage.kind, f"#{stage.node_id}", stage.title, str(stage.size),
+             stage.steps if stage.steps is not None else "-",
+             f"{stage.cost:.2f}", f"{100 * stage.cost / total:.0f}%" if total else "-"]
+            for stage in stages]
+    print_table(["stage", "node", "title", "size", "steps", "cost", "share"], rows)
+    print(f"  {console.DKGRAY}total: {total:.2f} steps at 1 megapixel{console.RESET}")
+
+
+def print_ranking(costs: list[tuple[str, list[Stage]]]) -> None:
+    """Prints the workflows sorted from the most to the least expensive."""
+    totals  = [(filepath, sum(stage.cost for stage in stages), stages) for filepath, stages in costs]
+    totals.sort(key=lambda item: (-item[1], item[0]))
+    maximum = totals[0][1] if totals and totals[0][1] else 1.0
+    rows = []
+    for rank, (filepath, total, stages) in enumerate(totals, 1):
+        steps = sum(stage.steps for stage in stages if stage.steps)
+        sizes = [str(stage.size) for stage in stages if stage.kind == "output"]
+        rows.append([rank, os.path.basename(filepath), ", ".join(sizes) or "-",
+                     steps, f"{total:.2f}", f"{100 * total / maximum:.0f}%"])
+    print_table(["#", "workflow", "output size", "steps", "cost", "relative"], rows)
+
+
+#===========================================================================#
+#////////////////////////////////// MAIN ///////////////////////////////////#
+#===========================================================================#
+
+def main(args=None, parent_script=None):
+    """
+    Main entry point for the script.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    prog = None
+    if parent_script:
+        prog = parent_script + " " + os.path.basename(__file__).split('.')[0]
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Estimate the relative render cost of ComfyUI workflows, with a breakdown by stage.\n"
+                    "Costs are measured in sampling steps at 1 megapixel.",
+        formatter_class=argparse.RawTextHelpFormatter
+        )
+    parser.add_argument('workflows'        , nargs="+",
+                        help="The workflow files (.json or .api.json) or directories containing them.")
+    parser.add_argument('-r','--rank'      , action='store_true', help="Rank all the workflows by cost instead of showing the breakdown of each one.")
+    parser.add_argument('--json'           , action='store_true', help="Print the costs in JSON format.")
+    parser.add_argument('--no-color'       , action='store_true', help="Disable colored output.")
+    args = parser.parse_args(args=args)
+
+    if args.no_color or args.json:
+        disable_colors()
+
+    filepaths = find_workflow_files(args.workflows)
+    if not filepaths:
+        fatal_error("No workflow files found.")
+
+    costs = []
+    for filepath in filepaths:
+        try:
+            costs.append( (filepath, estimate_workflow_cost(filepath)) )
+        except (OSError, jsonio.JSONDecodeError, make.BuildError) as e:
+            error(f'Unable to estimate the cost of "{filepath}".', str(e))
+
+    if args.json:
+        report = [{"workflow": filepath,
+                   "total"   : sum(stage.cost for stage in stages),
+                   "stages"  : [{"kind": stage.kind, "node": stage.node_id, "title": stage.title,
+                                 "size": list(stage.size), "steps": stage.steps, "cost": stage.cost}
+                                for stage in stages]}
+                  for filepath, stages in costs]
+        print(jsonio.dumps(report, format="pretty"))
+    elif args.rank:
+        print()
+        print_ranking(costs)
+        print()
+    else:
+        for filepath, stages in costs:
+            print()
+            print_breakdown(filepath, stages)
+        print()
+
+    return 0 if len(costs) == len(filepaths) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+  File    : jsonio.py
+  Purpose : JSON reading and writing with an optional fast backend (orjson).
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import json
+try:
+    # orjson is an optional speed-up, used (when installed) to parse and write
+    # JSON much faster; it isn't in requirements.txt, install it by hand with
+    # `pip install orjson` (the "pretty" workflows are identical with or without it)
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# the backend used by default ("orjson" if installed, otherwise "json")
+DEFAULT_BACKEND = "orjson" if ORJSON_AVAILABLE else "json"
+
+# the output formats supported by `dumps` and `write_json`
+#  - pretty   : indented with 4 spaces (the format of the released workflows)
+#  - compact  : without any whitespace (the smallest output)
+#  - canonical: compact with sorted keys, stable for hashing and diffing
+FORMATS = ("pretty", "compact", "canonical")
+
+# error raised when the data is not valid JSON
+# (orjson.JSONDecodeError is a subclass of it)
+JSONDecodeError = json.JSONDecodeError
+
+
+#--------------------------------- READING ---------------------------------#
+
+def loads(data: str | bytes, backend: str | None = None):
+    """
+    Parses a JSON document.
+    Args:
+        data    : The JSON document as a string or bytes.
+        backend : The backend to use ("json" or "orjson"), by default the fastest available.
+    Returns:
+        The parsed Python object.
+    Raises:
+        JSONDecodeError: If the data is not valid JSON.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "orjson":
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the standard library (e.g. it rejects NaN
+            # or integers larger than 64 bits), so the final word is for `json`
+            pass
+    return json.loads(data)
+
+
+def read_json(filepath: str, backend: str | None = None):
+    """
+    Reads and parses a JSON file.
+    Args:
+        filepath: The path to the JSON file.
+        backend : The backend to use ("json" or "orjson"), by default the fastest available.
+    Returns:
+        The parsed Python object.
+    Raises:
+        OSError        : If the file can't be read.
+        JSONDecodeError: If the file content is not valid JSON.
+    """
+    with open(filepath, 'rb') as file:
+        return loads(file.read(), backend=backend)
+
+
+#--------------------------------- WRITING ---------------------------------#
+
+def dumps_bytes(obj, format: str = "pretty", backend: str | None = None, cache: dict | None = None) -> bytes:
+    """
+    Serializes a Python object to a UTF-8 encoded JSON document.
+    Args:
+        obj     : The object to serialize.
+        format  : The output format, one of `FORMATS`.
+        backend : The backend to use ("json" or "orjson"), by default the fastest available.
+        cache   : Optional; a dictionary where the encoded elements of the lists at the
+                  top level of `obj` are kept (e.g. the "nodes" of a workflow), indexed
+                  by object identity. Documents sharing those elements (such as the
+                  variants of a workflow) encode each of them only once.
+    Returns:
+        The JSON document encoded in UTF-8 (non-ASCII characters are not escaped).
+    Note:
+        The "pretty" and "canonical" formats are always generated with the
+        standard library, so the output is byte-identical whether orjson is
+        installed or not (orjson can't indent with 4 spaces and writes some
+        floats differently, e.g. 1e16 instead of 1e+16).
+        The output is also byte-identical with or without `cache`.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Invalid JSON format '{format}'. Expected one of: {', '.join(FORMATS)}.")
+    backend = backend or DEFAULT_BACKEND
+
+    if cache is not None and isinstance(obj, dict) and obj and all(isinstance(key, str) for key in obj):
+        return _dumps_bytes_cached(obj, format, backend, cache)
+
+    if format == "pretty":
+        text = json.dumps(obj, ensure_ascii=False, indent=4)
+    elif format == "canonical":
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+    elif backend == "orjson":
+        return orjson.dumps(obj)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return text.encode("utf-8")
+
+
+def _dumps_bytes_cached(obj: dict, format: str, backend: str, cache: dict) -> bytes:
+    # the document is assembled from the encoding of each top-level value,
+    # the elements of the top-level lists are taken from the cache
+    # (indentation is additive, so an element encoded on its own only
+    #  needs each line to be shifted to the depth it has in the document)
+    pretty = (format == "pretty")
+
+    def encode(value, depth: int) -> bytes:
+        data = dumps_bytes(value, format=format, backend=backend)
+        return data.replace(b"\n", b"\n" + b" " * (4 * depth)) if pretty else data
+
+    def encode_element(element, depth: int) -> bytes:
+        if not isinstance(element, (dict, list)):
+            return encode(element, depth)
+        key   = (id(element), format, backend)
+        entry = cache.get(key)
+        if entry is None or entry[0] is not element:
+            entry = cache[key] = (element, encode(element, depth))
+        return entry[1]
+
+    members = []
+    for key in (sorted(obj) if format == "canonical" else obj):
+        value = obj[key]
+        if isinstance(value, list) and value:
+            elements = [encode_element(element, 2) for element in value]
+            value    = b"[\n        " + b",\n        ".join(elements) + b"\n    ]" if pretty else b"[" + b",".join(elements) + b"]"
+        else:
+            value = encode(value, 1)
+        name = json.dumps(key, ensure_ascii=False).encode("utf-8")
+        members.append(b"    " + name + b": " + value if pretty else name + b":" + value)
+
+    return b"{\n" + b",\n".join(members) + b"\n}" if pretty else b"{" + b",".join(members) + b"}"
+
+
+def dumps(obj, format: str = "pretty", backend: str | None = None) -> str:
+    """Serializes a Python object to a JSON string (see `dumps_bytes`)."""
+    return dumps_bytes(obj, format=format, backend=backend).decode("utf-8")
+
+
+def write_json(filepath: str, obj, format: str = "pretty", backend: str | None = None, cache: dict | None = None) -> bool:
+    """
+    Writes a Python object to a JSON file, only if its content changes (see `write_bytes`).
+    Args:
+        filepath: The path to the output file.
+        obj     : The object to serialize.
+        format  : The output format, one of `FORMATS`.
+        backend : The backend to use ("json" or "orjson"), by default the fastest available.
+        cache   : Optional; the cache of encoded elements shared between documents (see `dumps_bytes`).
+    Returns:
+        True if the file was written, False if it already had the same content.
+    Raises:
+        OSError: If the file can't be written.
+    """
+    data = dumps_bytes(obj, format=format, backend=backend, cache=cache)
+    return write_bytes(filepath, data)
+
+
+def write_bytes(filepath: str, data: bytes) -> bool:
+    """
+    Writes the content of a file atomically, leaving the file untouched if it doesn't change.
+
+    When the file already has the same content, it's not written at all (so
+    its modification time is preserved). Otherwise the content is written to
+    a temporary file in the same directory, which then replaces the original,
+    so the file is never left truncated even if the process is interrupted.
+    Args:
+        filepath: The path to the output file.
+        data    : The new content of the file.
+    Returns:
+        True if the file was written, False if it already had the same content.
+    Raises:
+        OSError: If the file can't be written.
+    """
+    mode = None
+    try:
+        stat = os.stat(filepath)
+        mode = stat.st_mode & 0o7777
+        if stat.st_size == len(data):
+            with open(filepath, 'rb') as file:
+                if file.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    directory, filename = os.path.split(filepath)
+    temp_path = os.path.join(directory, f".{filename}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        if mode is not None:
+            os.chmod(temp_path, mode)  #< keep the permissions of the replaced file
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return True
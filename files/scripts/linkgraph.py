@@ -0,0 +1,176 @@
+"""
+  File    : linkgraph.py
+  Purpose : Graph of the links between the nodes of a workflow (execution order, cycles, dangling links).
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+from collections import deque
+
+
+class CycleError(Exception):
+    """Raised when the links of a workflow form a cycle, so it has no execution order."""
+    def __init__(self, message: str, nodes: list):
+        super().__init__(message)
+        self.nodes = nodes  #< the ids of the nodes that are part of (or depend on) a cycle
+
+
+#------------------------------- LINK GRAPH --------------------------------#
+
+class LinkGraph:
+    """
+    The graph of the connections between the nodes of a comfyui workflow.
+
+    The edges are taken from the "links" array of the workflow, each link
+    [id, origin_id, origin_slot, target_id, target_slot, type] connects the
+    origin node to the target node. The link ids referenced by the "inputs"
+    and "outputs" of the nodes are cross-checked against it, so the links
+    that don't exist (or connect nodes that don't exist) are reported.
+
+    Attributes:
+        node_ids      : The ids of the nodes, in the order of the workflow.
+        successors    : For each node id, the ids of the nodes connected to its outputs (one per link).
+        dangling_links: The sorted ids of the links that are referenced by a node but don't exist,
+                        or that connect a node that doesn't exist.
+    """
+    def __init__(self, workflow_json: dict):
+        nodes           = workflow_json.get("nodes") or []
+        self.node_ids   = [node["id"] for node in nodes]
+        self.successors = {node_id: [] for node_id in self.node_ids}
+        successors      = self.successors
+
+        link_ids = set()
+        dangling = set()
+        for link in workflow_json.get("links") or []:
+            if isinstance(link, dict):  #< (the newer format of the links, used inside subgraphs)
+                link = [link.get("id"), link.get("origin_id"), link.get("origin_slot"),
+                        link.get("target_id"), link.get("target_slot"), link.get("type")]
+            link_id, origin_id, target_id = link[0], link[1], link[3]
+            link_ids.add(link_id)
+            if origin_id in successors and target_id in successors:
+                successors[origin_id].append(target_id)
+            else:
+                dangling.add(link_id)
+
+        # the links referenced by the nodes must exist
+        for node in nodes:
+            for input in node.get("inputs") or ():
+                link_id = input.get("link")
+                if link_id is not None and link_id not in link_ids:
+                    dangling.add(link_id)
+            for output in node.get("outputs") or ():
+                for link_id in output.get("links") or ():
+                    if link_id not in link_ids:
+                        dangling.add(link_id)
+        self.dangling_links = sorted(dangling, key=str)
+
+    def topological_order(self) -> list:
+        """
+        Returns the ids of the nodes sorted so that each node comes after all the nodes connected to its inputs.
+
+        Kahn's algorithm is used, in O(V+E). The nodes without pending inputs are
+        taken in the order of the workflow (as the comfyui editor does), so the
+        same workflow always results in the same order.
+        Raises:
+            CycleError: If the links form a cycle.
+        """
+        successors = self.successors
+        in_degree  = dict.fromkeys(self.node_ids, 0)
+        for targets in successors.values():
+            for target_id in targets:
+                in_degree[target_id] += 1
+
+        order = []
+        ready = deque(node_id for node_id, degree in in_degree.items() if degree == 0)
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for target_id in successors[node_id]:
+                in_degree[target_id] -= 1
+                if in_degree[target_id] == 0:
+                    ready.append(target_id)
+
+        if len(order) < len(in_degree):
+            pending = [node_id for node_id, degree in in_degree.items() if degree > 0]
+            cycle   = self.find_cycle(pending)
+            raise CycleError(f"The links form a cycle: {' -> '.join(map(str, cycle))}", cycle or pending)
+        return order
+
+    def find_cycle(self, node_ids: list | None = None) -> list:
+        """
+        Returns the ids of the nodes of one cycle (the first node repeated at the end), or [] if there is none.
+        Args:
+            node_ids: Optional; the nodes where the search starts (by default, all the nodes).
+        """
+        successors = self.successors
+        state      = {}  #< node id -> 1 while it's on the current path, 2 when it has been fully explored
+        for start_id in (node_ids if node_ids is not None else self.node_ids):
+            if start_id in state:
+                continue
+            # iterative depth-first search (a recursive one would overflow on long chains)
+            path  = [start_id]
+            stack = [iter(successors[start_id])]
+            state[start_id] = 1
+            while stack:
+                target_id = next(stack[-1], None)
+                if target_id is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state.get(target_id) == 1:
+                    return path[path.index(target_id):] + [target_id]
+                elif target_id not in state:
+                    state[target_id] = 1
+                    path.append(target_id)
+                    stack.append(iter(successors[target_id]))
+        return []
+
+
+#----------------------------- EXECUTION ORDER -----------------------------#
+
+def get_order_errors(workflow_json: dict, graph: LinkGraph | None = None) -> list:
+    """
+    Returns the ids of the nodes whose "order" field doesn't follow the links,
+    i.e. nodes that are not after all the nodes connected to their inputs.
+    """
+    graph  = graph or LinkGraph(workflow_json)
+    orders = {node["id"]: node.get("order") for node in workflow_json.get("nodes") or []}
+    errors = set()
+    for origin_id, targets in graph.successors.items():
+        origin_order = orders[origin_id]
+        for target_id in targets:
+            target_order = orders[target_id]
+            if origin_order is None or target_order is None or target_order <= origin_order:
+                errors.add(target_id)
+    return [node_id for node_id in graph.node_ids if node_id in errors]
+
+
+def update_node_order(workflow_json: dict, graph: LinkGraph | None = None) -> dict:
+    """
+    Rewrites the "order" field of each node with its position in the execution order.
+
+    The workflow isn't modified, the returned one shares with it all the
+    nodes whose order doesn't change (so it must be treated as read-only).
+    Args:
+        workflow_json: The dictionary containing the comfyui workflow.
+        graph        : Optional; the graph of the workflow if it's already built.
+    Returns:
+        The workflow with the updated orders (the same dictionary if no order changes).
+    Raises:
+        CycleError: If the links form a cycle.
+    """
+    graph   = graph or LinkGraph(workflow_json)
+    orders  = {node_id: index for index, node_id in enumerate(graph.topological_order())}
+    nodes   = workflow_json.get("nodes") or []
+    changed = False
+    new_nodes = []
+    for node in nodes:
+        order = orders[node["id"]]
+        if node.get("order") != order:
+            node, changed = {**node, "order": order}, True
+        new_nodes.append(node)
+    return {**workflow_json, "nodes": new_nodes} if changed else workflow_json
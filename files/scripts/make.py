@@ -13,57 +13,41 @@
 import os
 import sys
 import json
+import hashlib
+import pickle
+import re
+import fnmatch
+import string
+import time
 import argparse
-from collections.abc import Callable
+import contextlib
+from io import StringIO
+from typing import NamedTuple
+from collections.abc import Callable, Iterable, Mapping
+import jsonio
+import linkgraph
+import console
+from console import disable_colors, capture_messages, get_message_stream, info, warning, error, fatal_error
 
 # default directory where to look for source files
 DEFAULT_SOURCE_DIR = "src"
 
-# ANSI escape codes for colored terminal output
-RED      = '\033[91m'
-DKRED    = '\033[31m'
-YELLOW   = '\033[93m'
-DKYELLOW = '\033[33m'
-GREEN    = '\033[92m'
-CYAN     = '\033[96m'
-DKGRAY   = '\033[90m'
-RESET    = '\033[0m'
+# name of the file where the build cache is stored (inside the output directory)
+BUILD_CACHE_FILENAME = ".make-cache.json"
 
-#----------------------------- ERROR MESSAGES ------------------------------#
+# directory where the precompiled templates are stored (inside the output directory)
+TEMPLATE_CACHE_DIR = ".make-templates"
 
-def disable_colors():
-    global RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET
-    RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET = "", "", "", "", "", "", "", ""
+# format of the generated workflow files (see `jsonio.FORMATS`)
+DEFAULT_JSON_FORMAT = "pretty"
 
+# address where the workflow server listens by default (see `serve`)
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8765
 
-def info(message: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays an informational message to the error stream.
-    """
-    print(f"{" "*padding}{CYAN}\u24d8 {message}{RESET}", file=file)
-
-
-def warning(message: str, *info_messages: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays a warning message to the standard error stream.
-    """
-    print(f"{" "*padding}{CYAN}[{YELLOW}WARNING{CYAN}]{DKYELLOW} {message}{RESET}", file=file)
-    for info_message in info_messages:
-        info(info_message, padding=padding, file=file)
-
-
-def error(message: str, *info_messages: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays an error message to the standard error stream.
-    """
-    print(f"{" "*padding}{DKRED}[{RED}ERROR!{DKRED}]{DKYELLOW} {message}{RESET}", file=file)
-    for info_message in info_messages:
-        info(info_message, padding=padding, file=file)
-
-
-def fatal_error(message: str, *info_messages: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays a fatal error message to the standard error stream and exits with status code 1.
-    """
-    error(message, *info_messages, padding=padding, file=file)
-    sys.exit(1)
-
+# the source files of the build scripts, any change to them invalidates
+# the build cache and the precompiled templates
+SCRIPT_FILEPATHS = tuple(os.path.abspath(module.__file__) for module in (sys.modules[__name__], jsonio, linkgraph))
 
 #--------------------------------- HELPERS ---------------------------------#
 
@@ -84,8 +68,74 @@ def is_zconfig_file(file_path: str) -> bool:
         return False
 
 
+def copy_json(value):
+    """
+    Returns a deep copy of a JSON tree (the dicts and lists are copied, the other values are immutable).
+    """
+    if isinstance(value, dict):
+        return {key: copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    return value
+
+
+class PhaseTimer:
+    """
+    Measures the time spent in consecutive phases of a process (used by benchmark.py).
+
+    Each call to `mark(phase)` adds the time elapsed since the previous mark
+    to `timings[phase]`. When `timings` is None the timer does nothing.
+    """
+    def __init__(self, timings: dict[str, float] | None) -> None:
+        self.timings = timings
+        self.last    = time.perf_counter() if timings is not None else 0.0
+
+    def mark(self, phase: str) -> None:
+        """Records the time elapsed since the previous mark as part of `phase`."""
+        if self.timings is not None:
+            now = time.perf_counter()
+            self.timings[phase] = self.timings.get(phase, 0.0) + (now - self.last)
+            self.last = now
+
+    def restart(self) -> None:
+        """Discards the time elapsed since the previous mark."""
+        if self.timings is not None:
+            self.last = time.perf_counter()
+
+
 #------------------------- CONFIGURATION VARIABLES -------------------------#
 
+class ConfigAction(NamedTuple):
+    """
+    An action parsed from a configuration file (see `parse_config_lines`).
+
+    Attributes:
+        kind   : The type of action: "variable", "style", "command" or "header" (the "#!ZCONFIG" line).
+        name   : The variable name ("#NAME"), the style name, the command (">>:ENABLE") or the header.
+        content: The raw content associated with the action, without resolving variables.
+        text   : The original line that defines the action.
+        line   : The line number of the action (1-based).
+        source : The path of the file the action was read from (None if read from a text).
+    """
+    kind   : str
+    name   : str
+    content: str
+    text   : str
+    line   : int
+    source : str | None = None
+
+    def location(self) -> str:
+        """Returns the location of the action as "file:line" (for error messages)."""
+        return f"{os.path.basename(self.source) if self.source else '<text>'}:{self.line}"
+
+
+class ConfigError(Exception):
+    """Raised when a configuration contains an error, includes its location in the message."""
+    def __init__(self, message: str, action: ConfigAction | None = None) -> None:
+        super().__init__(f"{action.location()}: {message}" if action else message)
+        self.action = action
+
+
 class ConfigVars(dict):
     """
     A dictionary-like class that stores configuration variables and styles.
@@ -94,37 +144,321 @@ class ConfigVars(dict):
     to include a list of styles under the property `self.styles`.
     It also handles missing keys by returning the key itself, allowing safe use
     in `string.format_map()`.
+    The paths of all files read to populate it (including the files pulled in
+    through ">>:INCLUDE") are stored under the property `self.sources`, and
+    the named subsets of styles (">>:STYLE-SET NAME") under `self.style_sets`.
+
+    The variables defined by a configuration ("{#NAME}" actions) are stored
+    unresolved in `self.definitions` and expanded lazily, the first time they
+    are read, so a variable can reference others defined later in the file.
+    Each expansion is memoized in the dictionary itself until a variable is
+    defined or assigned again; a circular reference raises `ConfigError`.
+    Values assigned directly (e.g. `config_vars["#PROMPT"] = ...`) are literal,
+    they are never expanded and take precedence over any definition.
     """
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args,**kwargs)
         self.styles              = []
         self.node_modifications  = []
         self.group_modifications = []
+        self.sources             = []
+        self.style_sets          = {}     #< style names or patterns, indexed by set name
+        self.definitions         = {}     #< unresolved variables, indexed by name
+        self._expanded           = set()  #< names of the definitions memoized in the dictionary
 
     def __missing__(self,key):
-        return '{' + key + '}'
+        return self.resolve(key)
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or key in self.definitions
+
+    def __setitem__(self, key, value) -> None:
+        self._forget_expansions()
+        super().__setitem__(key, value)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        self._forget_expansions()
+        super().update(*args, **kwargs)
+
+    def copy(self) -> "ConfigVars":
+        """Returns a copy of the configuration, including its definitions, styles and modifications."""
+        config_vars = type(self)(super().items())
+        config_vars.styles              = list(self.styles)
+        config_vars.node_modifications  = list(self.node_modifications)
+        config_vars.group_modifications = list(self.group_modifications)
+        config_vars.sources             = list(self.sources)
+        config_vars.style_sets          = {name: list(entries) for name, entries in self.style_sets.items()}
+        config_vars.definitions         = dict(self.definitions)
+        config_vars._expanded           = set(self._expanded)
+        return config_vars
+
+    def define(self, action: ConfigAction) -> None:
+        """
+        Defines a variable with the unresolved content of a "{#NAME}" action,
+        replacing any previous definition or value of the variable.
+        """
+        self._forget_expansions()
+        super().pop(action.name, None)
+        self.definitions[action.name] = action
+
+    def resolve(self, name: str, _chain: tuple[str, ...] = ()) -> str:
+        """
+        Returns the value of a variable, expanding its definition only once.
+        Args:
+            name  : The name of the variable, e.g. "#TITLE".
+            _chain: The variables being expanded (used internally to detect cycles).
+        Returns:
+            The value of the variable, or the placeholder itself ("{name}")
+            if the variable is not defined.
+        Raises:
+            ConfigError: If the definition contains an invalid placeholder or
+                         the variable references itself (directly or indirectly).
+        """
+        if super().__contains__(name):
+            return super().__getitem__(name)
+        action = self.definitions.get(name)
+        if action is None:
+            return self.undefined(name)
+        if name in _chain:
+            cycle = (*_chain[_chain.index(name):], name)
+            raise ConfigError(f"Circular reference between variables: {' -> '.join(cycle)}", action)
+
+        value = self.expand(action.content, action, (*_chain, name)).strip()
+        super().__setitem__(name, value)
+        self._expanded.add(name)
+        return value
+
+    def expand(self,
+               text  : str,
+               action: ConfigAction | None = None,
+               _chain: tuple[str, ...] = ()
+               ) -> str:
+        """
+        Replaces the placeholders of a text with the value of the variables they reference.
+        Args:
+            text  : The text to expand (e.g. the content of a style).
+            action: The action the text comes from (used in error messages).
+        Raises:
+            ConfigError: If the text contains an invalid placeholder or a circular reference.
+        """
+        # only texts with braces need to be formatted
+        # (this also keeps "{{" and "}}" escapes working as before)
+        if "{" not in text and "}" not in text:
+            return text
+        try:
+            return text.format_map(_VariableLookup(self, _chain))
+        except (ValueError, IndexError) as e:
+            line = action.text if action else text.strip().splitlines()[0]
+            raise ConfigError(f"Invalid placeholder in '{line}': {e}", action) from None
+
+    def undefined(self, name: str) -> str:
+        """Returns the replacement for a variable that is not defined (the placeholder itself)."""
+        return '{' + name + '}'
+
+    def _forget_expansions(self) -> None:
+        # any memoized expansion can depend on the variable being changed
+        for name in self._expanded:
+            super().pop(name, None)
+        self._expanded.clear()
+
+
+class _VariableLookup:
+    """The mapping used by `ConfigVars.expand` to resolve each placeholder in `str.format_map`."""
+    def __init__(self, config_vars: ConfigVars, chain: tuple[str, ...]) -> None:
+        self.config_vars = config_vars
+        self.chain       = chain
+
+    def __getitem__(self, name: str) -> str:
+        return self.config_vars.resolve(name, self.chain)
+
+
+class FragmentVars(ConfigVars):
+    """
+    A `ConfigVars` used to parse a file pulled in through ">>:INCLUDE".
+
+    It records the names of the variables that were referenced without being
+    defined in the file itself, which means the file content depends on the
+    variables defined by the file that includes it.
+    """
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args,**kwargs)
+        self.missing_vars = set()
+
+    def undefined(self, name: str) -> str:
+        self.missing_vars.add(name)
+        return super().undefined(name)
+
+
+class ConfigFragment:
+    """
+    The immutable result of parsing a configuration file pulled in through ">>:INCLUDE".
+
+    Fragments are cached (see `load_config_fragment`), so a file included by
+    many configurations is read and parsed only once. When the file doesn't
+    reference any variable defined outside of it, the parsed variables, styles
+    and modifications are merged directly into the including `ConfigVars`;
+    otherwise its actions are replayed, resolving them against the includer.
+    (variables and styles are stored unresolved, so only the commands can
+    make a fragment depend on the includer)
+
+    Attributes:
+        filepath: The path to the included file.
+        actions : The actions parsed from the file (see `parse_config_lines`).
+        sources : The paths of the file and every file it includes (recursively).
+        mtimes  : The modification time of each file in `sources` when parsed.
+        messages: The warnings and errors reported while parsing the file,
+                  displayed again each time the fragment is merged.
+    """
+    def __init__(self,
+                 filepath     : str,
+                 actions      : tuple[ConfigAction, ...],
+                 fragment_vars: FragmentVars,
+                 messages     : str
+                 ) -> None:
+        self.filepath            = filepath
+        self.actions             = tuple(actions)
+        self.definitions         = tuple(fragment_vars.definitions.values())
+        self.styles              = tuple(fragment_vars.styles)
+        self.node_modifications  = tuple(fragment_vars.node_modifications)
+        self.group_modifications = tuple(fragment_vars.group_modifications)
+        self.sources             = tuple(fragment_vars.sources)
+        self.style_sets          = tuple((name, tuple(entries)) for name, entries in fragment_vars.style_sets.items())
+        self.mtimes              = tuple(get_mtime(source) for source in self.sources)
+        self.realpaths           = frozenset(os.path.realpath(source) for source in self.sources)
+        self.context_free        = not fragment_vars.missing_vars
+        self.messages            = messages
+
+    def is_current(self) -> bool:
+        """Returns `True` if none of the files the fragment was parsed from have been modified."""
+        return all(get_mtime(source) == mtime for source, mtime in zip(self.sources, self.mtimes))
+
+    def merge_into(self, config_vars: ConfigVars, include_stack: tuple[str, ...]) -> None:
+        """
+        Adds the content of the fragment to a configuration dictionary.
+        Args:
+            config_vars  : The configuration dictionary that includes the fragment.
+            include_stack: The real paths of the files being included, used to detect cycles
+                           (must contain the fragment itself).
+        """
+        if self.context_free:
+            if self.messages:
+                print(self.messages, end="", file=get_message_stream())
+            for action in self.definitions:
+                config_vars.define(action)
+            config_vars.styles.extend(self.styles)
+            config_vars.node_modifications.extend(self.node_modifications)
+            config_vars.group_modifications.extend(self.group_modifications)
+            config_vars.sources.extend(self.sources)
+            for name, entries in self.style_sets:
+                config_vars.style_sets.setdefault(name, []).extend(entries)
+        else:
+            config_vars.sources.append(self.filepath)
+            process_actions(self.actions,
+                            config_vars   = config_vars,
+                            base_dir      = os.path.dirname(self.filepath),
+                            include_stack = include_stack)
+
+
+def get_mtime(filepath: str) -> int | None:
+    """Returns the modification time of a file in nanoseconds, or None if it can't be accessed."""
+    try:
+        return os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+
+
+# fragments already parsed, indexed by real path (only the latest version of each file is kept)
+_config_fragments: dict[str, ConfigFragment] = {}
+
+def load_config_fragment(filepath     : str,
+                         include_stack: tuple[str, ...]
+                         ) -> ConfigFragment:
+    """
+    Loads a configuration file pulled in through ">>:INCLUDE", parsing it only once.
+
+    The parsed fragment is reused as long as neither the file nor any of the
+    files it includes are modified. Messages reported while parsing are
+    captured into the fragment instead of being displayed.
+    Args:
+        filepath     : The path to the configuration file to include.
+        include_stack: The real paths of the files being included, used to detect cycles.
+    Returns:
+        The parsed `ConfigFragment`.
+    """
+    realpath = os.path.realpath(filepath)
+    fragment = _config_fragments.get(realpath)
+    if fragment is not None and fragment.is_current():
+        return fragment
+
+    fragment_vars = FragmentVars()
+    messages      = StringIO()
+    with capture_messages(messages):
+        actions = parse_config_file(filepath)
+        fragment_vars.sources.append(filepath)
+        process_actions(actions,
+                        config_vars   = fragment_vars,
+                        base_dir      = os.path.dirname(filepath),
+                        include_stack = include_stack + (realpath,))
+
+    fragment = ConfigFragment(filepath, actions, fragment_vars, messages.getvalue())
+    _config_fragments[realpath] = fragment  #< replaces the outdated version, if any
+    return fragment
+
+
+def include_file(config_vars  : ConfigVars,
+                 filepath     : str,
+                 include_stack: tuple[str, ...]
+                 ) -> None:
+    """
+    Adds the variables, styles and modifications of a configuration file to `config_vars`.
+    Args:
+        config_vars  : The configuration dictionary to populate.
+        filepath     : The path to the configuration file to include.
+        include_stack: The real paths of the files being included, used to detect cycles.
+    """
+    realpath = os.path.realpath(filepath)
+    if realpath not in include_stack:
+        fragment = load_config_fragment(filepath, include_stack)
+        # a cached fragment may have been parsed from a different place,
+        # so any file it pulls in could also close a cycle
+        if fragment.realpaths.isdisjoint(include_stack):
+            fragment.merge_into(config_vars, include_stack + (realpath,))
+            return
+
+    chain = [os.path.basename(path) for path in (*include_stack, realpath)]
+    error(f"Circular include of '{filepath}'.", " -> ".join(chain))
 
 
-def process_action(action     : str,
-                   content    : str,
+def process_action(action       : ConfigAction,
+                   content      : str,
                    /,*,
-                   config_vars: ConfigVars,
-                   base_dir   : str,
-                   can_include: bool = True,
+                   config_vars  : ConfigVars,
+                   base_dir     : str,
+                   include_stack: tuple[str, ...] = (),
                    ) -> None:
     """
     Processes an action and updates the configuration dictionary accordingly.
 
     Args:
-        action     : The action line that defines how to handle the content.
-        content    : The actual content associated with the action line.
-        config_vars: The destination configuration dictionary that will be updated.
-        base_dir   : The base directory for relative paths.
-        can_include: Whether or not the ">>:INCLUDE" command is allowed.
+        action       : The parsed action that defines how to handle the content.
+        content      : The content associated with the action (variables already resolved
+                       in commands, unresolved in variables and styles).
+        config_vars  : The destination configuration dictionary that will be updated.
+        base_dir     : The base directory for relative paths.
+        include_stack: The real paths of the files being read, used to detect
+                       circular ">>:INCLUDE" commands.
 
     This function modifies 'config_vars' in-place based on the specified 'action':
-     - Actions with "{#VARNAME}" format, add a variable to the dictionary.
-     - Actions with ">>>STYLE NAME" format, add a style to the dictionary.
+     - Actions with "{#VARNAME}" format, add an unresolved variable to the dictionary.
+     - Actions with ">>>STYLE NAME" format, add an unresolved style to the dictionary.
      - Actions with ">>:COMMAND" format are commands to be executed
        (such as enabling or disabling nodes).
 
@@ -132,69 +466,213 @@ def process_action(action     : str,
         None, the function modifies 'config_vars' in-place.
     """
     # actions with format "{#VARNAME}" add a variable to the dictionary
-    if action.startswith("{#"):
-        varname = action[1:].strip().rstrip('}')
-        config_vars[varname] = content.strip()
+    # (it's expanded only if something references it, see `ConfigVars.resolve`)
+    if action.kind == "variable":
+        config_vars.define(action)
 
     # actions with format ">>>STYLE NAME" add a style to the dictionary
-    elif action.startswith(">>>"):
-        style_name = action[3:].strip()
-        style      = (style_name, content.strip())
+    # (its variables are resolved when the workflow is built, see `resolve_styles`)
+    elif action.kind == "style":
+        style = (action.name, content.strip())
         config_vars.styles.append( style )
 
     # actions with format ">>:COMMAND" are commands to modify nodes
-    elif action.startswith(">>:"):
+    elif action.kind == "command":
 
-        if action == ">>:INCLUDE" and can_include:
+        # the titles of node and group commands can be patterns (see `title_pattern_to_regex`)
+        # (and so can the style names listed by ">>:STYLE-SET")
+        if action.name != ">>:INCLUDE":
+            for line in content.splitlines():
+                check_title_pattern(line.strip(), action)
+
+        if action.name == ">>:INCLUDE":
             for line in content.splitlines():
                 file_to_include = line.strip()
                 if file_to_include:
                     file_to_include = os.path.join(base_dir, file_to_include)
-                    read_vars_from_file( config_vars, file_to_include, can_include=False )
+                    include_file( config_vars, file_to_include, include_stack )
 
-        elif action == ">>:ENABLE":
+        elif action.name == ">>:ENABLE":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.node_modifications.append( (node_title, {"mode":0}) )
 
-        elif action == ">>:DISABLE":
+        elif action.name == ">>:DISABLE":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.node_modifications.append( (node_title, {"mode":2}) )
 
-        elif action == ">>:PIN":
+        elif action.name == ">>:PIN":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.node_modifications.append( (node_title, {"pinned":True}) )
 
-        elif action == ">>:UNPIN":
+        elif action.name == ">>:UNPIN":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.node_modifications.append( (node_title, {"pinned":False}) )
 
-        elif action == ">>:PIN-GROUP":
+        elif action.name == ">>:PIN-GROUP":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.group_modifications.append( (node_title, {"pinned":True}) )
 
-        elif action == ">>:UNPIN-GROUP":
+        elif action.name == ">>:UNPIN-GROUP":
             for line in content.splitlines():
                 node_title = line.strip()
                 if node_title:
                     config_vars.group_modifications.append( (node_title, {"pinned":False}) )
 
+        elif action.name == ">>:ENABLE-GROUP":
+            for line in content.splitlines():
+                group_title = line.strip()
+                if group_title:
+                    config_vars.group_modifications.append( (group_title, {"mode":0}) )
+
+        elif action.name == ">>:DISABLE-GROUP":
+            for line in content.splitlines():
+                group_title = line.strip()
+                if group_title:
+                    config_vars.group_modifications.append( (group_title, {"mode":2}) )
+
+        elif action.name.startswith(">>:STYLE-SET ") or action.name == ">>:STYLE-SET":
+            set_name = action.name[len(">>:STYLE-SET"):].strip()
+            if not set_name:
+                warning("Missing name of the style set in '>>:STYLE-SET'", action.location())
+                return
+            entries = config_vars.style_sets.setdefault(set_name, [])
+            for line in content.splitlines():
+                style_name = line.strip()
+                if style_name:
+                    entries.append( style_name )
+
+        else:
+            warning(f"Unknown command '{action.name}'", action.location())
+
+
+def process_actions(actions      : Iterable[ConfigAction],
+                    /,*,
+                    config_vars  : ConfigVars,
+                    base_dir     : str,
+                    include_stack: tuple[str, ...] = (),
+                    ) -> None:
+    """
+    Processes a list of actions in order, resolving the variables of each command.
+    Args:
+        actions      : The actions parsed from a configuration (see `parse_config_lines`).
+        config_vars  : The destination configuration dictionary that will be updated.
+        base_dir     : The base directory for relative paths.
+        include_stack: The real paths of the files being read, used to detect cycles.
+    Raises:
+        ConfigError: If the content of a command contains an invalid placeholder.
+    Note:
+        Commands are resolved when they are processed, so they can only reference
+        the variables defined before them; variables and styles are resolved lazily.
+    """
+    for action in actions:
+        if action.kind == "header":
+            continue
+        content = action.content
+        if action.kind == "command":
+            content = config_vars.expand(content, action)
+        process_action(action,
+                       content,
+                       config_vars   = config_vars,
+                       base_dir      = base_dir,
+                       include_stack = include_stack,
+                       )
+
+
+def parse_config_lines(lines : Iterable[str],
+                       source: str | None = None
+                       ) -> tuple[ConfigAction, ...]:
+    """
+    Splits the lines of a configuration into actions and their associated content.
+
+    This is a single-pass tokenizer: each line is classified once and the
+    lines of a content are joined only when the action ends, so the time
+    is linear on the size of the configuration (even with huge style blocks).
+    Args:
+        lines : The lines of the configuration (with or without line endings),
+                can be any iterable, e.g. an open file.
+        source: The path of the file the lines come from (used in error messages).
+    Returns:
+        A tuple of `ConfigAction` in the same order they appear in the lines;
+        their content is stored as is, without resolving variables.
+    Note:
+        - Lines defined as "{#VARNAME}", ">>>STYLE_NAME" or ">>:COMMAND" are
+          treated as an action, anything before the first action is ignored.
+        - Multi-line content is supported.
+    """
+    actions = []
+    action  = None  #< (kind, name, text, line_number) of the pending action
+    body    = []    #< lines of the content of the pending action
+
+    def flush() -> None:
+        if action:
+            kind, name, text, line_number = action
+            content = "\n".join(body) + "\n" if body else ""
+            actions.append( ConfigAction(kind, name, content, text, line_number, source) )
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip() #< trailing whitespaces are lost at the end of each line
+
+        if line_number == 1 and line.startswith("#!"):
+            kind, name = "header", line[2:]
+        elif line.startswith("{#"):   #< variable definition action
+            kind, name = "variable", line[1:].strip().rstrip('}')
+        elif line.startswith(">>:"):  #< action to modify node property
+            kind, name = "command", line
+        elif line.startswith(">>>"):  #< style definition action
+            kind, name = "style", line[3:].strip()
         else:
-            warning(f"Unknown command '{action}'")
+            body.append(line)
+            continue
+
+        # a new action is detected, so the previous pending one is stored
+        # and the new action is stored as pending
+        flush()
+        action, body = (kind, name, line, line_number), []
+
+    # before ending, store any pending action
+    flush()
+    return tuple(actions)
+
+
+# configuration files already parsed, indexed by real path -> ((mtime, size), actions)
+_parsed_configs: dict[str, tuple[tuple, tuple[ConfigAction, ...]]] = {}
+
+def parse_config_file(filepath: str) -> tuple[ConfigAction, ...]:
+    """
+    Reads a configuration file and splits it into actions (see `parse_config_lines`).
+
+    The parsed actions are cached, so the file is parsed again only when it's modified.
+    Args:
+        filepath: The path to the configuration file to read.
+    Returns:
+        A tuple of `ConfigAction` in the same order they appear in the file.
+    """
+    if not os.path.isfile(filepath):
+        warning(f"File '{filepath}' does not exist.")
+
+    stat      = os.stat(filepath)
+    realpath  = os.path.realpath(filepath)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached    = _parsed_configs.get(realpath)
+    if cached is None or cached[0] != signature:
+        with open(filepath) as f:
+            cached = _parsed_configs[realpath] = (signature, parse_config_lines(f, source=filepath))
+    return cached[1]
 
 
-def read_vars_from_file(config_vars: ConfigVars,
-                        filepath   : str,
-                        can_include: bool = True
+def read_vars_from_file(config_vars  : ConfigVars,
+                        filepath     : str,
+                        include_stack: tuple[str, ...] = ()
                         ) -> None:
     """
     Reads a configuration file and populates the vars dictionary with its contents.
@@ -204,64 +682,503 @@ def read_vars_from_file(config_vars: ConfigVars,
     either variables or styles to the provided dictionary.
 
     Args:
-        config_vars: The configuration dictionary to populate with variables
-                     and styles from the file.
-        filepath   : The path to the configuration file to read.
-        can_include: Whether or not the ">>:INCLUDE" command is allowed.
+        config_vars  : The configuration dictionary to populate with variables
+                       and styles from the file.
+        filepath     : The path to the configuration file to read.
+        include_stack: The real paths of the files being included, used to detect
+                       circular ">>:INCLUDE" commands (empty for a top-level file).
     Returns:
         None, this function modifies the 'config_dict' in-place.
     Note:
         - Lines defined as "{#VARNAME}" or ">>STYLE_NAME" are treated as a action.
         - Multi-line content is supported.
+        - Included files are parsed only once (see `load_config_fragment`)
+          and can include other files.
     """
-    action   = None
-    content  = ""
-    base_dir = os.path.dirname(filepath) #< path to the directory where file was read from
+    actions = parse_config_file(filepath)
+    config_vars.sources.append(filepath)
+    process_actions(actions,
+                    config_vars   = config_vars,
+                    base_dir      = os.path.dirname(filepath), #< path to the directory where file was read from
+                    include_stack = include_stack + (os.path.realpath(filepath),),
+                    )
+
+
+def read_vars_from_text(config_vars: ConfigVars,
+                        text       : str,
+                        base_dir   : str = "."
+                        ) -> None:
+    """
+    Populates the vars dictionary with the contents of a configuration text.
 
-    if not os.path.isfile(filepath):
-        warning(f"File '{filepath}' does not exist.")
+    Works the same way as `read_vars_from_file` but with the configuration
+    already in memory (e.g. received by a service).
+    Args:
+        config_vars: The configuration dictionary to populate.
+        text       : The content of the configuration (ZCONFIG format).
+        base_dir   : The base directory for the files pulled in through ">>:INCLUDE".
+    """
+    process_actions(parse_config_lines(text.splitlines()),
+                    config_vars = config_vars,
+                    base_dir    = base_dir,
+                    )
+
+
+#---------------------------- SHARED TEMPLATES -----------------------------#
+
+class PlaceholderSlot:
+    """
+    A string of a workflow template that contains placeholders.
+
+    The string is pre-split into literal and variable segments, so it can
+    be rendered without parsing it again for each configuration.
+
+    Attributes:
+        path    : The keys/indexes to reach the string from the root of the template.
+        text    : The original string.
+        segments: A list of (literal, varname) tuples, `varname` is None for the
+                  trailing literal. It's None when the string uses features not
+                  supported by the pre-split form (format specs, conversions,
+                  attribute access) or is malformed; in that case the string
+                  is rendered with `str.format_map`.
+    """
+    def __init__(self, path: tuple, text: str) -> None:
+        self.path     = path
+        self.text     = text
+        self.segments = []
+        try:
+            for literal, varname, format_spec, conversion in string.Formatter().parse(text):
+                if varname is not None and (format_spec or conversion or
+                                            not varname or varname.isdigit() or
+                                            '.' in varname or '[' in varname):
+                    self.segments = None
+                    break
+                self.segments.append( (literal, varname) )
+        except ValueError:
+            self.segments = None
+
+    def render(self, config_vars: ConfigVars) -> str:
+        """Returns the string with all placeholders replaced by the values in `config_vars`."""
+        if self.segments is None:
+            return self.text.format_map(config_vars)
+        parts = []
+        for literal, varname in self.segments:
+            parts.append(literal)
+            if varname is not None:
+                parts.append(str(config_vars[varname]))
+        return "".join(parts)
+
+
+def compile_placeholder_slots(json_collection, path: tuple = ()) -> list[PlaceholderSlot]:
+    """
+    Finds all strings within a JSON structure that would change when resolving variables.
+    Args:
+        json_collection: The JSON object (dict or list) to search recursively.
+        path           : The path to `json_collection` from the root of the JSON structure.
+    Returns:
+        A list of `PlaceholderSlot` objects, in the same order the strings appear.
+    """
+    slots = []
+    if isinstance(json_collection, dict):
+        items = json_collection.items()
+    elif isinstance(json_collection, list):
+        items = enumerate(json_collection)
+    else:
+        return slots
+
+    for key, jobject in items:
+        if isinstance(jobject, str):
+            if '{' in jobject or '}' in jobject:
+                slots.append( PlaceholderSlot(path + (key,), jobject) )
+        elif isinstance(jobject, (list, dict)):
+            slots.extend( compile_placeholder_slots(jobject, path + (key,)) )
+    return slots
+
+
+class WorkflowTemplate:
+    """
+    A parsed workflow template, loaded once and shared by every workflow built from it.
+
+    The JSON tree stored in `self.json` must be treated as read-only, the
+    workflows created from the template share its nodes and groups with it
+    until they need to modify them (see the `Workflow` class).
+
+    Attributes:
+        filepath: The path to the JSON file the template was loaded from.
+        json    : The dictionary containing the full comfyui workflow.
+        slots   : The list of strings with placeholders (see `PlaceholderSlot`).
+        indexes : The position of the nodes (by title and id) and of the groups (by title)
+                  (see `build_workflow_indexes`).
+    Args:
+        filepath: The path to the JSON file the template was loaded from.
+        json    : The dictionary containing the full comfyui workflow.
+        base    : Optional; the template `json` was built from, when it's a workflow
+                  whose variables are already resolved (see `build_style_variants`).
+                  Its strings aren't scanned again and the group members are shared,
+                  since the nodes of a workflow are never moved.
+    """
+    def __init__(self, filepath: str, json: dict, base: "WorkflowTemplate | None" = None) -> None:
+        self.filepath = filepath
+        self.json     = json
+        self.slots    = compile_placeholder_slots(json) if base is None else []
+        self.indexes  = build_workflow_indexes(json)
+        self._group_members = {} if base is None else base._group_members
+        self._index_positions()
+
+    def __getstate__(self) -> dict:
+        # the positions are indexed by object id, only valid in this process
+        state = dict(self.__dict__)
+        del state["_positions"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._index_positions()
+
+    def _index_positions(self) -> None:
+        # position of each node and group of the template, indexed by object id
+        self._positions = {}
+        for kind in ("nodes", "groups"):
+            elements = self.json.get(kind)
+            if isinstance(elements, list):
+                for index, element in enumerate(elements):
+                    self._positions[id(element)] = (kind, index)
+
+    def is_shared(self, element: dict) -> bool:
+        """Returns `True` if the element (node or group) belongs to the template."""
+        return id(element) in self._positions
+
+    def group_members(self, full_rect: bool = False) -> dict[int, list[int]]:
+        """
+        Returns the nodes inside each group of the template (computed only once).
+
+        The nodes of a workflow are never moved, so the result is also valid
+        for all workflows built from the template.
+        Args:
+            full_rect: Whether the whole node rectangle must be inside the group,
+                       otherwise only its top-left corner is tested.
+        Returns:
+            A dictionary mapping each group position to the positions of its nodes.
+        """
+        if full_rect not in self._group_members:
+            self._group_members[full_rect] = find_nodes_in_groups(self.json, full_rect=full_rect)
+        return self._group_members[full_rect]
+
+
+def build_workflow_indexes(json: dict) -> dict[str, dict]:
+    """
+    Builds the hash indexes used to look up the nodes and groups of a workflow.
+
+    Elements are referenced by their position in the "nodes" or "groups" list,
+    so the indexes remain valid when an element is replaced by a copy.
+    Args:
+        json: The dictionary containing the full comfyui workflow.
+    Returns:
+        A dictionary with the following indexes:
+         - "node_titles" : node title -> sorted list of positions
+         - "node_ids"    : node id    -> position
+         - "group_titles": group title -> sorted list of positions
+    """
+    indexes = {"node_titles": {}, "node_ids": {}, "group_titles": {}}
+
+    nodes = json.get("nodes")
+    for position, node in enumerate(nodes if isinstance(nodes, list) else []):
+        if not isinstance(node, dict):
+            continue
+        title, id = node.get("title"), node.get("id")
+        if isinstance(title, str):
+            indexes["node_titles"].setdefault(title, []).append(position)
+        if isinstance(id, int):
+            indexes["node_ids"].setdefault(id, position)
+
+    groups = json.get("groups")
+    for position, group in enumerate(groups if isinstance(groups, list) else []):
+        if not isinstance(group, dict):
+            continue
+        title = group.get("title")
+        if isinstance(title, str):
+            indexes["group_titles"].setdefault(title, []).append(position)
+
+    return indexes
+
+
+class Workflow:
+    """
+    A copy-on-write view of a workflow template.
+
+    The workflow starts sharing all its content with the template; each node
+    or group is copied the first time it needs to be modified, so building a
+    workflow only copies the elements that actually change.
+    Lookups by title or id use the indexes built with the template;
+    they are also copied the first time a title changes (see `set_title`).
 
-    with open(filepath) as f:
-
-        is_first_line = True
-        for line in f.readlines():
-            is_shebang_line = is_first_line and line.startswith("#!")
-            is_first_line   = False
-
-            line = line.rstrip() #< trailing whitespaces are lost at the end of each line
-            if ( is_shebang_line        or
-                 line.startswith("{#")  or #< variable definition action
-                 line.startswith(">>:") or #< action to modify node property
-                 line.startswith(">>>")    #< style definition action
-               ):
-                # a new action is detected, so the previous pending one is processed
-                if action:
-                    process_action(action,
-                                   content.format_map(config_vars),
-                                   config_vars = config_vars,
-                                   base_dir    = base_dir,
-                                   can_include = can_include,
-                                   )
-                # the new action is stored as pending
-                action, content = line, ""
+    Attributes:
+        template: The `WorkflowTemplate` the workflow is based on.
+        json    : The dictionary containing the full comfyui workflow.
+    """
+    def __init__(self, template: WorkflowTemplate) -> None:
+        self.template = template
+        self.json     = dict(template.json)
+        self._indexes = dict(template.indexes)
+        # position of the nodes and groups copied from the template, indexed by object id
+        self._positions = {}
+
+    def resolve_vars(self, config_vars: ConfigVars) -> None:
+        """
+        Resolves all variables within the workflow using `config_vars`.
+
+        Only the strings recorded in the template slots are rendered, and only
+        the dicts and lists on the path to a changed string are copied.
+        This must be called before making any other modification to the workflow.
+        Args:
+            config_vars: Dictionary of variables used for substitution in strings.
+        """
+        copies = {}
+        for slot in self.template.slots:
+            value = slot.render(config_vars)
+            if value == slot.text:
+                continue
+            # copy the containers on the path to the string (only once each)
+            container = self.json
+            for depth in range(1, len(slot.path)):
+                prefix = slot.path[:depth]
+                copy   = copies.get(prefix)
+                if copy is None:
+                    original = container[prefix[-1]]
+                    copy     = dict(original) if isinstance(original, dict) else list(original)
+                    copies[prefix] = container[prefix[-1]] = copy
+                    if depth == 2 and prefix[0] in ("nodes", "groups"):
+                        self._positions[id(copy)] = prefix
+                container = copy
+            container[slot.path[-1]] = value
+            # keep the title indexes in sync with the resolved titles
+            if len(slot.path) == 3 and slot.path[0] in ("nodes", "groups") and slot.path[2] == "title":
+                self._reindex_title(slot.path[0], slot.path[1], slot.text, value)
+
+    def writable(self, element: dict) -> dict:
+        """
+        Returns a version of a node (or group) that can be modified in-place.
+
+        If the element is still shared with the template, a private copy of
+        it is made and stored in the workflow in place of the original.
+        Args:
+            element: The node or group dictionary to be modified.
+        Returns:
+            The dictionary to modify instead of the original element.
+        """
+        position = self.template._positions.get(id(element))
+        if position is None:
+            return element
+        kind, index = position
+
+        elements = self.json[kind]
+        if elements is self.template.json[kind]:
+            elements = self.json[kind] = list(elements)
+        if elements[index] is element:
+            elements[index] = dict(element)
+            self._positions[id(elements[index])] = position
+        return elements[index]
+
+    def find_nodes(self, title: str) -> list[dict]:
+        """Returns the nodes with the given title ("*" returns all nodes)."""
+        return self._find_elements("nodes", "node_titles", title)
+
+    def find_groups(self, title: str) -> list[dict]:
+        """Returns the groups with the given title ("*" returns all groups)."""
+        return self._find_elements("groups", "group_titles", title)
+
+    def get_node_by_id(self, id: int) -> dict | None:
+        """Returns the node with the given id, or None if it doesn't exist."""
+        position = self._indexes["node_ids"].get(id)
+        return self.json["nodes"][position] if position is not None else None
+
+    def find_nodes_in_group(self, title: str, full_rect: bool = False) -> list[dict]:
+        """
+        Returns the nodes inside the group with the given title, ordered by their y-coordinate.
+        Args:
+            title    : The title of the group.
+            full_rect: Whether the whole node rectangle must be inside the group.
+        """
+        nodes = self.json["nodes"]
+        return [nodes[position] for position in self.node_positions_in_group(title, full_rect)]
+
+    def node_positions_in_group(self, title: str, full_rect: bool = False) -> list[int]:
+        """Returns the positions of the nodes inside the group with the given title (see `find_nodes_in_group`)."""
+        positions = self._indexes["group_titles"].get(title)
+        if not positions:
+            return []
+        return self.template.group_members(full_rect).get(positions[0], [])
+
+    def set_title(self, element: dict, title: str) -> dict:
+        """
+        Changes the title of a node (or group), keeping the title indexes in sync.
+        Args:
+            element: The node or group dictionary to be renamed.
+            title  : The new title.
+        Returns:
+            The modified element (a copy if the original was shared with the template).
+        """
+        writable = self.writable(element)
+        position = self._positions.get(id(writable))
+        if position is not None:
+            kind, index = position
+            self._reindex_title(kind, index, writable.get("title"), title)
+        writable["title"] = title
+        return writable
+
+    def _find_elements(self, kind: str, index_name: str, title: str) -> list[dict]:
+        elements = self.json.get(kind)
+        if not isinstance(elements, list):
+            return []
+        if title == "*":
+            return [element for element in elements if isinstance(element, dict)]
+        return [elements[position] for position in self._indexes[index_name].get(title, ())]
+
+    def _reindex_title(self, kind: str, position: int, old_title, new_title) -> None:
+        # the index is copied the first time it changes (it's shared with the template)
+        index_name = "node_titles" if kind == "nodes" else "group_titles"
+        index = self._indexes[index_name]
+        if index is self.template.indexes[index_name]:
+            index = self._indexes[index_name] = dict(index)
+        if isinstance(old_title, str) and old_title in index:
+            positions = [p for p in index[old_title] if p != position]
+            if positions:
+                index[old_title] = positions
             else:
-                content += line + "\n"
+                del index[old_title]
+        if isinstance(new_title, str):
+            index[new_title] = sorted([*index.get(new_title, ()), position])
 
-    # before ending, process any pending action
-    if action:
-        process_action(action,
-                       content.format_map(config_vars),
-                       config_vars = config_vars,
-                       base_dir    = base_dir,
-                       can_include = can_include,
-                       )
+
+# templates already loaded, indexed by real path -> ((mtime, size), template)
+_loaded_templates: dict[str, tuple[tuple, WorkflowTemplate]] = {}
+
+def load_template(filepath: str, cache_dir: str | None = None) -> WorkflowTemplate | None:
+    """
+    Loads a workflow template, parsing its JSON file only once.
+    Args:
+        filepath : The path to the JSON file containing the template.
+        cache_dir: Optional; the directory of the precompiled templates. If the
+                   template was precompiled from the same file, it's loaded from
+                   there (skipping the JSON parsing and the building of its indexes),
+                   otherwise the precompiled version is created or updated.
+    Returns:
+        The loaded template, or None if the file can't be read or parsed.
+    """
+    try:
+        stat      = os.stat(filepath)
+        realpath  = os.path.realpath(filepath)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached    = _loaded_templates.get(realpath)
+        if cached is None or cached[0] != signature:
+            template = load_compiled_template(cache_dir, filepath, stat) if cache_dir else None
+            if not template:
+                template_json = jsonio.read_json(filepath)
+                if not template_json or not isinstance(template_json, dict):
+                    return None
+                template = WorkflowTemplate(filepath, template_json)
+                if cache_dir:
+                    save_compiled_template(cache_dir, template, stat)
+            cached = _loaded_templates[realpath] = (signature, template)
+        return cached[1]
+    except (OSError, jsonio.JSONDecodeError):
+        return None
+
+
+#-------------------------- PRECOMPILED TEMPLATES --------------------------#
+
+def get_compiled_template_path(cache_dir: str, filepath: str) -> str:
+    """Returns the path where the precompiled version of a template is stored."""
+    name   = os.path.splitext(os.path.basename(filepath))[0]
+    digest = hashlib.sha256(os.path.realpath(filepath).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{name}.{digest}.pickle")
+
+
+def get_compiled_template_header(filepath: str, stat: os.stat_result) -> dict:
+    """
+    Returns the header stored with a precompiled template, used to invalidate it.
+
+    A precompiled template is valid while its source file keeps the same
+    content and the scripts don't change (they define the stored objects);
+    the modification time and size avoid hashing the source on every load.
+    """
+    return {"source": os.path.realpath(filepath),
+            "mtime" : stat.st_mtime_ns,
+            "size"  : stat.st_size,
+            "hash"  : None,  #< filled in only when needed (see `load_compiled_template`)
+            "script": [hash_file(path) for path in SCRIPT_FILEPATHS],
+            }
+
+
+def load_compiled_template(cache_dir: str,
+                           filepath : str,
+                           stat     : os.stat_result
+                           ) -> WorkflowTemplate | None:
+    """
+    Loads the precompiled version of a template (see `save_compiled_template`).
+    Args:
+        cache_dir: The directory of the precompiled templates.
+        filepath : The path to the JSON file of the template.
+        stat     : The `os.stat` of the JSON file.
+    Returns:
+        The template, or None if it was not precompiled or the precompiled version is outdated.
+    """
+    header = get_compiled_template_header(filepath, stat)
+    try:
+        with open(get_compiled_template_path(cache_dir, filepath), "rb") as file:
+            stored = pickle.load(file)
+            if not isinstance(stored, dict) or \
+               any(stored.get(name) != header[name] for name in ("source", "script")):
+                return None
+            # a different mtime (e.g. after a checkout) is fine if the content is the same
+            if (stored.get("mtime"), stored.get("size")) != (header["mtime"], header["size"]) and \
+               stored.get("hash") != hash_file(filepath):
+                return None
+            template = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return None
+    if not isinstance(template, WorkflowTemplate):
+        return None
+    template.filepath = filepath
+    return template
+
+
+def save_compiled_template(cache_dir: str,
+                           template : WorkflowTemplate,
+                           stat     : os.stat_result
+                           ) -> None:
+    """
+    Stores a template in binary form, with its placeholder slots, indexes and group members.
+
+    The file contains two pickles: the header (see `get_compiled_template_header`),
+    which is checked before loading the second one, the template itself.
+    Errors are ignored, the precompiled templates are only an optimization.
+    Args:
+        cache_dir: The directory of the precompiled templates, created if needed.
+        template : The template to store.
+        stat     : The `os.stat` of the JSON file the template was loaded from.
+    """
+    header         = get_compiled_template_header(template.filepath, stat)
+    header["hash"] = hash_file(template.filepath)
+    template.group_members()  #< computed before storing it
+    compiled_path  = get_compiled_template_path(cache_dir, template.filepath)
+    temp_path      = f"{compiled_path}.{os.getpid()}~"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temp_path, "wb") as file:
+            pickle.dump(header  , file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(template, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, compiled_path)  #< concurrent readers never see a partial file
+    except (OSError, pickle.PicklingError):
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
 
 
 #----------------------------- JSON TEMPLATES ------------------------------#
 
 def resolve_vars_in_json(json_collection,
                          config_vars: ConfigVars
-                         ) -> None:
+                         ):
     """
     Recursively resolves variables within a JSONstructure using `config_vars`.
 
@@ -272,71 +1189,83 @@ def resolve_vars_in_json(json_collection,
     Args:
         json_collection : The JSON object (dict or list) to process recursively.
         config_vars     : Dictionary of variables used for substitution in strings.
+    Returns:
+        The JSON object with all variables resolved.
     Note:
-        - This function modifies the original `json_collection` in place.
+        - The original `json_collection` is never modified, any dict or list
+          containing a resolved string is copied; those without changes are
+          shared between the original and the returned object.
         - It handles both dictionaries and lists within the collection, applying
           variable resolution recursively.
     """
+    resolved = None
+
     if isinstance(json_collection, dict):
-        for key in json_collection.keys():
-            jobject = json_collection[key]
+        for key, jobject in json_collection.items():
             if isinstance(jobject, str):
-                json_collection[key] = jobject.format_map(config_vars)
+                new_jobject = jobject.format_map(config_vars)
+                if new_jobject == jobject:
+                    continue
             elif isinstance(jobject, (list, dict)):
-                resolve_vars_in_json(jobject, config_vars)
+                new_jobject = resolve_vars_in_json(jobject, config_vars)
+                if new_jobject is jobject:
+                    continue
+            else:
+                continue
+            if resolved is None:
+                resolved = dict(json_collection)
+            resolved[key] = new_jobject
 
     elif isinstance(json_collection, list):
-        for index in range(len(json_collection)):
-            jobject = json_collection[index]
+        for index, jobject in enumerate(json_collection):
             if isinstance(jobject, str):
-                json_collection[index] = jobject.format_map(config_vars)
+                new_jobject = jobject.format_map(config_vars)
+                if new_jobject == jobject:
+                    continue
             elif isinstance(jobject, (list, dict)):
-                resolve_vars_in_json(jobject, config_vars)
+                new_jobject = resolve_vars_in_json(jobject, config_vars)
+                if new_jobject is jobject:
+                    continue
+            else:
+                continue
+            if resolved is None:
+                resolved = list(json_collection)
+            resolved[index] = new_jobject
+
+    return resolved if resolved is not None else json_collection
 
 
-def get_group_rectangle(json: dict, group_name:str) -> list[int]:
+def get_group_rectangle(workflow: Workflow, group_name:str) -> list[int]:
     """
     Retrieves the bounding rectangle of a specific workflow group.
     Args:
-        json      : The dictionary containing the full comfyui workflow.
+        workflow  : The workflow containing the group.
         group_name: The name of the group whose bounding rectangle is desired.
     Returns:
         A list [left, top, width, height] representing the group's bounding box,
         or None if the group does not exist.
     """
-    if not isinstance(json, dict)  or  "groups" not in json:
+    if not isinstance(workflow, Workflow):
         return None
 
-    groups = json["groups"]
-    for group in groups:
-
-        if not isinstance(group, dict) and "title" not in group:
-            continue
-
-        if group["title"] == group_name:
-            return group.get('bounding')
-
-    return None
+    groups = workflow.find_groups(group_name)
+    return groups[0].get('bounding') if groups else None
 
 
-def find_node(workflow: dict, title: str) -> dict:
+def find_node(workflow: Workflow, title: str) -> dict:
     """
-    Searches for a node in a workflow JSON structure based on its title.
+    Searches for a node in a workflow based on its title.
     Args:
-        json  : The dictionary containing the full comfyui workflow.
-        title : The title of the node to find in the workflow JSON structure.
+        workflow: The workflow containing the node.
+        title   : The title of the node to find in the workflow.
     Returns:
         The node dictionary corresponding to the given title, or None if not found.
     """
-    if not isinstance(workflow, dict):
+    if not isinstance(workflow, Workflow):
         return None
 
-    for node in workflow.get("nodes", []):
-        if not isinstance(node, dict):
-            continue
-        if node.get("title") == title:
-            return node
-    return None
+    nodes = workflow.find_nodes(title)
+    return nodes[0] if nodes else None
 
 
 def find_nodes_in_rectangle(json: dict, rectangle: list[int]) -> list:
@@ -380,93 +1309,458 @@ def find_nodes_in_rectangle(json: dict, rectangle: list[int]) -> list:
     return [node for _, node in in_bounds_nodes]
 
 
-def apply_operation_to_node(workflow : dict,
-                            title    : str,
-                            operation: Callable[[dict], None],
-                            type     : str = "node"
-                            ) -> int:
+class SpatialGrid:
+    """
+    A uniform grid that indexes rectangles by the cells they overlap.
+
+    Used to find the nodes that can be inside a region without testing every
+    node of the workflow; each query only visits the cells the region covers.
+    """
+    def __init__(self, cell_size: float = 512) -> None:
+        self.cell_size = cell_size
+        self.cells     = {}
+
+    def _cell_range(self, rectangle: list[float]) -> tuple[range, range]:
+        left, top, width, height = rectangle
+        size = self.cell_size
+        return (range(int(left // size), int((left + max(width , 0)) // size) + 1),
+                range(int(top  // size), int((top  + max(height, 0)) // size) + 1))
+
+    def insert(self, key, rectangle: list[float]) -> None:
+        """Adds an element to each cell overlapped by its rectangle [left, top, width, height]."""
+        columns, rows = self._cell_range(rectangle)
+        for column in columns:
+            for row in rows:
+                self.cells.setdefault((column, row), []).append(key)
+
+    def query(self, rectangle: list[float]) -> set:
+        """Returns the keys of the elements sharing a cell with the rectangle (candidates only)."""
+        found = set()
+        columns, rows = self._cell_range(rectangle)
+        for column in columns:
+            for row in rows:
+                found.update(self.cells.get((column, row), ()))
+        return found
+
+
+def get_node_rectangle(node: dict, full_rect: bool = False) -> list[float] | None:
+    """
+    Returns the rectangle [left, top, width, height] covered by a node.
+    When `full_rect` is False the rectangle is reduced to the node position
+    (width and height are 0). Returns None if the node has no valid position.
+    """
+    pos = node.get("pos")
+    if not isinstance(pos, list) or len(pos) < 2:
+        return None
+    width, height = 0, 0
+    if full_rect:
+        size = node.get("size")
+        if isinstance(size, list) and len(size) >= 2:
+            width, height = size[:2]
+    return [pos[0], pos[1], width, height]
+
+
+def find_nodes_in_groups(json: dict, full_rect: bool = False) -> dict[int, list[int]]:
     """
-    Applies a given operation to all nodes in the workflow with a matching title.
+    Identifies the nodes inside every group of a workflow in a single pass.
+
+    All nodes are indexed in a `SpatialGrid` once, then each group only tests
+    the nodes sharing a cell with its bounding box.
     Args:
-        workflow       : The dictionary containing the full comfyui workflow.
-        title          : The title of the node(s) to which the operation should be applied
-                         Use "*" as a wildcard to apply the operation to all nodes.
-        operation      : A callable function that takes a single argument (the node dictionary)
-                         and applies some modification or action to it.
-        type (optional): The type of elements to search. Either 'node' or 'group'.
-                         By default it is set to 'node'.
+        json     : The dictionary containing the full comfyui workflow.
+        full_rect: Whether the whole node rectangle must be inside the group,
+                   otherwise only its top-left corner is tested (as `find_nodes_in_rectangle`).
     Returns:
-        An integer representing the number of nodes on which the operation was performed.
+        A dictionary mapping the position of each group to the positions of the
+        nodes inside it, sorted by their y-coordinate.
     """
-    if type != "node" and type != "group":
-        raise ValueError("Invalid type. Expected either 'node' or 'group'.")
+    if not isinstance(json, dict):
+        return {}
+    nodes  = json.get("nodes")  if isinstance(json.get("nodes") , list) else []
+    groups = json.get("groups") if isinstance(json.get("groups"), list) else []
+
+    grid       = SpatialGrid()
+    rectangles = {}
+    for position, node in enumerate(nodes):
+        if isinstance(node, dict):
+            rectangle = get_node_rectangle(node, full_rect)
+            if rectangle:
+                rectangles[position] = rectangle
+                grid.insert(position, rectangle)
+
+    members = {}
+    for group_position, group in enumerate(groups):
+        bounding = group.get("bounding") if isinstance(group, dict) else None
+        if not isinstance(bounding, list) or len(bounding) < 4:
+            continue
+        left, top, width, height = bounding[:4]
 
-    if not isinstance(workflow, dict):
-        return 0
+        inside = []
+        for position in grid.query([left, top, width, height]):
+            x, y, w, h = rectangles[position]
+            if x >= left and y >= top and x + w <= left + width and y + h <= top + height:
+                inside.append( (y, position) )
+        inside.sort()
+        members[group_position] = [position for _, position in inside]
 
-    count = 0
-    for node in workflow.get("groups" if type=="group" else "nodes", []):
-        if not isinstance(node, dict):
-            continue
+    return members
 
-        if title=="*" or node.get("title") == title:
-            operation(node)
-            count += 1
 
-    return count
+def get_pin_changes(element: dict, pinned: bool) -> dict | None:
+    """
+    Returns the changes needed to set the pinned status of a node (or group),
+    or None if the element already has that status.
+    """
+    # (the 'flags' dictionary is replaced, never modified, because it
+    #  can be shared with the template the workflow is based on)
+    flags = element.get('flags')
+    if not pinned:
+        if isinstance(flags, dict) and 'pinned' in flags:
+            return {'flags': {key: value for key, value in flags.items() if key != 'pinned'}}
+    else:
+        if not isinstance(flags, dict) or flags.get('pinned') is not True:
+            flags = dict(flags) if isinstance(flags, dict) else {}
+            flags['pinned'] = True
+            return {'flags': flags}
+    return None
 
 
-def update_node_mode(workflow: dict, title: str, mode: int) -> int:
+def get_element_changes(element: dict, properties: dict) -> dict:
     """
-    Modifies the mode of a node with a matching title in the workflow.
+    Returns the changes needed to apply a set of properties to a node (or group).
     Args:
-        workflow: The dictionary containing the full comfyui workflow.
-        title   : The title of the node(s) to which the operation should be applied
-                  Use "*" as a wildcard to apply the operation to all nodes.
-        mode    : The new mode value to set for the specified node.
+        element   : The node or group dictionary.
+        properties: The properties to apply, "mode" (enable=0, disable=2, bypass=4)
+                    and/or "pinned" (pinned=true, unpinned=false).
+    Returns:
+        A dictionary with the changes, empty if the element already has those properties.
     """
-    def update_mode(node: dict) -> None:
-        node["mode"] = mode
-    return apply_operation_to_node(workflow, title, update_mode)
+    changes = {}
+    if "mode" in properties and element.get("mode") != properties["mode"]:
+        changes["mode"] = properties["mode"]
+    if "pinned" in properties:
+        changes.update( get_pin_changes(element, properties["pinned"]) or {} )
+    return changes
 
 
-def update_pin(workflow: dict, title: str, pinned: bool, type: str = "node") -> int:
+def title_pattern_to_regex(title: str) -> str | None:
     """
-    Modifies the pinned status of a node (or group) that matches a given title.
-    Args:
-        workflow: The dictionary containing the full comfyui workflow.
-        title   : The title of the node(s) to which the operation should be applied
-                  Use "*" as a wildcard to apply the operation to all nodes.
-        pinned  : Boolean indicating whether the node should be pinned or not.
-        type (optional): The type of element to search. Either 'node' or 'group'.
-                         By default it is set to 'node'.
+    Returns the regular expression of a title pattern, or None if the title is not a pattern.
+
+    Two kinds of patterns are supported:
+     - "/REGEX/": a regular expression that must match the whole title.
+     - globs: titles containing "*", "?" or "[...]" (e.g. "STYLE: *Photo*"),
+       they also match their literal text, since some titles contain those
+       characters (e.g. "Upscale Image *4").
     """
-    if type != "node" and type != "group":
-        raise ValueError("Invalid type. Expected either 'node' or 'group'.")
+    if not is_title_pattern(title):
+        return None
+    if is_regex_title_pattern(title):
+        return f"(?:{title[1:-1]})\\Z"
+    return f"{re.escape(title)}\\Z|{fnmatch.translate(title)}"
 
-    def update_pin(node: dict) -> None:
-        if not pinned:
-            flags = node.get('flags')
-            if isinstance(flags, dict) and 'pinned' in flags:
-                del flags['pinned']
-        else:
-            flags = node.get('flags')
-            if not isinstance(flags, dict):
-                flags = {}
-            flags['pinned'] = True
-            node['flags'] = flags
-    return apply_operation_to_node(workflow, title, update_pin, type=type)
+
+def is_title_pattern(title: str) -> bool:
+    """Returns `True` if a title used by a command is a pattern (see `title_pattern_to_regex`)."""
+    return is_regex_title_pattern(title) or "*" in title or "?" in title or "[" in title
+
+
+def is_regex_title_pattern(title: str) -> bool:
+    """Returns `True` if a title used by a command is a "/REGEX/" pattern."""
+    return len(title) > 1 and title.startswith("/") and title.endswith("/")
 
 
+def check_title_pattern(title: str, action: ConfigAction | None = None) -> None:
+    """
+    Checks that a title pattern used by a command is valid.
+    Raises:
+        ConfigError: If the title is a "/REGEX/" pattern with an invalid regular expression.
+    """
+    if is_regex_title_pattern(title):
+        try:
+            re.compile(title_pattern_to_regex(title))
+        except re.error as e:
+            raise ConfigError(f"Invalid pattern '{title}': {e}", action) from None
+
 
-def apply_style_to_nodes(nodes: list[dict], styles: list[tuple[str,str]]) -> None:
+def get_title_pattern_prefix(title: str) -> str:
+    """Returns the literal text every title matching a glob pattern starts with ("" for regex patterns)."""
+    if is_regex_title_pattern(title):
+        return ""
+    for index, char in enumerate(title):
+        if char in "*?[":
+            return title[:index]
+    return title
+
+
+class TitleMatcher:
+    """
+    Matches titles against many patterns, evaluating each title only once.
+
+    Patterns starting with literal text (e.g. "Resize Image *") are indexed by
+    that prefix, so a title is only compared against the few patterns whose
+    prefix it starts with. The rest of the globs ("*Photo*") are combined into
+    a single regular expression, its alternation runs inside the regex engine.
+    The "/REGEX/" patterns are compiled on their own and tried one by one,
+    since their group numbers (e.g. a backreference like "\\1") would change
+    inside a combined expression.
+    The patterns have priority in the order given: `match` returns the first
+    one matching the title.
+    """
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = list(patterns)
+        self.prefixes = {}  #< prefix length -> {prefix: [pattern indexes]}
+        self.separate = []  #< indexes of the "/REGEX/" patterns, in order
+        self.regexes  = {}  #< pattern index -> compiled regex (of the patterns not combined, compiled on first use)
+        floating      = []
+        for index, pattern in enumerate(self.patterns):
+            prefix = get_title_pattern_prefix(pattern)
+            if prefix:
+                self.prefixes.setdefault(len(prefix), {}).setdefault(prefix, []).append(index)
+            elif is_regex_title_pattern(pattern):
+                self.separate.append(index)
+            else:
+                floating.append(index)
+
+        self.regex = None
+        if floating:
+            # each glob is wrapped in a named group, `lastgroup` identifies the matching one
+            # (the globs translated by fnmatch don't define any capturing group of their own)
+            alternatives = (f"(?P<_{index}>{title_pattern_to_regex(self.patterns[index])})" for index in floating)
+            self.regex   = re.compile("|".join(alternatives))
+
+    def match(self, title: str) -> int | None:
+        """Returns the index of the first pattern matching the title, or None if no pattern matches."""
+        found = self.regex.match(title) if self.regex else None
+        best  = int(found.lastgroup[1:]) if found else None
+        best  = self._match_first(title, self.separate, best)
+        for length, indexes in self.prefixes.items():
+            best = self._match_first(title, indexes.get(title[:length], ()), best)
+        return best
+
+    def _match_first(self, title: str, indexes: Iterable[int], best: int | None) -> int | None:
+        """Returns the first of `indexes` (sorted) whose pattern matches the title, if it comes before `best`."""
+        for index in indexes:
+            if best is not None and index > best:
+                break
+            regex = self.regexes.get(index)
+            if regex is None:
+                regex = self.regexes[index] = re.compile(title_pattern_to_regex(self.patterns[index]))
+            if regex.match(title):
+                return index
+        return best
+
+
+class TitleTable:
+    """
+    Maps titles and title patterns to the properties set for the elements with those titles.
+
+    Each property is stored with the order of the command that set it, when
+    several entries match the same title the one with the highest order wins.
+    Only the winner is searched, so a title is never compared against the
+    patterns after the first one (in order of priority) that matches it.
+    Exact titles are found with a hash lookup; patterns are compiled into one
+    `TitleMatcher` per property, sorted from the highest to the lowest order,
+    so the first match is the winning entry.
+    """
+    def __init__(self) -> None:
+        self.exact    = {}  #< title -> {property: (order, value)}
+        self.patterns = {}  #< property -> [(order, value, pattern), ...]
+        self.matchers = {}  #< property -> (TitleMatcher, entries sorted by order)
+
+    def add(self, title: str, name: str, order: int, value) -> None:
+        """Sets the property `name` of the elements matching `title`."""
+        if not is_title_pattern(title):
+            self.exact.setdefault(title, {})[name] = (order, value)
+        else:
+            self.patterns.setdefault(name, []).append( (order, value, title) )
+            self.matchers.pop(name, None)
+
+    def lookup(self, title, exact: bool = True) -> dict[str, tuple[int, object, str]]:
+        """
+        Returns the winning entry of each property set for a title.
+        Args:
+            title: The title of the element (non-string titles only match patterns like "*").
+            exact: Whether the entries of the exact title are included (otherwise only patterns).
+        Returns:
+            A dictionary mapping each property to a tuple (order, value, key),
+            where `key` is the exact title or the pattern of the winning entry.
+        """
+        if not isinstance(title, str):
+            title = ""
+        properties = self.exact.get(title) if exact else None
+        entries    = {name: (order, value, title) for name, (order, value) in properties.items()} if properties else {}
+
+        for name in self.patterns:
+            matcher, sorted_entries = self._get_matcher(name)
+            index = matcher.match(title)
+            if index is not None:
+                entry = sorted_entries[index]
+                if name not in entries or entries[name][0] < entry[0]:
+                    entries[name] = entry
+        return entries
+
+    def _get_matcher(self, name: str) -> tuple[TitleMatcher, list]:
+        if name not in self.matchers:
+            entries = sorted(self.patterns[name], key=lambda entry: entry[0], reverse=True)
+            self.matchers[name] = (TitleMatcher(pattern for _, _, pattern in entries), entries)
+        return self.matchers[name]
+
+
+class ModificationTable:
+    """
+    The node and group modifications of a configuration compiled into a single table.
+
+    Each title (or title pattern, see `title_pattern_to_regex`) maps to the
+    properties it sets ("mode" and/or "pinned") along with the order of the
+    command that set them, so the table can be applied in one pass over the
+    nodes and one over the groups: for each element and property, the last
+    command matching the element wins, as if the commands were applied one
+    after another.
+    The "mode" of a group is applied to the nodes inside it (for an exact title
+    only the first group with that title, for a pattern all the matching groups),
+    after all the node modifications.
+
+    Attributes:
+        node_properties : The `TitleTable` of the node properties.
+        group_properties: The `TitleTable` of the group properties.
+        group_node_modes: The `TitleTable` of the modes applied to the nodes inside each group.
+        titles          : All the titles referenced, in the order they first appear,
+                          as ("node", title) or ("group", title) tuples.
+    """
+    def __init__(self,
+                 node_modifications : Iterable[tuple[str, dict]],
+                 group_modifications: Iterable[tuple[str, dict]]
+                 ) -> None:
+        self.node_properties  = TitleTable()
+        self.group_properties = TitleTable()
+        self.group_node_modes = TitleTable()
+        self.titles           = {}
+        order = 0
+        for title, modification in node_modifications:
+            if not isinstance(title, str) or not isinstance(modification, dict):
+                continue
+            for name in ("mode", "pinned"):
+                if name in modification:
+                    self.node_properties.add(title, name, order, modification[name])
+                    order += 1
+            self.titles.setdefault(("node", title))
+
+        # group modes always go after all node modifications (they are applied later)
+        for title, modification in group_modifications:
+            if not isinstance(title, str) or not isinstance(modification, dict):
+                continue
+            if "mode" in modification:
+                self.group_node_modes.add(title, "mode", order, modification["mode"])
+                order += 1
+            if "pinned" in modification:
+                self.group_properties.add(title, "pinned", order, modification["pinned"])
+                order += 1
+            self.titles.setdefault(("group", title))
+
+    def apply(self, workflow: Workflow) -> list[tuple[str, str]]:
+        """
+        Applies all the modifications to a workflow in a single pass over its nodes and groups.
+        Args:
+            workflow: The workflow to modify.
+        Returns:
+            The titles (and patterns) of the commands that had no effect, because
+            they didn't match any node or group or because every element they
+            match is modified by later commands; as ("node", title) or ("group", title)
+            tuples in the order they appear in the configuration.
+        """
+        matched    = set()
+        node_modes = self.apply_to_groups(workflow, matched)
+        self.apply_to_nodes(workflow, node_modes, matched)
+        return self.unmatched(matched)
+
+    def apply_to_groups(self, workflow: Workflow, matched: set) -> dict[int, tuple]:
+        """
+        Applies the group modifications to a workflow (the first half of `apply`).
+        Args:
+            workflow: The workflow to modify.
+            matched : The set where the titles of the commands with effect are added.
+        Returns:
+            The mode imposed by the groups on the nodes inside them, indexed by node position
+            (to be passed to `apply_to_nodes`).
+        """
+        groups = workflow.json.get("groups")
+        groups = groups if isinstance(groups, list) else []
+
+        # the mode that each group imposes on the nodes inside it
+        # (an exact title only refers to the first group with that title)
+        node_modes  = {}
+        seen_titles = set()
+        for position, group in enumerate(groups):
+            if not isinstance(group, dict):
+                continue
+            title = group.get("title")
+            mode  = self.group_node_modes.lookup(title, exact=(title not in seen_titles)).get("mode")
+            seen_titles.add(title)
+            if mode:
+                matched.add( ("group", mode[2]) )
+                for node_position in workflow.template.group_members().get(position, ()):
+                    node_modes[node_position] = max(node_modes.get(node_position, mode), mode)
+
+            changes = get_element_changes(group, self._values("group", self.group_properties.lookup(title), matched))
+            if changes:
+                workflow.writable(group).update(changes)
+        return node_modes
+
+    def apply_to_nodes(self,
+                       workflow  : Workflow,
+                       node_modes: dict[int, tuple],
+                       matched   : set,
+                       positions : Iterable[int] | None = None
+                       ) -> None:
+        """
+        Applies the node modifications to a workflow (the second half of `apply`).
+        Args:
+            workflow  : The workflow to modify.
+            node_modes: The modes imposed by the groups (see `apply_to_groups`).
+            matched   : The set where the titles of the commands with effect are added.
+            positions : Optional; the positions of the only nodes to modify.
+        """
+        nodes = workflow.json.get("nodes")
+        nodes = nodes if isinstance(nodes, list) else []
+        if positions is None:
+            positions = range(len(nodes))
+
+        for position in positions:
+            node = nodes[position]
+            if not isinstance(node, dict):
+                continue
+            entries = self.node_properties.lookup(node.get("title"))
+            mode    = node_modes.get(position)
+            if mode:
+                entries.pop("mode", None)  #< group modes are applied after all node modifications
+            changes = get_element_changes(node, self._values("node", entries, matched))
+            if mode and node.get("mode") != mode[1]:
+                changes["mode"] = mode[1]
+            if changes:
+                workflow.writable(node).update(changes)
+
+    def unmatched(self, matched: set) -> list[tuple[str, str]]:
+        """Returns the titles referenced by the table that are not in `matched`, in order."""
+        return [title for title in self.titles if title not in matched]
+
+    @staticmethod
+    def _values(kind: str, entries: dict[str, tuple[int, object, str]], matched: set) -> dict:
+        # returns the value of each property, recording the titles of the winning entries
+        for _, _, key in entries.values():
+            matched.add( (kind, key) )
+        return {name: value for name, (_, value, _) in entries.items()}
+
+
+def apply_style_to_nodes(workflow: Workflow, nodes: list[dict], styles: list[tuple[str,str]]) -> None:
     """
     Set the title and content of each node using the provided style list.
 
     Args:
-        nodes  : The list of nodes (dict) to be updated.
-        styles : A list of tuples where each tuple contains two strings; 
-                 the first is the style name, and the second is the style template.
+        workflow: The workflow containing the nodes.
+        nodes   : The list of nodes (dict) to be updated.
+        styles  : A list of tuples where each tuple contains two strings;
+                  the first is the style name, and the second is the style template.
     """
     # iterate over the nodes, updating the title and content of each one
     for index, node in enumerate(nodes):
@@ -480,155 +1774,1423 @@ def apply_style_to_nodes(nodes: list[dict], styles: list[tuple[str,str]]) -> Non
             title           = ""
             template_value = ""
 
-        node["title"]          = f"STYLE: {title}"
+        node = workflow.set_title(node, f"STYLE: {title}")
         node["widgets_values"] = [template_value]
 
 
-#------------------------------- GALLERY.TXT -------------------------------#
+def resolve_styles(config_vars: ConfigVars, styles: list[tuple[str,str]]) -> list[tuple[str,str]]:
+    """
+    Returns a copy of the style list with the variables of each style template resolved.
+    Args:
+        config_vars: The configuration dictionary used to resolve the variables.
+        styles     : A list of tuples (style name, unresolved style template).
+    Raises:
+        ConfigError: If a style template contains an invalid placeholder or a circular reference.
+    """
+    resolved = []
+    for name, template_value in styles:
+        try:
+            resolved.append( (name, config_vars.expand(template_value).strip()) )
+        except ConfigError as e:
+            raise ConfigError(f"Style '{name}': {e}") from None
+    return resolved
 
-def save_style_gallery(filepath: str,
-                       styles  : list[tuple[str,str]],
-                       prompts : list[str]
-                       ) -> None:
+
+def move_style_to_front(styles: list[tuple[str,str]], style_name: str) -> list[tuple[str,str]]:
     """
-    Saves the style list (and example prompts) to a text file.
+    Returns a copy of the style list with the given style in the first position.
     Args:
-        filepath : The path where the output text file will be saved.
-        styles   : A list of tuples containing style names and their template values.
-        prompts  : A list of strings representing different example prompts.
+        styles    : A list of tuples (style name, style template).
+        style_name: The name of the style to move (case-insensitive).
+    Returns:
+        The reordered list, or None if the style is not in the list.
     """
-    with open(filepath, 'w') as file:
+    for index, style in enumerate(styles):
+        if style[0].lower() == style_name.lower():
+            return [style, *styles[:index], *styles[index+1:]]
+    return None
 
-        for index, prompt in enumerate(prompts):
-            file.write(f"IMAGE{index+1} PROMPT:\n")
-            file.write(f"{prompt}\n")
-            file.write("\n")
 
-        file.write("STYLES\n")
-        for style in styles:
-            file.write(f" * {style[0]}\n")
-        file.write("\n")
+def select_styles(styles: list[tuple[str,str]], style_names: Iterable[str]) -> list[tuple[str,str]]:
+    """
+    Returns the styles referenced by a list of names.
+    Args:
+        styles     : A list of tuples (style name, style template).
+        style_names: The names of the styles to select (case-insensitive), or
+                     title patterns matching them (see `title_pattern_to_regex`).
+    Returns:
+        The selected styles, in the order of `style_names` (the styles matching
+        a pattern in the order they are defined), without duplicates.
+    Raises:
+        BuildError: If a name doesn't match any style.
+    """
+    selected = {}
+    for style_name in style_names:
+        if is_title_pattern(style_name):
+            matcher = TitleMatcher([style_name])
+            matches = [index for index, style in enumerate(styles) if matcher.match(style[0]) is not None]
+        else:
+            matches = [index for index, style in enumerate(styles) if style[0].lower() == style_name.lower()][:1]
+        if not matches:
+            raise BuildError(f"The style '{style_name}' is not defined in the configuration.")
+        for index in matches:
+            selected.setdefault(index, styles[index])
+    return list(selected.values())
 
 
-#===========================================================================#
-#////////////////////////////////// MAIN ///////////////////////////////////#
-#===========================================================================#
+def get_style_variants(config_vars: ConfigVars, split_styles: str) -> dict[str, list[str]]:
+    """
+    Returns the style variants to build from a configuration (see `build_style_variants`).
+    Args:
+        config_vars : The configuration dictionary.
+        split_styles: "each" for one variant per style, named after the style;
+                      or "sets" for one variant per style set (">>:STYLE-SET NAME").
+    Returns:
+        A dictionary mapping the name of each variant to the names (or patterns) of its styles.
+    """
+    if split_styles == "each":
+        return {name: [name] for name, _ in config_vars.styles}
+    if split_styles == "sets":
+        return {name: list(entries) for name, entries in config_vars.style_sets.items()}
+    raise ValueError(f"Invalid style split '{split_styles}'.")
 
-def make_workflow(template_filepath     : str,
-                  config_filepath       : str,
-                  create_styles_txt     : bool = False,
-                  overwrite             : bool = False
-                 ) -> bool:
+
+def get_variant_slug(name: str) -> str:
+    """Returns the version of a variant name used in filenames (e.g. "Comic Book" -> "comic-book")."""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    return slug or "style"
+
+
+#------------------------------- GALLERY.TXT -------------------------------#
+
+def save_style_gallery(filepath: str,
+                       styles  : list[tuple[str,str]],
+                       prompts : list[str]
+                       ) -> bool:
     """
-    Creates a workflow based on the provided template and configuration.
+    Saves the style list (and example prompts) to a text file.
+    Args:
+        filepath : The path where the output text file will be saved.
+        styles   : A list of tuples containing style names and their template values.
+        prompts  : A list of strings representing different example prompts.
+    Returns:
+        True if the file was written, False if it already had the same content.
+    Raises:
+        OSError: If the file can't be written.
+    """
+    file = StringIO()
 
-    This function reads variables from the specified configuration files, and
-    creates a workflow using the given template.
+    for index, prompt in enumerate(prompts):
+        file.write(f"IMAGE{index+1} PROMPT:\n")
+        file.write(f"{prompt}\n")
+        file.write("\n")
+
+    file.write("STYLES\n")
+    for style in styles:
+        file.write(f" * {style[0]}\n")
+    file.write("\n")
+
+    # (the file is written atomically and only if its content changes)
+    return jsonio.write_bytes(filepath, file.getvalue().encode("utf-8"))
+
+
+#------------------------------- BUILD CACHE -------------------------------#
+
+# hashes of already read files, indexed by real path -> ((mtime, size), hash)
+_file_hashes: dict[str, tuple[tuple, str]] = {}
 
+def hash_file(filepath: str) -> str | None:
+    """
+    Calculates the SHA-256 hash of the content of a file.
     Args:
-        template_filepath     : The path to the template file used for creating the workflow.
-        config_filepath       : The path to the specific configuration file.
-        global_config_filepath: Optional; the path to a global configuration file containing shared settings.
+        filepath: The path to the file to hash.
     Returns:
-        True if the workflow was successfully created.
+        The hexadecimal digest of the file content, or None if the file can't be read.
     """
-    config_vars = ConfigVars()
+    try:
+        stat      = os.stat(filepath)
+        realpath  = os.path.realpath(filepath)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached    = _file_hashes.get(realpath)
+        if cached is None or cached[0] != signature:
+            with open(filepath, 'rb') as file:
+                cached = _file_hashes[realpath] = (signature, hashlib.sha256(file.read()).hexdigest())
+        return cached[1]
+    except OSError:
+        return None
+
+
+def load_build_cache(filepath: str) -> dict:
+    """
+    Loads the build cache (the manifest of previously generated files).
+
+    The build cache maps the name of each generated file to the hashes of
+    the inputs used to build it, the JSON format it was written in (only for
+    workflows) and the hash of the generated content:
+        { "outputs": { "<output>": { "inputs": { "<input>": "<hash>", ... },
+                                     "format": "<format>",
+                                     "hash"  : "<hash>" } } }
+    Args:
+        filepath: The path to the JSON file containing the build cache.
+    Returns:
+        The build cache, or an empty cache if the file doesn't exist or is invalid.
+    """
+    try:
+        with open(filepath) as file:
+            build_cache = json.load(file)
+        if isinstance(build_cache, dict) and isinstance(build_cache.get("outputs"), dict):
+            return build_cache
+    except (OSError, ValueError):
+        pass
+    return {"outputs": {}}
+
+
+def save_build_cache(filepath: str, build_cache: dict) -> None:
+    """
+    Saves the build cache to a JSON file.
+    Args:
+        filepath   : The path to the JSON file where the build cache will be saved.
+        build_cache: The build cache to save.
+    """
+    data = json.dumps(build_cache, indent=2, sort_keys=True) + "\n"
+    jsonio.write_bytes(filepath, data.encode("utf-8"))
+
+
+def hash_inputs(input_filepaths: list[str]) -> dict[str, str]:
+    """
+    Calculates the hashes of a list of input files.
+    Args:
+        input_filepaths: The paths to the files used to generate an output.
+    Returns:
+        A dictionary mapping each path (relative to the output directory)
+        to the hash of its content.
+    """
+    return { os.path.relpath(path): hash_file(path) for path in input_filepaths }
+
+
+def is_output_up_to_date(build_cache    : dict,
+                         output_filepath: str,
+                         inputs         : dict[str, str],
+                         format         : str | None = None
+                         ) -> bool:
+    """
+    Checks if an output file was generated from the given inputs and remains unchanged.
+    Args:
+        build_cache    : The build cache with the information of the generated files.
+        output_filepath: The path to the generated file.
+        inputs         : The hashes of the inputs that would be used to generate the file.
+        format         : The JSON format the file would be written in (None if not a JSON file).
+    """
+    entry = build_cache["outputs"].get(output_filepath)
+    if not isinstance(entry, dict) or entry.get("inputs") != inputs:
+        return False
+    if entry.get("format") != format:
+        return False
+    return is_output_owned(build_cache, output_filepath)
+
+
+def is_output_owned(build_cache: dict, output_filepath: str) -> bool:
+    """
+    Checks if an output file was generated by a previous build and was not modified since.
+    Args:
+        build_cache    : The build cache with the information of the generated files.
+        output_filepath: The path to the generated file.
+    """
+    entry = build_cache["outputs"].get(output_filepath)
+    if not isinstance(entry, dict) or not entry.get("hash"):
+        return False
+    return hash_file(output_filepath) == entry["hash"]
+
+
+def update_build_cache(build_cache    : dict,
+                       output_filepath: str,
+                       inputs         : dict[str, str],
+                       format         : str | None = None
+                       ) -> None:
+    """
+    Records in the build cache the inputs used to generate an output file and its hash.
+    Args:
+        build_cache    : The build cache to update.
+        output_filepath: The path to the generated file.
+        inputs         : The hashes of the inputs used to generate the file.
+        format         : The JSON format the file was written in (None if not a JSON file).
+    """
+    entry = {"inputs": inputs, "hash": hash_file(output_filepath)}
+    if format:
+        entry["format"] = format
+    build_cache["outputs"][output_filepath] = entry
+
+
+#------------------------------- JSON PATCH --------------------------------#
+
+class PatchError(Exception):
+    """Raised when a JSON patch is not valid or can't be applied to a document."""
+    pass
+
+
+def escape_pointer_token(token) -> str:
+    """Returns a key or index escaped to be used in a JSON pointer (RFC 6901)."""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def parse_json_pointer(pointer: str) -> list[str]:
+    """
+    Splits a JSON pointer (RFC 6901) into its unescaped tokens, e.g. "/nodes/3/title" -> ["nodes", "3", "title"].
+    Raises:
+        PatchError: If the pointer is not valid.
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer '{pointer}'.")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
 
+def make_json_patch(base, target) -> list[dict]:
+    """
+    Creates the JSON patch (RFC 6902) that transforms a document into another.
+
+    The containers shared by both documents are skipped without comparing
+    their content, so the patch between a template and a workflow built from
+    it (see `Workflow`) only visits the nodes and groups that were modified.
+    Args:
+        base  : The original document, e.g. the JSON of a `WorkflowTemplate`.
+        target: The modified document, e.g. a workflow built from the template.
+    Returns:
+        The list of "add", "remove" and "replace" operations; applying them
+        to `base` (see `apply_json_patch`) results in a document equal to `target`.
+    """
+    patch = []
+    _diff_json(base, target, "", patch)
+    return patch
+
+
+def _diff_json(base, target, path: str, patch: list[dict]) -> None:
+    if base is target:
+        return
+    if type(base) is dict and type(target) is dict:
+        # (new keys are always added at the end, if the target has a different
+        #  order the whole dictionary is replaced, so the output is identical)
+        kept_keys = [key for key in base if key in target]
+        if list(target)[:len(kept_keys)] != kept_keys:
+            patch.append( {"op": "replace", "path": path, "value": target} )
+            return
+        for key, value in base.items():
+            key_path = f"{path}/{escape_pointer_token(key)}"
+            if key in target:
+                _diff_json(value, target[key], key_path, patch)
+            else:
+                patch.append( {"op": "remove", "path": key_path} )
+        for key, value in target.items():
+            if key not in base:
+                patch.append( {"op": "add", "path": f"{path}/{escape_pointer_token(key)}", "value": value} )
+    elif type(base) is list and type(target) is list:
+        common = min(len(base), len(target))
+        for index in range(common):
+            _diff_json(base[index], target[index], f"{path}/{index}", patch)
+        for index in range(common, len(target)):
+            patch.append( {"op": "add", "path": f"{path}/{index}", "value": target[index]} )
+        for index in reversed(range(common, len(base))):
+            patch.append( {"op": "remove", "path": f"{path}/{index}"} )
+    elif type(base) is not type(target) or base != target:
+        patch.append( {"op": "replace", "path": path, "value": target} )
+
+
+def apply_json_patch(document, patch: list[dict]):
+    """
+    Applies a JSON patch (RFC 6902) to a document, without modifying it.
+
+    Only the containers on the path to each modified value are copied (once
+    each), everything else is shared with the original document; so applying
+    a small patch to a big template is fast, whatever the size of the template.
+    Args:
+        document: The document to patch, e.g. the JSON of a `WorkflowTemplate`.
+        patch   : The list of operations ("add", "remove", "replace", "move", "copy" or "test").
+    Returns:
+        The patched document, it must be treated as read-only (it shares content with `document`).
+    Raises:
+        PatchError: If an operation is not valid, its path doesn't exist or a "test" fails.
+    """
+    if not isinstance(patch, list):
+        raise PatchError("The JSON patch must be a list of operations.")
+    copies = set()  #< ids of the containers already copied (they can be modified in-place)
+
+    def get(container, token: str, pointer: str):
+        try:
+            if type(container) is dict:
+                return container[token]
+            if type(container) is list:
+                return container[get_index(container, token, pointer)]
+        except KeyError:
+            pass
+        raise PatchError(f"The path '{pointer}' doesn't exist.")
+
+    def get_index(container: list, token: str, pointer: str, allow_end: bool = False) -> int:
+        if token == "-" and allow_end:
+            return len(container)
+        if not token.isdigit() or (token != "0" and token.startswith("0")):
+            raise PatchError(f"Invalid array index in '{pointer}'.")
+        index = int(token)
+        if index > len(container) or (index == len(container) and not allow_end):
+            raise PatchError(f"The path '{pointer}' doesn't exist.")
+        return index
+
+    def writable(value):
+        if type(value) in (dict, list) and id(value) not in copies:
+            value = value.copy()
+            copies.add(id(value))
+        return value
+
+    def resolve_parent(pointer: str) -> tuple[object, str]:
+        # returns the (writable) container of the value referenced by the pointer, and the last token
+        nonlocal document
+        tokens = parse_json_pointer(pointer)
+        document = parent = writable(document)
+        for token in tokens[:-1]:
+            child = writable(get(parent, token, pointer))
+            if type(parent) is dict:
+                parent[token] = child
+            else:
+                parent[get_index(parent, token, pointer)] = child
+            parent = child
+        if type(parent) not in (dict, list):
+            raise PatchError(f"The path '{pointer}' doesn't exist.")
+        return parent, tokens[-1]
+
+    def read(pointer: str):
+        value = document
+        for token in parse_json_pointer(pointer):
+            value = get(value, token, pointer)
+        return value
+
+    def add(pointer: str, value) -> None:
+        nonlocal document
+        if not pointer:
+            document = value
+            return
+        parent, token = resolve_parent(pointer)
+        if type(parent) is dict:
+            parent[token] = value
+        else:
+            parent.insert(get_index(parent, token, pointer, allow_end=True), value)
+
+    def remove(pointer: str):
+        if not pointer:
+            raise PatchError("The whole document can't be removed.")
+        parent, token = resolve_parent(pointer)
+        value = get(parent, token, pointer)
+        if type(parent) is dict:
+            del parent[token]
+        else:
+            del parent[get_index(parent, token, pointer)]
+        return value
+
+    for operation in patch:
+        if not isinstance(operation, dict) or not isinstance(operation.get("path"), str):
+            raise PatchError(f"Invalid JSON patch operation: {operation!r}")
+        op, path = operation.get("op"), operation["path"]
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"Missing 'value' in the '{op}' operation of '{path}'.")
+        if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+            raise PatchError(f"Missing 'from' in the '{op}' operation of '{path}'.")
+
+        if op == "add":
+            add(path, operation["value"])
+        elif op == "remove":
+            remove(path)
+        elif op == "replace":
+            if path:
+                parent, token = resolve_parent(path)
+                get(parent, token, path)  #< the value must exist
+                if type(parent) is dict:
+                    parent[token] = operation["value"]
+                else:
+                    parent[get_index(parent, token, path)] = operation["value"]
+            else:
+                document = operation["value"]
+        elif op == "move":
+            if path.startswith(operation["from"] + "/"):
+                raise PatchError(f"The path '{operation['from']}' can't be moved into itself.")
+            add(path, remove(operation["from"]))
+        elif op == "copy":
+            # (the copy must not share containers with its source, both could be modified later)
+            add(path, json.loads(json.dumps(read(operation["from"]))))
+        elif op == "test":
+            value = read(path)
+            if value != operation["value"] or type(value) is not type(operation["value"]):
+                raise PatchError(f"Test failed, the value of '{path}' is not the expected one.")
+        else:
+            raise PatchError(f"Unknown JSON patch operation '{op}'.")
+    return document
+
+
+#---------------------------- WORKFLOW BUILDER -----------------------------#
+
+class BuildError(Exception):
+    """Raised when a workflow can't be built from a template and a configuration."""
+    pass
+
+
+def get_template_name(template_filepath: str) -> str:
+    """Returns the name of a template, e.g. "GGUF" for "template_GGUF.json"."""
     template_name = os.path.basename(template_filepath).split(".")[0]
     if template_name.startswith("template"):
         template_name = template_name[9:].rstrip('_')
+    return template_name
 
-    config_vars["#TEMPLATE_NAME"] = template_name
-    read_vars_from_file( config_vars, config_filepath )
 
-    # always "{#FILEPREFIX}" must be defined in the configuration file
-    if not "#FILEPREFIX" in config_vars:
-        error('The "{#FILEPREFIX}" variable is missing from the configuration file.')
-        return False
+def read_workflow_config(template_filepath: str, config_filepath: str) -> ConfigVars:
+    """
+    Reads the configuration used to build a workflow from a given template.
+    Args:
+        template_filepath: The path to the template file used for creating the workflow.
+        config_filepath  : The path to the specific configuration file.
+    Returns:
+        The configuration dictionary, including the "{#TEMPLATE_NAME}" variable.
+    """
+    return read_config(config_filepath, template_name=get_template_name(template_filepath))
 
-    # generate the name of the output files
-    workflow_filename = config_vars["#FILEPREFIX"] + template_name + ".json"
-    gallery_filename  = config_vars["#FILEPREFIX"] + "gallery.txt"
-    if not create_styles_txt:
-        gallery_filename = None
 
-    # if overwrite is disabled, check if output files already exist
-    if not overwrite:
-        if workflow_filename and os.path.exists( workflow_filename ):
-            error(f'The output path "{workflow_filename}" already exists.',
-                   "Use the '--overwrite' flag to overwrite any existing file.")
-            return False
-        if gallery_filename and os.path.exists( gallery_filename ):
-            error(f'The output path "{gallery_filename}" already exists.',
-                   "Use the '--overwrite' flag to overwrite any existing file.")
-            return False
+def read_config(config       : str | os.PathLike | Mapping,
+                template_name: str = "",
+                base_dir     : str = "."
+                ) -> ConfigVars:
+    """
+    Reads a configuration from a file, a text or a mapping of variables.
+    Args:
+        config       : One of the following:
+                        - the path to a configuration file (str or path-like object)
+                        - the content of a configuration (a str with more than one line)
+                        - a `ConfigVars` or any mapping of variables {"#NAME": value}
+        template_name: The value of the "{#TEMPLATE_NAME}" variable (available to the configuration).
+        base_dir     : The base directory for the ">>:INCLUDE" of a configuration text.
+    Returns:
+        A new configuration dictionary (the given one is never modified).
+    """
+    config_vars = ConfigVars()
+    config_vars["#TEMPLATE_NAME"] = template_name
 
-    # try to read the workflow template by parsing a json
-    template_json = None
-    with open(template_filepath) as file:
-        try:
-            template_json = json.load(file)
-        except json.JSONDecodeError:
-            template_json = None
-    if not template_json:
-        error(f"Error decoding JSON in template.")
-        return False
+    if isinstance(config, ConfigVars):
+        config_vars = config.copy()
+        config_vars.setdefault("#TEMPLATE_NAME", template_name)
+    elif isinstance(config, Mapping):
+        config_vars.update(config)
+    elif isinstance(config, str) and "\n" in config:
+        read_vars_from_text(config_vars, config, base_dir=base_dir)
+    elif isinstance(config, (str, os.PathLike)):
+        read_vars_from_file(config_vars, os.fspath(config))
+    else:
+        raise TypeError(f"Invalid configuration type '{type(config).__name__}'.")
+    return config_vars
+
+
+def build_workflow(template : WorkflowTemplate | dict | str | os.PathLike,
+                   config   : Mapping | str | os.PathLike,
+                   overrides: Mapping | None = None,
+                   base_dir : str = ".",
+                   style    : str | None = None,
+                   timings  : dict[str, float] | None = None,
+                   shared   : bool = False
+                   ) -> dict:
+    """
+    Builds a workflow in memory, without reading or writing any output file.
+
+    This is the core of `make_workflow`, it can be used directly by other
+    tools (e.g. a service generating workflows on demand).
+    Args:
+        template : The workflow template, either a `WorkflowTemplate` (see `load_template`),
+                   a dictionary with the comfyui workflow, or the path to a template file.
+        config   : The configuration, either a path, a text or a mapping (see `read_config`).
+        overrides: Optional; variables that replace those defined by the configuration
+                   (e.g. {"#PROMPT": "..."}), applied after the configuration is read.
+        base_dir : The base directory for the ">>:INCLUDE" of a configuration text.
+        style    : Optional; the name of the style to select, it's placed in the
+                   first style node and enabled, all other styles are disabled.
+        timings  : Optional; a dictionary where the seconds spent in each phase of
+                   the build are accumulated (see `PhaseTimer`).
+        shared   : If True, the returned workflow shares all unmodified nodes and groups
+                   with the template (avoiding a full copy), so it must be treated as
+                   read-only; useful when the workflow is only going to be serialized.
+    Returns:
+        The dictionary containing the full comfyui workflow, it can be freely
+        modified by the caller unless `shared` is True.
+    Raises:
+        BuildError : If the template can't be loaded or is not valid, or the style doesn't exist.
+        ConfigError: If a variable used by the workflow can't be resolved.
+    """
+    timer = PhaseTimer(timings)
+    template, config_vars = load_build_inputs(template, config, overrides, base_dir, timer)
+
+    # create a copy-on-write view of the template for this configuration
+    workflow = Workflow(template)
 
 
     #=== WORKFLOW VARIABLES ===#
 
     # resolve all variables in any strings within the json
-    resolve_vars_in_json(template_json,
-                         config_vars = config_vars)
-
+    # (only the strings recorded as placeholder slots in the template are visited)
+    workflow.resolve_vars(config_vars)
+    timer.mark("resolve")
 
     #=== WORKFLOW STYLES ===#
 
-    # finds the coordinates of the "STYLES" group
-    style_rectangle = get_group_rectangle(template_json, group_name="STYLES")
-    if style_rectangle == None:
-        error("The 'STYLES' group is missing from the template.")
-        return False
+    # find all nodes within the "STYLES" group
+    nodes = find_style_nodes(workflow)
+
+    # apply the styles to each node within the "STYLES" group
+    # (the selected style, if any, goes first and is the only one enabled)
+    styles = config_vars.styles
+    if style:
+        styles = move_style_to_front(styles, style)
+        if styles is None:
+            raise BuildError(f"The style '{style}' is not defined in the configuration.")
+    apply_styles(workflow, nodes, resolve_styles(config_vars, styles[:len(nodes)]), select_first=bool(style))
+    timer.mark("styles")
+
+
+    #=== WORKFLOW PROMPT ===#
+
+    apply_prompt(workflow, config_vars)
+    timer.mark("prompt")
+
+    #=== WORKFLOW NODE & GROUP MODIFICATIONS ===#
+
+    # all the commands are compiled into one table and applied in a single pass
+    # (the titles of the commands without effect are reported, they are usually typos)
+    modifications = ModificationTable(config_vars.node_modifications, config_vars.group_modifications)
+    for kind, title in modifications.apply(workflow):
+        warning(f"No {kind} is affected by the commands with the title '{title}'.")
+    timer.mark("modifications")
+
+    return workflow.json if shared else copy_json(workflow.json)
+
+
+def build_style_variants(template : WorkflowTemplate | dict | str | os.PathLike,
+                         config   : Mapping | str | os.PathLike,
+                         variants : Mapping[str, list[str]] | None = None,
+                         overrides: Mapping | None = None,
+                         base_dir : str = ".",
+                         select   : bool = True,
+                         timings  : dict[str, float] | None = None,
+                         shared   : bool = False
+                         ) -> dict[str, dict]:
+    """
+    Builds one workflow for each style variant of a configuration.
 
-    # find all nodes within style_rectangle
-    nodes = find_nodes_in_rectangle(template_json, style_rectangle)
-    if not nodes:
+    The variables, the prompt and the commands are resolved only once, in a
+    base workflow that is used as the template of every variant; so each
+    variant only copies and modifies the style nodes, all other nodes are
+    shared by all of them.
+    Args:
+        template : The workflow template (see `build_workflow`).
+        config   : The configuration, either a path, a text or a mapping (see `read_config`).
+        variants : Optional; a dictionary mapping the name of each variant to the
+                   names (or patterns) of its styles, by default one variant per style.
+        overrides: Optional; variables that replace those defined by the configuration.
+        base_dir : The base directory for the ">>:INCLUDE" of a configuration text.
+        select   : If True, the styles of each variant go first in the style nodes,
+                   followed by the rest; and the first is the only one enabled
+                   (i.e. a single-style variant is the same as `build_workflow(style=...)`).
+                   If False, the style nodes only contain the styles of the variant.
+        timings  : Optional; a dictionary where the seconds spent in each phase of
+                   the build are accumulated (see `PhaseTimer`).
+        shared   : If True, the returned workflows share nodes with each other and
+                   with the template, so they must be treated as read-only.
+    Returns:
+        A dictionary mapping the name of each variant to its comfyui workflow,
+        in the same order as `variants` (each one can be freely modified by
+        the caller unless `shared` is True).
+    Raises:
+        BuildError : If the template can't be loaded or is not valid, or a style doesn't exist.
+        ConfigError: If a variable used by the workflow can't be resolved.
+    """
+    timer = PhaseTimer(timings)
+    template, config_vars = load_build_inputs(template, config, overrides, base_dir, timer)
+    if variants is None:
+        variants = get_style_variants(config_vars, "each")
+
+    # the base workflow, with everything that doesn't depend on the styles
+    # (the prompt doesn't either, "STYLE: ..." titles never match "PROMPT")
+    workflow = Workflow(template)
+    workflow.resolve_vars(config_vars)
+    timer.mark("resolve")
+    nodes = find_style_nodes(workflow)
+    apply_prompt(workflow, config_vars)
+    timer.mark("prompt")
+
+    # the titles of the nodes and groups outside the style nodes don't change between
+    # variants, so the commands are applied to them only once, in the base workflow
+    # (the style nodes are left as in the template, each variant modifies its own copy)
+    modifications = ModificationTable(config_vars.node_modifications, config_vars.group_modifications)
+    base_matched  = set()
+    node_modes    = modifications.apply_to_groups(workflow, base_matched)
+    style_nodes   = set(nodes)
+    modifications.apply_to_nodes(workflow, node_modes, base_matched,
+                                 positions=[position for position in range(len(workflow.json["nodes"]))
+                                            if position not in style_nodes])
+    base = WorkflowTemplate(template.filepath, workflow.json, base=template)
+    timer.mark("modifications")
+
+    # the styles are resolved only once, when a variant first uses them
+    resolved = {}
+    def resolve(styles: list[tuple[str,str]]) -> list[tuple[str,str]]:
+        for style in styles:
+            if id(style) not in resolved:
+                resolved[id(style)] = resolve_styles(config_vars, [style])[0]
+        return [resolved[id(style)] for style in styles]
+
+    unused_titles = None
+    workflows     = {}
+    for name, style_names in variants.items():
+        styles = select_styles(config_vars.styles, style_names)
+        if select:
+            chosen = {id(style) for style in styles}
+            styles = [*styles, *(style for style in config_vars.styles if id(style) not in chosen)]
+        timer.mark("config")
+
+        workflow = Workflow(base)
+        apply_styles(workflow, nodes, resolve(styles[:len(nodes)]), select_first=select)
+        timer.mark("styles")
+
+        # only the commands without effect in every variant are reported
+        matched = set(base_matched)
+        modifications.apply_to_nodes(workflow, node_modes, matched, positions=nodes)
+        unused = modifications.unmatched(matched)
+        unused_titles = unused if unused_titles is None else [title for title in unused_titles if title in unused]
+        timer.mark("modifications")
+        workflows[name] = workflow.json if shared else copy_json(workflow.json)
+
+    for kind, title in unused_titles or ():
+        warning(f"No {kind} is affected by the commands with the title '{title}'.")
+    return workflows
+
+
+def load_build_inputs(template : WorkflowTemplate | dict | str | os.PathLike,
+                      config   : Mapping | str | os.PathLike,
+                      overrides: Mapping | None,
+                      base_dir : str,
+                      timer    : "PhaseTimer"
+                      ) -> tuple[WorkflowTemplate, ConfigVars]:
+    """
+    Loads the template and reads the configuration of a build (see `build_workflow`).
+    Returns:
+        A tuple (template, config_vars).
+    Raises:
+        BuildError : If the template can't be loaded.
+        ConfigError: If the configuration is not valid.
+    """
+    if isinstance(template, (str, os.PathLike)):
+        template_filepath = os.fspath(template)
+        template          = load_template(template_filepath)
+        if not template:
+            raise BuildError(f"Unable to load the template '{template_filepath}'.")
+    elif isinstance(template, dict):
+        template = WorkflowTemplate(None, template)
+    elif not isinstance(template, WorkflowTemplate):
+        raise TypeError(f"Invalid template type '{type(template).__name__}'.")
+    timer.mark("load")
+
+    # (`read_config` always returns a new dictionary, so the given one is never modified)
+    template_name = get_template_name(template.filepath) if template.filepath else ""
+    config_vars   = read_config(config, template_name=template_name, base_dir=base_dir)
+    if overrides:
+        config_vars.update(overrides)
+    timer.mark("config")
+    return template, config_vars
+
+
+def find_style_nodes(workflow: Workflow) -> list[int]:
+    """
+    Returns the positions of the nodes within the "STYLES" group of a workflow.
+    Raises:
+        BuildError: If the workflow has no "STYLES" group.
+    """
+    if not workflow.find_groups("STYLES"):
+        raise BuildError("The 'STYLES' group is missing from the template.")
+    positions = workflow.node_positions_in_group("STYLES")
+    if not positions:
         error("No nodes found within the 'STYLES' group.")
+    return positions
 
-    # apply the styles to each node within style_rectangle
-    apply_style_to_nodes(nodes, config_vars.styles)
 
+def apply_styles(workflow    : Workflow,
+                 nodes       : list[int] | list[dict],
+                 styles      : list[tuple[str,str]],
+                 select_first: bool = False
+                 ) -> None:
+    """
+    Applies a list of resolved styles to the nodes of the "STYLES" group.
+    Args:
+        workflow    : The workflow containing the nodes.
+        nodes       : The nodes to update (or their positions in the workflow).
+        styles      : A list of tuples (style name, resolved style template).
+        select_first: Whether to enable the first node and disable all the others.
+    """
+    nodes = [workflow.json["nodes"][node] if isinstance(node, int) else node for node in nodes]
+    apply_style_to_nodes(workflow, nodes, styles)
+    if select_first:
+        for index, node in enumerate(workflow.json["nodes"][position] for position in workflow.node_positions_in_group("STYLES")):
+            mode = 0 if index == 0 else 2
+            if node.get("mode") != mode:
+                workflow.writable(node)["mode"] = mode
 
-    #=== WORKFLOW PROMPT ===#
 
+def apply_prompt(workflow: Workflow, config_vars: ConfigVars) -> None:
+    """Sets the text of the "PROMPT" node to the value of "{#PROMPT}", if it's defined."""
     if "#PROMPT" in config_vars:
-        prompt_node = find_node(template_json, title="PROMPT")
+        prompt_node = find_node(workflow, title="PROMPT")
         if prompt_node:
-            prompt_node["widgets_values"] = [ config_vars["#PROMPT"] ]
+            workflow.writable(prompt_node)["widgets_values"] = [ config_vars["#PROMPT"] ]
 
-    #=== WORKFLOW NODE MODIFICATIONS ===#
 
-    for title, modification in config_vars.node_modifications:
-        if not isinstance(title, str) or not isinstance(modification, dict):
-            continue
+def build_workflows(requests: Iterable[Mapping]) -> list[dict]:
+    """
+    Builds a batch of workflows in memory (see `build_workflow`).
+
+    Templates given as paths are parsed only once for the whole batch, and
+    so are the files included by the configurations.
+    Args:
+        requests: An iterable of mappings with the arguments of `build_workflow`:
+                  {"template": ..., "config": ..., "overrides": ..., "base_dir": ..., "shared": ...}
+    Returns:
+        The list of workflow dictionaries, in the same order as the requests.
+    Raises:
+        BuildError: If any of the workflows can't be built.
+    """
+    return [ build_workflow(**request) for request in requests ]
+
+
+#---------------------------- GRAPH COMPACTION -----------------------------#
 
-        # changing the node's "mode" (enable=0, disable=2, bypass=4)
-        if "mode" in modification:
-            update_node_mode(template_json, title=title, mode=modification["mode"])
+# types of the nodes that only forward a connection (they are removed by `compact_workflow`)
+REROUTE_NODE_TYPES = ("Reroute", "Reroute (rgthree)")
 
-        # changing the node's "pin" (pinned=true, unpinned=false)
-        elif "pinned" in modification:
-            update_pin(template_json, title=title, pinned=modification["pinned"], type="node")
+# mode of the nodes disabled ("muted") in comfyui, they are never executed
+MUTED_NODE_MODE = 2
 
-    #=== WORKFLOW GROUP MODIFICATIONS ===#
 
-    for title, modification in config_vars.group_modifications:
-        if not isinstance(title, str) or not isinstance(modification, dict):
+class CompactionReport(NamedTuple):
+    """The number of elements removed from a workflow by `compact_workflow`."""
+    reroutes   : int  #< reroute nodes collapsed into direct links
+    disabled   : int  #< nodes disabled (muted)
+    unreachable: int  #< nodes whose outputs were only connected to removed nodes
+    links      : int  #< links removed
+
+    @property
+    def nodes(self) -> int:
+        return self.reroutes + self.disabled + self.unreachable
+
+
+def compact_workflow(workflow_json: dict) -> tuple[dict, CompactionReport]:
+    """
+    Creates a "headless" version of a workflow, removing the nodes that only matter to the UI.
+
+    The chains of reroute nodes are collapsed into direct links, and the
+    disabled nodes are removed along with the nodes that only fed them (as
+    comfyui does when it executes the workflow, the inputs connected to a
+    disabled node are left unconnected). Links are renumbered in their
+    original order, so the same workflow always results in the same links.
+    Args:
+        workflow_json: The dictionary containing the comfyui workflow, it isn't modified.
+    Returns:
+        A tuple (compacted_json, report) where `compacted_json` is the new workflow
+        (it shares the unmodified nodes with the original one) and `report` the
+        number of nodes and links removed.
+    Raises:
+        BuildError: If the links of the workflow are not in the expected format.
+    """
+    nodes = {node["id"]: node for node in workflow_json.get("nodes", [])}
+    links = {}
+    for link in workflow_json.get("links", []):
+        if not isinstance(link, list) or len(link) < 6:
+            raise BuildError(f"Unsupported link format in the workflow: {link!r}")
+        links[link[0]] = link
+
+    def is_reroute(node_id) -> bool:
+        return nodes[node_id]["type"] in REROUTE_NODE_TYPES
+
+    def resolve_origin(link: list) -> tuple[int, int] | None:
+        # follows the chain of reroutes back to the node that produces the value
+        origin_id, origin_slot = link[1], link[2]
+        for _ in range(len(nodes)):  #< a chain can't be longer than the number of nodes (cycles)
+            if origin_id not in nodes:
+                return None
+            if not is_reroute(origin_id):
+                return origin_id, origin_slot
+            inputs = nodes[origin_id].get("inputs") or [{}]
+            link   = links.get(inputs[0].get("link"))
+            if not link:
+                return None
+            origin_id, origin_slot = link[1], link[2]
+        return None
+
+    # the direct connections between non-reroute nodes, keyed by the id of the link reaching the target
+    # (the type is taken from the output of the origin, the reroutes usually have a generic "*" type)
+    edges     = {}
+    consumers = {link[1]: set() for link in links.values() if link[1] in nodes}
+    for link_id, link in links.items():
+        target_id = link[3]
+        if target_id not in nodes or is_reroute(target_id):
+            continue
+        origin = resolve_origin(link)
+        if not origin:
             continue
+        origin_id, origin_slot = origin
+        outputs = nodes[origin_id].get("outputs") or []
+        type    = outputs[origin_slot].get("type", link[5]) if origin_slot < len(outputs) else link[5]
+        edges[link_id] = [link_id, origin_id, origin_slot, target_id, link[4], type]
+        consumers[origin_id].add(target_id)
+
+    # remove the reroutes and the disabled nodes, and then (repeatedly)
+    # any node whose outputs were connected only to removed nodes
+    removed  = {node_id: "reroutes" for node_id in nodes if is_reroute(node_id)}
+    removed |= {node_id: "disabled" for node_id, node in nodes.items()
+                if node_id not in removed and node.get("mode") == MUTED_NODE_MODE}
+    pending  = list(removed)
+    while pending:
+        pending = [node_id for node_id, targets in consumers.items()
+                   if node_id not in removed and targets.issubset(removed)]
+        removed.update( (node_id, "unreachable") for node_id in pending )
+
+    # renumber the remaining links in their original order
+    new_ids = {}
+    for link_id in links:
+        edge = edges.get(link_id)
+        if edge and edge[1] not in removed and edge[3] not in removed:
+            new_ids[link_id] = len(new_ids) + 1
+    new_links  = []
+    node_links = {}  #< origin node id -> {slot: [new link ids]}
+    for link_id, new_id in new_ids.items():
+        edge = edges[link_id]
+        new_links.append( [new_id, *edge[1:]] )
+        node_links.setdefault(edge[1], {}).setdefault(edge[2], []).append(new_id)
+
+    # rebuild the connections of each remaining node
+    new_nodes = []
+    for node_id, node in nodes.items():
+        if node_id in removed:
+            continue
+        node = node.copy()
+        if node.get("inputs"):
+            node["inputs"] = [{**input, "link": new_ids.get(input.get("link"))} if "link" in input else input
+                              for input in node["inputs"]]
+        if node.get("outputs"):
+            slots = node_links.get(node_id, {})
+            node["outputs"] = [{**output, "links": slots.get(slot, [] if output.get("links") is not None else None)}
+                               for slot, output in enumerate(node["outputs"])]
+        new_nodes.append(node)
+
+    compacted_json = {**workflow_json, "nodes": new_nodes, "links": new_links, "last_link_id": len(new_links)}
+    kinds  = list(removed.values())
+    report = CompactionReport(reroutes    = kinds.count("reroutes"),
+                              disabled    = kinds.count("disabled"),
+                              unreachable = kinds.count("unreachable"),
+                              links       = len(links) - len(new_links))
+    return compacted_json, report
+
+
+#------------------------------- API COMPILER ------------------------------#
+
+# names of the widgets of each node type, in the order of its "widgets_values"
+# (None marks the "control_after_generate" value stored after a seed, which isn't sent to the API)
+API_WIDGET_NAMES = {
+    "CLIPLoader"                 : ("clip_name", "type", "device"),
+    "CLIPLoaderGGUF"             : ("clip_name", "type"),
+    "CLIPTextEncode"             : ("text",),
+    "EmptyLatentImage"           : ("width", "height", "batch_size"),
+    "EmptySD3LatentImage"        : ("width", "height", "batch_size"),
+    "ExtendIntermediateSigmas"   : ("steps", "start_at_sigma", "end_at_sigma", "spacing"),
+    "ImageAddNoise"              : ("seed", None, "strength"),
+    "ImageUpscaleWithModel"      : (),
+    "KSamplerAdvanced"           : ("add_noise", "noise_seed", None, "steps", "cfg", "sampler_name", "scheduler",
+                                    "start_at_step", "end_at_step", "return_with_leftover_noise"),
+    "KSamplerSelect"             : ("sampler_name",),
+    "KarrasScheduler"            : ("steps", "sigma_max", "sigma_min", "rho"),
+    "SamplerCustom"              : ("add_noise", "noise_seed", None, "cfg"),
+    "SaveImage"                  : ("filename_prefix",),
+    "SetFirstSigma"              : ("sigma",),
+    "SplitSigmas"                : ("step",),
+    "StringReplace"              : ("string", "find", "replace"),
+    "StringTrim"                 : ("string", "mode"),
+    "UNETLoader"                 : ("unet_name", "weight_dtype"),
+    "UnetLoaderGGUF"             : ("unet_name",),
+    "UpscaleModelLoader"         : ("model_name",),
+    "VAEDecode"                  : (),
+    "VAEEncode"                  : (),
+    "VAELoader"                  : ("vae_name",),
+    "Any Switch (rgthree)"       : (),
+    "Display Any (rgthree)"      : (),  #< its widget only displays the input
+    "Image Resize (rgthree)"     : ("measurement", "width", "height", "fit", "method"),
+    "Power Lora Loader (rgthree)": (),  #< its loras are sent as "lora_N" (see `get_api_widget_inputs`)
+}
+
+# types of the nodes that only exist in the UI, they are never sent to the API
+UI_ONLY_NODE_TYPES = (*REROUTE_NODE_TYPES, "Note", "MarkdownNote", "Label (rgthree)", "Node Collector (rgthree)",
+                      "Mute / Bypass Repeater (rgthree)", "Fast Muter (rgthree)", "Fast Bypasser (rgthree)",
+                      "Fast Groups Muter (rgthree)", "Fast Groups Bypasser (rgthree)", "Bookmark (rgthree)")
+
+# types of the nodes that only provide a value, it's inlined into the inputs connected to them
+PRIMITIVE_NODE_TYPES = ("PrimitiveNode", "PrimitiveInt", "PrimitiveFloat", "PrimitiveBoolean",
+                        "PrimitiveString", "PrimitiveStringMultiline")
+
+# mode of the nodes bypassed in comfyui, their inputs are passed through to their outputs
+BYPASSED_NODE_MODE = 4
+
+
+def get_api_widget_inputs(node: dict, widget_names: Mapping[str, tuple]) -> dict:
+    """
+    Returns the values of the widgets of a node, keyed by their API input names.
+    Raises:
+        BuildError: If the widgets of the node type are unknown.
+    """
+    values = node.get("widgets_values") or []
+    if node["type"] == "Power Lora Loader (rgthree)":
+        loras = [value for value in values if isinstance(value, dict) and "lora" in value]
+        return {f"lora_{index}": lora for index, lora in enumerate(loras, 1)}
+
+    names = widget_names.get(node["type"])
+    if names is None:
+        if not values:
+            return {}
+        raise BuildError(f"Unknown widgets for the node type '{node['type']}' (node #{node['id']}).")
+    if not isinstance(values, list) or (names and len(values) != len(names)):
+        raise BuildError(f"Unexpected widget values in the node #{node['id']} ({node['type']}).")
+    return {name: value for name, value in zip(names, values) if name is not None}
+
+
+def compile_workflow(workflow_json: dict, widget_names: Mapping[str, tuple] | None = None) -> dict:
+    """
+    Compiles a workflow into the format of the comfyui API (the "prompt" sent to "/prompt").
+
+    The links are resolved through the reroutes and the bypassed nodes, the
+    values of the primitive nodes are inlined into the inputs connected to
+    them, and the disabled nodes and the nodes that only exist in the UI are
+    dropped (the inputs connected to a disabled node are left unconnected).
+    The result only depends on the workflow, so it can be cached.
+    Args:
+        workflow_json: The dictionary containing the comfyui workflow, it isn't modified.
+        widget_names : Optional; additional names of the widgets of each node type (see `API_WIDGET_NAMES`).
+    Returns:
+        A dictionary {node_id: {"inputs": {...}, "class_type": ..., "_meta": {"title": ...}}}
+        with the nodes sorted by id, where each connected input is [origin_node_id, output_slot].
+    Raises:
+        BuildError: If the workflow has a node with unknown widgets or links in an unexpected format.
+    """
+    widget_names = {**API_WIDGET_NAMES, **(widget_names or {})}
+    nodes = {node["id"]: node for node in workflow_json.get("nodes", [])}
+    links = {}
+    for link in workflow_json.get("links", []):
+        if not isinstance(link, list) or len(link) < 6:
+            raise BuildError(f"Unsupported link format in the workflow: {link!r}")
+        links[link[0]] = link
+
+    def resolve_input(link_id) -> tuple[bool, object]:
+        # follows a link back through reroutes and bypassed nodes, returning
+        # (True, value) for a connection or a primitive, or (False, None) if unconnected
+        for _ in range(len(nodes) + 1):  #< (the loop is bounded in case of cycles)
+            link   = links.get(link_id)
+            origin = nodes.get(link[1]) if link else None
+            if not origin or origin.get("mode") == MUTED_NODE_MODE:
+                return False, None
+            slot   = link[2]
+            inputs = origin.get("inputs") or []
+            if origin["type"] in REROUTE_NODE_TYPES:
+                link_id = inputs[0].get("link") if inputs else None
+            elif origin.get("mode") == BYPASSED_NODE_MODE:
+                # (the value comes from the input of the same type, preferably in the same slot)
+                outputs = origin.get("outputs") or []
+                type    = outputs[slot].get("type") if slot < len(outputs) else None
+                matches = [input for input in inputs if input.get("type") == type and input.get("link") is not None]
+                if slot < len(inputs) and inputs[slot] in matches:
+                    matches.insert(0, inputs[slot])
+                if not matches:
+                    return False, None
+                link_id = matches[0]["link"]
+            elif origin["type"] in PRIMITIVE_NODE_TYPES:
+                values = origin.get("widgets_values") or [None]
+                return True, values[0]
+            else:
+                return True, [str(origin["id"]), slot]
+        return False, None
+
+    prompt = {}
+    for node_id in sorted(nodes, key=lambda node_id: int(node_id)):
+        node = nodes[node_id]
+        if node["type"] in UI_ONLY_NODE_TYPES or node["type"] in PRIMITIVE_NODE_TYPES \
+           or node.get("mode") in (MUTED_NODE_MODE, BYPASSED_NODE_MODE):
+            continue
+        inputs = get_api_widget_inputs(node, widget_names)
+        for input in node.get("inputs") or []:
+            name = input.get("widget", {}).get("name", input.get("name"))
+            if input.get("link") is None:
+                continue
+            connected, value = resolve_input(input["link"])
+            if connected:
+                inputs[name] = value
+            else:
+                inputs.pop(name, None)
+        prompt[str(node_id)] = {"inputs"    : inputs,
+                                "class_type": node["type"],
+                                "_meta"     : {"title": node.get("title") or node["type"]}}
+    return prompt
+
+
+#------------------------------- WATCH MODE --------------------------------#
+def get_file_states(filepaths) -> dict[str, tuple | None]:
+    """
+    Returns the state (mtime, size) of each file, or None if it doesn't exist.
+    """
+    states = {}
+    for filepath in filepaths:
+        try:
+            stat = os.stat(filepath)
+            states[filepath] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            states[filepath] = None
+    return states
+
+
+def get_job_dependencies(job: dict) -> set[str]:
+    """
+    Returns the real paths of all the files a job depends on: the template,
+    the configuration file and all the files included by it.
+    """
+    dependencies = {job["template_filepath"], job["config_filepath"]}
+    try:
+        with capture_messages(StringIO()):
+            config_vars = read_workflow_config(job["template_filepath"], job["config_filepath"])
+        dependencies.update(config_vars.sources)
+    except (OSError, ConfigError):
+        pass
+    return {os.path.realpath(path) for path in dependencies}
+
+
+def watch_source_dir(source_dir: str,
+                     job_options: dict,
+                     interval   : float = 0.5
+                     ) -> None:
+    """
+    Watches the source directory and rebuilds the workflows affected by each change.
+
+    The state of the source directory and of every file the workflows depend
+    on (templates, configs and included files) is polled every `interval`
+    seconds. When a file changes, only the jobs depending on it are run again;
+    the templates and included configs that didn't change remain parsed in
+    memory, so a rebuild takes just a few milliseconds.
+    Args:
+        source_dir : The directory containing templates and config files.
+        job_options: The `make_workflow` arguments common to all jobs.
+        interval   : The number of seconds between each poll.
+    """
+    build_cache = job_options.get("build_cache")
+
+    def load_jobs() -> list[dict]:
+        json_templates, text_configs = find_source_files(source_dir)
+        return create_jobs(json_templates, text_configs, **job_options)
+
+    def job_key(job: dict) -> tuple:
+        return (job["template_filepath"], job["config_filepath"], job["create_styles_txt"])
+
+    def watched_files() -> set[str]:
+        # all files in the source dir (to detect new ones) plus all dependencies
+        filepaths = {os.path.join(source_dir, filename) for filename in os.listdir(source_dir)}
+        for job_dependencies in dependencies.values():
+            filepaths.update(job_dependencies or ())
+        return filepaths
+
+    jobs         = load_jobs()
+    dependencies = { job_key(job): get_job_dependencies(job) for job in jobs }
+    states       = get_file_states(watched_files())
+
+    print(f" Watching '{source_dir}' for changes... (press Ctrl+C to stop)")
+    print("")
+    try:
+        while True:
+            time.sleep(interval)
+            new_states = get_file_states(watched_files())
+            changed    = {path for path in states.keys() | new_states.keys() if states.get(path) != new_states.get(path)}
+            states     = new_states
+            if not changed:
+                continue
+            start_time = time.perf_counter()
+
+            # jobs can appear (or disappear) when files are added to (or removed from) the source dir
+            old_keys     = set(dependencies)
+            jobs         = load_jobs()
+            changed_real = {os.path.realpath(path) for path in changed}
+            affected     = [job for job in jobs
+                            if job_key(job) not in old_keys or not dependencies[job_key(job)].isdisjoint(changed_real)]
+            dependencies = { job_key(job): dependencies.get(job_key(job)) for job in jobs }
+            if not affected:
+                continue
+
+            # rebuild the affected jobs in this same process, reusing everything already parsed
+            results = run_jobs(affected)
+            for job in affected:
+                dependencies[job_key(job)] = get_job_dependencies(job)
+            if build_cache is not None:
+                save_build_cache(BUILD_CACHE_FILENAME, build_cache)
+            states = get_file_states(watched_files())
+
+            error_count  = print_build_report(affected, results)
+            elapsed      = (time.perf_counter() - start_time) * 1000
+            changed_list = ", ".join(sorted(os.path.basename(path) for path in changed))
+            color        = console.RED if error_count else console.GREEN
+            print(f" {console.DKGRAY}[{time.strftime('%H:%M:%S')}]{console.RESET} {changed_list} changed: "
+                  f"{color}rebuilt {len(affected) - error_count} of {len(affected)} workflows{console.RESET} in {elapsed:.0f} ms"
+                  f" ({format_output_states(results)})")
+
+    except KeyboardInterrupt:
+        print("")
+
+
+#----------------------------- WORKFLOW SERVER -----------------------------#
+
+def serve(args=None, parent_script=None):
+    """
+    Entry point of the `serve` command, which starts a local workflow server.
+
+    The server lives in its own module (see `workflowserver.py`), imported
+    only by this command so that building workflows doesn't pay for it.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    import workflowserver
+    return workflowserver.serve(args, parent_script)
+
+
+#------------------------------- PATCH APPLY -------------------------------#
+
+def apply(args=None, parent_script=None):
+    """
+    Entry point of the `apply` command, which rebuilds a workflow from its JSON patch.
+
+    The patch is applied to the precompiled template when it's available
+    (see `load_template`), so rebuilding a workflow only costs the loading
+    of the template plus a few path copies, fast enough to do it on demand.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    prog = os.path.basename(sys.argv[0]) + " apply"  #< e.g. "make.py apply" or "zimage make apply"
+    if parent_script:
+        prog = parent_script + " " + os.path.basename(__file__).split('.')[0] + " apply"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Rebuild a full workflow from its template and a JSON patch generated with '--patch'.",
+        formatter_class=argparse.RawTextHelpFormatter
+        )
+    parser.add_argument('template'         , type=str, help="The JSON template the patch was generated against.")
+    parser.add_argument('patch'            , type=str, help="The JSON patch file (.patch.json).")
+    parser.add_argument('-o','--output'    , type=str, metavar='FILE',
+                        help="The output workflow file (default: write to stdout)")
+    parser.add_argument('--format'         , choices=jsonio.FORMATS, default=DEFAULT_JSON_FORMAT,
+                        help=f"Format of the generated JSON file (default: {DEFAULT_JSON_FORMAT})")
+    parser.add_argument('--no-cache'       , action='store_true', help=f"Don't use the precompiled templates ({TEMPLATE_CACHE_DIR}/).")
+    parser.add_argument('--no-color'       , action='store_true', help="Disable colored output.")
+    args = parser.parse_args(args=args)
+
+    if args.no_color:
+        disable_colors()
+
+    template = load_template(args.template, cache_dir=None if args.no_cache else TEMPLATE_CACHE_DIR)
+    if not template:
+        fatal_error(f'Unable to load the template "{args.template}".')
+    try:
+        workflow_json = apply_json_patch(template.json, jsonio.read_json(args.patch))
+    except (OSError, jsonio.JSONDecodeError) as e:
+        fatal_error(f'Unable to read the patch "{args.patch}".', str(e))
+    except PatchError as e:
+        fatal_error(f'Unable to apply the patch "{args.patch}".', str(e))
+
+    data = jsonio.dumps_bytes(workflow_json, format=args.format)
+    if not args.output:
+        sys.stdout.buffer.write(data)
+        return 0
+    try:
+        jsonio.write_bytes(args.output, data)
+    except OSError as e:
+        fatal_error(f'Unable to write the output file "{args.output}".', str(e))
+    return 0
+
+
+#===========================================================================#
+#////////////////////////////////// MAIN ///////////////////////////////////#
+#===========================================================================#
+
+def make_workflow(template_filepath     : str,
+                  config_filepath       : str,
+                  create_styles_txt     : bool = False,
+                  overwrite             : bool = False,
+                  build_cache           : dict = None,
+                  force                 : bool = False,
+                  format                : str  = DEFAULT_JSON_FORMAT,
+                  split_styles          : str  = None,
+                  patch                 : bool = False,
+                  headless              : bool = False,
+                  api                   : bool = False,
+                  reorder               : bool = False,
+                  timings               : dict = None,
+                  output_states         : dict = None
+                 ) -> bool:
+    """
+    Creates a workflow based on the provided template and configuration.
+
+    This function reads variables from the specified configuration files, and
+    creates a workflow using the given template.
+
+    Args:
+        template_filepath     : The path to the template file used for creating the workflow.
+        config_filepath       : The path to the specific configuration file.
+        create_styles_txt     : Whether to also create the gallery.txt file with the list of styles.
+        overwrite             : Whether to overwrite output files not generated by a previous build.
+        build_cache           : Optional; the build cache used to skip outputs that are up to date,
+                                it's updated in-place with the information of the generated files.
+        force                 : Whether to regenerate the outputs even if they are up to date.
+        format                : The JSON format of the generated workflow ("pretty", "compact" or "canonical").
+        split_styles          : Optional; generate one workflow per style ("each") or per style
+                                set ("sets") instead of a single workflow, see `build_style_variants`.
+                                Each one is saved as "{FILEPREFIX}{TEMPLATE}_{VARIANT}.json".
+        patch                 : Whether to save each workflow as a JSON patch against its template
+                                ("{FILEPREFIX}{TEMPLATE}.patch.json") instead of the full workflow,
+                                see `make_json_patch` and the `apply` command. Patches are always compact.
+        headless              : Whether to save the "headless" version of each workflow, without reroutes
+                                nor disabled nodes ("{FILEPREFIX}{TEMPLATE}.headless.json"), see `compact_workflow`.
+        api                   : Whether to save each workflow compiled to the format of the comfyui API
+                                ("{FILEPREFIX}{TEMPLATE}.api.json") instead of the UI format, see `compile_workflow`.
+                                It can't be combined with `patch` or `headless`.
+        reorder               : Whether to rewrite the "order" field of the nodes with the execution
+                                order computed from the links (see `linkgraph.update_node_order`).
+        timings               : Optional; a dictionary where the seconds spent in each phase of
+                                the build are accumulated (see `PhaseTimer`).
+        output_states         : Optional; a dictionary where the state of each output file is recorded:
+                                "written", "unchanged" (it already had the same content, so it was
+                                not touched), "up-to-date" (skipped using the build cache) or "failed".
+    Returns:
+        True if the workflow was successfully created (or was already up to date).
+    Note:
+        Output files are written atomically, and only when their content changes.
+    """
+    output_states = output_states if output_states is not None else {}
+    timer         = PhaseTimer(timings)
+    template_name = get_template_name(template_filepath)
+    try:
+        config_vars = read_workflow_config(template_filepath, config_filepath)
+        timer.mark("config")
+
+        # always "{#FILEPREFIX}" must be defined in the configuration file
+        if not "#FILEPREFIX" in config_vars:
+            error('The "{#FILEPREFIX}" variable is missing from the configuration file.')
+            return False
+        file_prefix = config_vars["#FILEPREFIX"]
+    except ConfigError as e:
+        error(str(e))
+        return False
+
+    # generate the name of the output files
+    # (with split styles, one workflow per variant, the variant names are made unique)
+    extension          = (".headless" if headless else "") + (".patch.json" if patch else ".json")
+    if api:
+        extension = ".api.json"
+    workflow_filenames = {None: file_prefix + template_name + extension}
+    gallery_filename   = file_prefix + "gallery.txt"
+    if not create_styles_txt:
+        gallery_filename = None
+    if split_styles:
+        variants = get_style_variants(config_vars, split_styles)
+        if not variants:
+            warning(f"No {'style sets' if split_styles == 'sets' else 'styles'} defined in the configuration, no workflow to build.")
+        workflow_filenames = {}
+        for name in variants:
+            slug, suffix = get_variant_slug(name), 1
+            while f"{file_prefix}{template_name}_{slug}{extension}" in workflow_filenames.values():
+                suffix += 1
+                slug    = f"{get_variant_slug(name)}-{suffix}"
+            workflow_filenames[name] = f"{file_prefix}{template_name}_{slug}{extension}"
+
+    # calculate the hashes of the files each output depends on
+    # (the config, the included files and the scripts; plus the template for the workflow)
+    gallery_inputs   = hash_inputs([*config_vars.sources, *SCRIPT_FILEPATHS])
+    workflow_inputs  = hash_inputs([template_filepath, *config_vars.sources, *SCRIPT_FILEPATHS])
+
+    output_filenames = [*workflow_filenames.values(), *([gallery_filename] if gallery_filename else [])]
+    output_format    = ("patch" if patch else format) + ("+headless" if headless else "")  #< the format recorded in the build cache
+    if api:
+        output_format = format + "+api"
+    if reorder:
+        output_format += "+reorder"
+    if patch or format == "compact":
+        # (the compact output of orjson and of the standard library can differ, see `jsonio.dumps_bytes`)
+        output_format += "+" + jsonio.DEFAULT_BACKEND
+    def fail() -> bool:
+        output_states.update( (filename, "failed") for filename in output_filenames if filename not in output_states )
+        return False
+
+    # skip the build if all outputs were generated from the same inputs and remain unchanged
+    if build_cache is not None and not force:
+        if all(is_output_up_to_date(build_cache, filename, workflow_inputs, output_format) for filename in workflow_filenames.values()) and \
+           (not gallery_filename or is_output_up_to_date(build_cache, gallery_filename, gallery_inputs)):
+            output_states.update( (filename, "up-to-date") for filename in output_filenames )
+            return True
+
+    # if overwrite is disabled, check if output files already exist
+    # (files generated by a previous build and not modified since can always be overwritten)
+    if not overwrite:
+        for output_filename in (*workflow_filenames.values(), gallery_filename):
+            if not output_filename or not os.path.exists( output_filename ):
+                continue
+            if build_cache is not None and is_output_owned(build_cache, output_filename):
+                continue
+            error(f'The output path "{output_filename}" already exists.',
+                   "Use the '--overwrite' flag to overwrite any existing file.")
+            return fail()
 
-        # changing the node's "pin" (pinned=true, unpinned=false)
-        elif "pinned" in modification:
-            update_pin(template_json, title=title, pinned=modification["pinned"], type="group")
+    timer.mark("cache")
+
+    # get the workflow template (parsed only once and shared by all configs)
+    template = load_template(template_filepath)
+    if not template:
+        error(f"Error decoding JSON in template.")
+        return fail()
+    timer.mark("load")
+
+    # build the workflow (or all its style variants) in memory
+    try:
+        if split_styles:
+            workflows = build_style_variants(template, config_vars, variants,
+                                             select=(split_styles == "each"), timings=timings, shared=True)
+        else:
+            workflows = {None: build_workflow(template, config_vars, timings=timings, shared=True)}
+        # (the headless versions are reported, so the removed elements can be reviewed)
+        if headless:
+            for name, workflow_json in workflows.items():
+                workflows[name], report = compact_workflow(workflow_json)
+                info(f"{workflow_filenames[name]}: removed {report.nodes} nodes ({report.reroutes} reroutes, "
+                     f"{report.disabled} disabled, {report.unreachable} unreachable) and {report.links} links.")
+        if reorder:
+            for name, workflow_json in workflows.items():
+                graph = linkgraph.LinkGraph(workflow_json)
+                if graph.dangling_links:
+                    warning(f"The workflow references links that don't exist: {graph.dangling_links}")
+                workflows[name] = linkgraph.update_node_order(workflow_json, graph)
+        # (compiled once here, so the workers submitting the prompts don't need to convert them)
+        if api:
+            workflows = {name: compile_workflow(workflow_json) for name, workflow_json in workflows.items()}
+    except (BuildError, ConfigError, linkgraph.CycleError) as e:
+        error(str(e))
+        return fail()
+    timer.restart()
+
+    # (the files that already have the same content are not written again,
+    #  and the others are replaced atomically; see `jsonio.write_bytes`)
+    def save(filename: str, write: Callable[[], bool]) -> None:
+        try:
+            output_states[filename] = "written" if write() else "unchanged"
+        except OSError as e:
+            error(f'Unable to write the output file "{filename}".', str(e))
+            output_states[filename] = "failed"
 
     #=== GALLERY.TXT ===#
 
@@ -638,14 +3200,187 @@ def make_workflow(template_filepath     : str,
             prompts.append( config_vars["#PROMPT"] )
         if "#PROMPT2" in config_vars:
             prompts.append( config_vars["#PROMPT2"] )
-        save_style_gallery( gallery_filename, styles=config_vars.styles, prompts=prompts )
+        save(gallery_filename, lambda: save_style_gallery( gallery_filename, styles=config_vars.styles, prompts=prompts ))
+    timer.mark("gallery")
 
     # saves modified workflow in output_filepath
-    with open(workflow_filename, "w", encoding="utf-8") as file:
-        json.dump(template_json, file, ensure_ascii=False, indent=4)
+    # (the variants share most of their nodes, each shared node is encoded only once)
+    # (a patch only contains the changes, the nodes shared with the template are skipped)
+    encoded_nodes = {}
+    for name, workflow_json in workflows.items():
+        filename = workflow_filenames[name]
+        if patch:
+            workflow_patch = make_json_patch(template.json, workflow_json)
+            save(filename, lambda: jsonio.write_json(filename, workflow_patch, format="compact"))
+        else:
+            save(filename, lambda: jsonio.write_json(filename, workflow_json, format=format, cache=encoded_nodes))
+    timer.mark("dump")
+
+    # record the generated files in the build cache
+    if build_cache is not None:
+        for workflow_filename in workflow_filenames.values():
+            if output_states.get(workflow_filename) != "failed":
+                update_build_cache(build_cache, workflow_filename, workflow_inputs, output_format)
+        if gallery_filename and output_states.get(gallery_filename) != "failed":
+            update_build_cache(build_cache, gallery_filename, gallery_inputs)
+
+    return all(output_states.get(filename) != "failed" for filename in output_filenames)
+
+
+def make_workflow_job(job: dict) -> tuple[bool, str, dict, dict]:
+    """
+    Runs `make_workflow` for a single (config, template) pair, capturing its messages.
+
+    This is the unit of work used by `main` to build the config x template
+    matrix, either serially or on a process pool. Any message printed by
+    `make_workflow` is captured instead of being written directly, so that
+    parallel jobs don't interleave their output.
 
-    return True
+    Args:
+        job: A dictionary with the keyword arguments for `make_workflow`.
+    Returns:
+        A tuple (success, messages, outputs, states) where `messages` is the captured
+        text of any warning or error reported while building the workflow,
+        `outputs` are the build cache entries of the generated files and
+        `states` the state of each output file (see `make_workflow`).
+    """
+    original_outputs = {}
+    build_cache      = job.get("build_cache")
+    if build_cache is not None:
+        # work on a private copy of the cache, only the new entries are returned
+        original_outputs = build_cache["outputs"]
+        build_cache      = {"outputs": dict(original_outputs)}
+        job = {**job, "build_cache": build_cache}
+
+    states   = {}
+    messages = StringIO()
+    with capture_messages(messages):
+        try:
+            success = make_workflow(**job, output_states=states)
+        except Exception as e:
+            error(f"Unexpected error: {e}")
+            success = False
 
+    outputs = {}
+    if build_cache is not None:
+        outputs = {output: entry for output, entry in build_cache["outputs"].items()
+                   if original_outputs.get(output) != entry}
+    return success, messages.getvalue(), outputs, states
+
+
+def find_source_files(source_dir: str) -> tuple[list[str], list[str]]:
+    """
+    Gathers the templates and configuration files from the source directory.
+    Args:
+        source_dir: The directory containing templates and config files.
+    Returns:
+        A tuple (json_templates, text_configs) with the sorted paths of:
+          1. the .json files (excluding temporary ~.json files)
+          2. the .txt files with "#!ZCONFIG" flag (zconfig files)
+    """
+    json_templates = []  #< list to store paths of .json template files
+    text_configs   = []  #< list to store paths of valid text config files
+    for filename in sorted(os.listdir(source_dir)):
+        if filename.endswith(".json") and not filename.endswith("~.json"):
+            json_templates.append( os.path.join(source_dir, filename) )
+        elif filename.endswith(".txt") and is_zconfig_file(os.path.join(source_dir, filename)):
+            text_configs.append( os.path.join(source_dir, filename) )
+    return json_templates, text_configs
+
+
+def create_jobs(json_templates: list[str],
+                text_configs  : list[str],
+                **options
+                ) -> list[dict]:
+    """
+    Creates the list of jobs, one for each (config, template) pair.
+
+    The gallery file only depends on the config, so it's generated by the
+    first template only, avoiding two jobs writing the same file.
+    Args:
+        json_templates: The paths of the template files.
+        text_configs  : The paths of the configuration files.
+        **options     : The rest of the `make_workflow` arguments, common to all jobs.
+    Returns:
+        A list of dictionaries with the keyword arguments for `make_workflow`.
+    """
+    jobs = []
+    for config_path in text_configs:
+        for index, template_path in enumerate(json_templates):
+            jobs.append({"template_filepath": template_path,
+                         "config_filepath"  : config_path,
+                         "create_styles_txt": (index == 0),
+                         **options
+                         })
+    return jobs
+
+
+def run_jobs(jobs: list[dict], num_jobs: int = 1, no_color: bool = False) -> list[tuple[bool, str, dict, dict]]:
+    """
+    Runs a list of jobs, serially or on a pool of processes.
+
+    Results are always collected in the same order as the jobs. If the jobs
+    use a build cache, the entries of the generated files are merged into it.
+    Args:
+        jobs    : The jobs to run (see `create_jobs`).
+        num_jobs: The number of jobs to run in parallel.
+        no_color: Whether the worker processes should disable colored output.
+    Returns:
+        The list of results returned by `make_workflow_job`.
+    """
+    if num_jobs > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor  #< imported only when needed (slow to import)
+        initializer = disable_colors if no_color else None
+        with ProcessPoolExecutor(max_workers=num_jobs, initializer=initializer) as executor:
+            results = list( executor.map(make_workflow_job, jobs) )
+    else:
+        results = [ make_workflow_job(job) for job in jobs ]
+
+    # merge the entries of the generated files into the build cache
+    for job, (_, _, outputs, _) in zip(jobs, results):
+        if job.get("build_cache") is not None:
+            job["build_cache"]["outputs"].update(outputs)
+    return results
+
+
+def print_build_report(jobs: list[dict], results: list[tuple[bool, str, dict, dict]]) -> int:
+    """
+    Prints the messages reported by each job.
+    Returns:
+        The number of jobs that failed.
+    """
+    error_count = 0
+    for job, (success, messages, _, _) in zip(jobs, results):
+        if success and not messages:
+            continue
+        config_name   = os.path.basename(job["config_filepath"])
+        template_name = os.path.basename(job["template_filepath"])
+        print(f" {config_name} + {template_name}:", file=sys.stderr)
+        print(messages, end="", file=sys.stderr)
+        if not success:
+            error_count += 1
+    return error_count
+
+
+def format_output_states(results: list[tuple[bool, str, dict, dict]]) -> str:
+    """
+    Returns a summary of the state of the output files of all jobs,
+    e.g. "3 written, 13 unchanged, 0 failed" (see `make_workflow`).
+
+    A job that failed before the names of its outputs were known (e.g. an
+    invalid configuration) counts as one failed output, so the summary never
+    reports "0 failed" for a build with failed jobs.
+    """
+    counts = {"written": 0, "unchanged": 0, "up-to-date": 0, "failed": 0}
+    for success, _, _, states in results:
+        if not success and not states:
+            counts["failed"] += 1
+        for state in states.values():
+            counts[state] += 1
+    summary = f"{counts['written']} written, {counts['unchanged']} unchanged"
+    if counts["up-to-date"]:
+        summary += f", {counts['up-to-date']} up to date"
+    return summary + f", {counts['failed']} failed"
 
 
 def main(args=None, parent_script=None):
@@ -655,6 +3390,15 @@ def main(args=None, parent_script=None):
         args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
         parent_script (optional): The name of the calling script if any. Used for customizing help output.
     """    
+    # the "serve" command starts the workflow server (see `serve`)
+    # and the "apply" command rebuilds a workflow from a patch (see `apply`)
+    if args is None:
+        args = sys.argv[1:]
+    if args and args[0] == "serve":
+        return serve(args[1:], parent_script)
+    if args and args[0] == "apply":
+        return apply(args[1:], parent_script)
+
     prog = None
     if parent_script:
         prog = parent_script + " " + os.path.basename(__file__).split('.')[0]
@@ -662,13 +3406,43 @@ def main(args=None, parent_script=None):
     # set up argument parser for the script
     parser = argparse.ArgumentParser(
         prog=prog,
-        description="Build Z-Image Workflows from source templates and configuration files.",
+        description="Build Z-Image Workflows from source templates and configuration files.\n"
+                    "Use 'serve' as the first argument to start a local workflow server (see 'serve --help'),\n"
+                    "or 'apply' to rebuild a workflow from a JSON patch (see 'apply --help').",
         formatter_class=argparse.RawTextHelpFormatter
         )
     parser.add_argument('--no-color'       , action='store_true', help="Disable colored output.")
     parser.add_argument('-s','--source-dir', type=str,            help="The source dir containing templates and config files (default: /src)")
     parser.add_argument('-w','--overwrite' , action='store_true', help="Overwrite existing output file if exists.")
-
+    parser.add_argument('-f','--force'     , action='store_true', help="Rebuild all workflows, even those that are up to date.")
+    parser.add_argument('--no-cache'       , action='store_true',
+                        help=f"Don't read or update the build cache ({BUILD_CACHE_FILENAME})\n"
+                             f"nor the precompiled templates ({TEMPLATE_CACHE_DIR}/).")
+    parser.add_argument('-j','--jobs'      , type=int, default=1, metavar='N',
+                        help="Number of workflows to build in parallel (default: 1)")
+    parser.add_argument('--format'         , choices=jsonio.FORMATS, default=DEFAULT_JSON_FORMAT,
+                        help=f"Format of the generated JSON files (default: {DEFAULT_JSON_FORMAT})\n"
+                              " - pretty   : indented, easy to read and diff\n"
+                              " - compact  : without whitespace, the smallest files\n"
+                              " - canonical: compact with sorted keys, stable for hashing")
+    parser.add_argument('--split-styles'   , choices=("each", "sets"),
+                        help="Generate a workflow for each style variant instead of one per config:\n"
+                             " - each: one workflow per style, with the style selected\n"
+                             " - sets: one workflow per style set ('>>:STYLE-SET NAME' in the config)")
+    parser.add_argument('--patch'          , action='store_true',
+                        help="Save each workflow as a compact JSON patch (RFC 6902) against its template\n"
+                             "(.patch.json), use the 'apply' command to rebuild the full workflow.")
+    parser.add_argument('--headless'       , action='store_true',
+                        help="Save the headless version of each workflow (.headless.json): the reroutes are\n"
+                             "collapsed into direct links and the disabled nodes are removed.")
+    parser.add_argument('--api'            , action='store_true',
+                        help="Save each workflow compiled to the ComfyUI API format (.api.json),\n"
+                             "ready to be submitted to the '/prompt' endpoint.")
+    parser.add_argument('--reorder'        , action='store_true',
+                        help="Rewrite the 'order' of the nodes with the execution order computed from the links.")
+    parser.add_argument('--watch'          , action='store_true', help="Keep watching the source dir and rebuild the workflows affected by each change.")
+    parser.add_argument('--interval'       , type=float, default=0.5, metavar='SECONDS',
+                        help="Seconds between checks for changes in watch mode (default: 0.5)")
 
     args = parser.parse_args(args=args)
 
@@ -676,6 +3450,13 @@ def main(args=None, parent_script=None):
     if args.no_color:
         disable_colors()
 
+    if args.jobs < 1:
+        fatal_error("The number of jobs must be a positive integer.")
+    if args.interval <= 0:
+        fatal_error("The watch interval must be a positive number of seconds.")
+    if args.api and (args.patch or args.headless):
+        fatal_error("The '--api' option can't be combined with '--patch' or '--headless'.")
+
     # get source directory and convert it to absolute path
     source_dir = args.source_dir or DEFAULT_SOURCE_DIR
     source_dir = os.path.join(os.getcwd(), source_dir)
@@ -685,13 +3466,7 @@ def main(args=None, parent_script=None):
     #   1. List of .json files (excluding temporary ~.json files)
     #   2. List of .txt files with "#!ZCONFIG" flag (zconfig files)
     #
-    json_templates = []  #< list to store paths of .json template files
-    text_configs   = []  #< list to store paths of valid text config files
-    for filename in os.listdir(source_dir):
-        if filename.endswith(".json") and not filename.endswith("~.json"):
-            json_templates.append( os.path.join(source_dir, filename) )
-        elif filename.endswith(".txt") and is_zconfig_file(os.path.join(source_dir, filename)):
-            text_configs.append( os.path.join(source_dir, filename) )
+    json_templates, text_configs = find_source_files(source_dir)
 
     # display errors if no required files were found
     if not json_templates:
@@ -710,16 +3485,50 @@ def main(args=None, parent_script=None):
     print("")
 
 
-    for config_path in text_configs:
-        for template_path in json_templates:
-            make_workflow(template_filepath      = template_path,
-                          config_filepath        = config_path,
-                          overwrite              = args.overwrite,
-                          create_styles_txt      = True,
-                          )
+    # load the build cache used to skip the outputs that are up to date
+    build_cache = None if args.no_cache else load_build_cache(BUILD_CACHE_FILENAME)
+
+    # build the list of jobs, one for each (config, template) pair
+    job_options = {"overwrite"   : args.overwrite,
+                   "build_cache" : build_cache,
+                   "force"       : args.force,
+                   "format"      : args.format,
+                   "split_styles": args.split_styles,
+                   "patch"       : args.patch,
+                   "headless"    : args.headless,
+                   "api"         : args.api,
+                   "reorder"     : args.reorder,
+                   }
+    jobs = create_jobs(json_templates, text_configs, **job_options)
+
+    # parse each template only once, before starting any job
+    # (worker processes forked from this one inherit the parsed templates)
+    # (the precompiled templates are reused by the following runs)
+    for template_path in json_templates:
+        load_template(template_path, cache_dir=None if args.no_cache else TEMPLATE_CACHE_DIR)
+
+    # run all the jobs, serially or on a pool of processes
+    results = run_jobs(jobs, num_jobs=args.jobs, no_color=args.no_color)
+    if build_cache is not None:
+        save_build_cache(BUILD_CACHE_FILENAME, build_cache)
+
+    # print the final report
+    error_count = print_build_report(jobs, results)
+    if error_count == 0:
+        print(f" {console.GREEN}All {len(jobs)} workflows built successfully!{console.RESET}")
+    else:
+        print(f" {console.RED}Failed to build {error_count} of {len(jobs)} workflows.{console.RESET}")
+    print(f" Output files: {format_output_states(results)}")
+    print("")
 
+    # keep rebuilding the affected workflows each time a source file changes
+    # (after the first build, only the modified files need to be parsed again)
+    if args.watch:
+        watch_source_dir(source_dir, job_options, interval=args.interval)
+        return 0
 
+    return 1 if error_count else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -11,51 +11,33 @@
  _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
 """
 import os
-import sys
 import argparse
-import torch
-from safetensors.torch import save_file as save_safetensors_file
+import console
+from console import disable_colors, error
 
-# ANSI escape codes for colored terminal output
-RED      = '\033[91m'
-DKRED    = '\033[31m'
-YELLOW   = '\033[93m'
-DKYELLOW = '\033[33m'
-GREEN    = '\033[92m'
-CYAN     = '\033[96m'
-DKGRAY   = '\033[90m'
-RESET    = '\033[0m'
-
-#----------------------------- ERROR MESSAGES ------------------------------#
-
-def disable_colors():
-    global RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET
-    RED, DKRED, YELLOW, DKYELLOW, GREEN, CYAN, DKGRAY, RESET = "", "", "", "", "", "", "", ""
-
-
-def info(message: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays an informational message to the error stream.
-    """
-    print(f"{" "*padding}{CYAN}\u24d8 {message}{RESET}", file=file)
+# torch and safetensors take seconds to import,
+# they are imported only when a checkpoint is converted (see `import_torch`)
+torch                 = None
+save_safetensors_file = None
 
+#--------------------------------- HELPERS ---------------------------------#
 
-def warning(message: str, *info_messages: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays a warning message to the standard error stream.
+def import_torch() -> bool:
     """
-    print(f"{" "*padding}{CYAN}[{YELLOW}WARNING{CYAN}]{DKYELLOW} {message}{RESET}", file=file)
-    for info_message in info_messages:
-        info(info_message, padding=padding, file=file)
-
-
-def error(message: str, *info_messages: str, padding: int = 0, file=sys.stderr) -> None:
-    """Displays an error message to the standard error stream.
+    Imports the `torch` and `safetensors` modules used to convert the checkpoints.
+    Returns:
+        `True` if both modules were imported, `False` if any of them is not installed.
     """
-    print(f"{" "*padding}{DKRED}[{RED}ERROR!{DKRED}]{DKYELLOW} {message}{RESET}", file=file)
-    for info_message in info_messages:
-        info(info_message, padding=padding, file=file)
-
+    global torch, save_safetensors_file
+    try:
+        import torch
+        from safetensors.torch import save_file as save_safetensors_file
+    except ImportError as e:
+        error(f"The '{e.name}' module is not installed.",
+               "Install the packages listed in 'requirements_torch.txt' (or run 'pth2safe.sh --create-venv').")
+        return False
+    return True
 
-#--------------------------------- HELPERS ---------------------------------#
 
 def looks_like_state_dict(obj):
     """Returns `True` if `obj` looks like a PyTorch state dictionary."""
@@ -108,7 +90,7 @@ def convert_to_safetensors(checkpoint: str, /,*,
         error(f"Failed to save checkpoint. ({e})", padding=2)
         return False
 
-    print(f"    {GREEN}Convertion successful!{RESET}")
+    print(f"    {console.GREEN}Convertion successful!{console.RESET}")
     return True
 
 
@@ -136,6 +118,8 @@ def main(args=None, parent_script=None):
     # If the user requested to disable colors, call disable_colors()
     if args.no_color:
         disable_colors()
+    if not import_torch():
+        return 1
 
     # iterate over all the checkpints
     print()
@@ -149,9 +133,9 @@ def main(args=None, parent_script=None):
     if error_count == 0:
         print(f"All checkpoints converted successfully!")
     elif error_count == len(args.checkpoints):
-        print(f"{RED}Failed to convert any checkpoint.{RESET}")
+        print(f"{console.RED}Failed to convert any checkpoint.{console.RESET}")
     else:
-        print(f"{RED}Failed to convert {error_count} checkpoint(s).{RESET}")
+        print(f"{console.RED}Failed to convert {error_count} checkpoint(s).{console.RESET}")
 
 
 
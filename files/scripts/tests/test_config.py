@@ -0,0 +1,200 @@
+"""
+  File    : test_config.py
+  Purpose : Tests of the configuration files: tokenizer, variables, includes and commands.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import tempfile
+import unittest
+from io import StringIO
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from console import capture_messages
+from make import (ConfigError, ModificationTable, Workflow, WorkflowTemplate,
+                  parse_config_lines, read_config)
+
+
+def write_file(directory: str, name: str, text: str) -> str:
+    """Writes a text file inside a directory and returns its path."""
+    filepath = os.path.join(directory, name)
+    with open(filepath, "w") as file:
+        file.write(text)
+    return filepath
+
+
+#-------------------------------- TOKENIZER --------------------------------#
+
+class TokenizerTest(unittest.TestCase):
+
+    def test_actions_and_their_content(self):
+        actions = parse_config_lines([
+            "#!ZCONFIG",
+            "ignored text before the first action",
+            "{#TITLE}",
+            "A title   ",
+            ">>>Photo",
+            "line 1",
+            "",
+            "line 3",
+            ">>:DISABLE",
+            "Upscaler",
+        ], source="config.txt")
+        self.assertEqual([(a.kind, a.name) for a in actions],
+                         [("header", "ZCONFIG"), ("variable", "#TITLE"), ("style", "Photo"), ("command", ">>:DISABLE")])
+        self.assertEqual(actions[1].content, "A title\n")  #< trailing whitespace is removed
+        self.assertEqual(actions[2].content, "line 1\n\nline 3\n")
+        self.assertEqual([a.line for a in actions], [1, 3, 5, 9])
+        self.assertEqual(actions[3].location(), "config.txt:9")
+
+    def test_action_without_content(self):
+        actions = parse_config_lines(["{#EMPTY}", "{#NEXT}", "value"])
+        self.assertEqual(actions[0].content, "")
+        self.assertEqual(actions[1].content, "value\n")
+
+    def test_error_in_a_command_is_located(self):
+        with self.assertRaises(ConfigError) as context:
+            read_config("{#A}\nvalue\n>>:DISABLE\nNode {#A\n")
+        self.assertTrue(str(context.exception).startswith("<text>:3: "), str(context.exception))
+
+    def test_invalid_title_pattern_is_located(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = write_file(directory, "broken.txt", "{#A}\nvalue\n\n>>:ENABLE\n/([a-/\n")
+            with self.assertRaises(ConfigError) as context:
+                read_config(filepath)
+        self.assertTrue(str(context.exception).startswith("broken.txt:4: Invalid pattern"), str(context.exception))
+
+
+#-------------------------------- VARIABLES --------------------------------#
+
+class VariablesTest(unittest.TestCase):
+
+    def test_variables_can_reference_later_definitions(self):
+        config_vars = read_config("{#TITLE}\nThe {#NAME} v{#VERSION}\n{#NAME}\nZ-Image\n{#VERSION}\n4\n")
+        self.assertEqual(config_vars["#TITLE"], "The Z-Image v4")
+
+    def test_redefinition_replaces_the_memoized_value(self):
+        config_vars = read_config("{#A}\n= {#B}!\n{#B}\none\n")
+        self.assertEqual(config_vars["#A"], "= one!")
+        config_vars["#B"] = "two"
+        self.assertEqual(config_vars["#A"], "= two!")
+
+    def test_assigned_values_are_literal(self):
+        config_vars = read_config("{#A}\nvalue\n")
+        config_vars["#PROMPT"] = "{#A} and {braces}"
+        self.assertEqual(config_vars["#PROMPT"], "{#A} and {braces}")
+
+    def test_undefined_variables_keep_their_placeholder(self):
+        self.assertEqual(read_config("{#A}\n[{#UNDEFINED}]\n")["#A"], "[{#UNDEFINED}]")
+
+    def test_circular_reference_is_located(self):
+        config_vars = read_config("{#A}\n= {#B}\n{#B}\n= {#A}\n")
+        with self.assertRaises(ConfigError) as context:
+            config_vars["#A"]
+        self.assertIn("#A -> #B -> #A", str(context.exception))
+        self.assertTrue(str(context.exception).startswith("<text>:"), str(context.exception))
+
+
+#--------------------------------- INCLUDES --------------------------------#
+
+class IncludesTest(unittest.TestCase):
+
+    def test_nested_includes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "sub"))
+            write_file(directory, "sub/inner.txt", "{#INNER}\ninner {#OUTER}\n>>>Inner Style\ninner\n")
+            write_file(directory, "middle.txt"   , ">>:INCLUDE\nsub/inner.txt\n{#MIDDLE}\nmiddle\n")
+            filepath = write_file(directory, "main.txt",
+                                  "{#OUTER}\nmain\n>>:INCLUDE\nmiddle.txt\n>>>Main Style\nmain\n")
+            config_vars = read_config(filepath)
+            self.assertEqual(config_vars["#INNER"], "inner main")
+            self.assertEqual(config_vars["#MIDDLE"], "middle")
+            self.assertEqual([name for name, _ in config_vars.styles], ["Inner Style", "Main Style"])
+            self.assertEqual([os.path.basename(path) for path in config_vars.sources],
+                             ["main.txt", "middle.txt", "inner.txt"])
+
+    def test_later_definitions_override_the_included_ones(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_file(directory, "base.txt", "{#A}\nbase\n{#B}\nbase\n")
+            filepath = write_file(directory, "main.txt", "{#A}\nmain\n>>:INCLUDE\nbase.txt\n{#B}\nmain\n")
+            config_vars = read_config(filepath)
+            self.assertEqual((config_vars["#A"], config_vars["#B"]), ("base", "main"))
+
+    def test_circular_include_is_reported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_file(directory, "a.txt", "{#A}\na\n>>:INCLUDE\nb.txt\n")
+            write_file(directory, "b.txt", "{#B}\nb\n>>:INCLUDE\na.txt\n")
+            messages = StringIO()
+            with capture_messages(messages):
+                config_vars = read_config(os.path.join(directory, "a.txt"))
+            self.assertIn("Circular include", messages.getvalue())
+            self.assertEqual((config_vars["#A"], config_vars["#B"]), ("a", "b"))
+
+
+#--------------------------------- COMMANDS --------------------------------#
+
+def make_workflow_template() -> WorkflowTemplate:
+    """Returns a small template: two nodes inside the group "Upscale" and one outside."""
+    def node(id: int, title: str, x: int, y: int) -> dict:
+        return {"id": id, "type": "Note", "title": title, "mode": 0, "pos": [x, y], "size": [100, 50]}
+    return WorkflowTemplate(None, {
+        "nodes" : [node(1, "Upscale Model", 10, 10), node(2, "Upscale Image", 10, 100), node(3, "Sampler", 500, 10)],
+        "groups": [{"title": "Upscale", "bounding": [0, 0, 200, 200]}],
+        "links" : [],
+    })
+
+
+def apply_modifications(config_text: str) -> tuple[dict, list]:
+    """Applies the commands of a configuration to the template, returns (modes by title, unmatched titles)."""
+    config_vars   = read_config(config_text)
+    template      = make_workflow_template()
+    workflow      = Workflow(template)
+    modifications = ModificationTable(config_vars.node_modifications, config_vars.group_modifications)
+    unmatched     = modifications.apply(workflow)
+    return {node["title"]: node["mode"] for node in workflow.json["nodes"]}, unmatched
+
+
+class CommandsTest(unittest.TestCase):
+
+    def test_last_command_wins(self):
+        modes, _ = apply_modifications(">>:DISABLE\nSampler\n>>:ENABLE\nSampler\n")
+        self.assertEqual(modes["Sampler"], 0)
+        modes, _ = apply_modifications(">>:ENABLE\nSampler\n>>:DISABLE\nSampler\n")
+        self.assertEqual(modes["Sampler"], 2)
+
+    def test_exact_title_overrides_an_earlier_pattern(self):
+        modes, unmatched = apply_modifications(">>:DISABLE\nUpscale *\n>>:ENABLE\nUpscale Image\n")
+        self.assertEqual(modes, {"Upscale Model": 2, "Upscale Image": 0, "Sampler": 0})
+        self.assertEqual(unmatched, [])
+
+    def test_fully_overridden_command_is_reported(self):
+        _, unmatched = apply_modifications(">>:DISABLE\nSampler\n>>:ENABLE\n*\n>>:DISABLE\nMissing\n")
+        self.assertEqual(unmatched, [("node", "Sampler"), ("node", "Missing")])
+
+    def test_group_modes_go_after_the_node_commands(self):
+        modes, _ = apply_modifications(">>:DISABLE-GROUP\nUpscale\n>>:ENABLE\nUpscale Image\n")
+        self.assertEqual(modes, {"Upscale Model": 2, "Upscale Image": 2, "Sampler": 0})
+
+    def test_group_with_extra_bounding_values(self):
+        template = make_workflow_template()
+        template.json["groups"][0]["bounding"] += [0]
+        workflow = Workflow(template)
+        ModificationTable([], [("Upscale", {"mode": 2})]).apply(workflow)
+        self.assertEqual([node["mode"] for node in workflow.json["nodes"]], [2, 2, 0])
+
+    def test_template_is_not_modified(self):
+        template = make_workflow_template()
+        workflow = Workflow(template)
+        ModificationTable([("*", {"mode": 2, "pinned": True})], []).apply(workflow)
+        self.assertEqual([node["mode"] for node in template.json["nodes"]], [0, 0, 0])
+        self.assertEqual([node["mode"] for node in workflow.json["nodes"]], [2, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+  File    : test_linkgraph.py
+  Purpose : Tests of the graph of links between the nodes of a workflow.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from linkgraph import CycleError, LinkGraph, get_order_errors, update_node_order
+
+
+def make_workflow(node_ids: list[int], links: list[tuple[int, int, int]], orders: dict | None = None) -> dict:
+    """Returns a workflow with the given nodes and links (link id, origin id, target id)."""
+    orders = orders or {}
+    nodes  = [{"id": node_id, "order": orders.get(node_id, 0), "inputs": [], "outputs": [{"links": []}]} for node_id in node_ids]
+    by_id  = {node["id"]: node for node in nodes}
+    for link_id, origin_id, target_id in links:
+        if origin_id in by_id:
+            by_id[origin_id]["outputs"][0]["links"].append(link_id)
+        if target_id in by_id:
+            by_id[target_id]["inputs"].append({"link": link_id})
+    return {"nodes": nodes, "links": [[link_id, origin_id, 0, target_id, 0, "*"] for link_id, origin_id, target_id in links]}
+
+
+class LinkGraphTest(unittest.TestCase):
+
+    def test_topological_order(self):
+        workflow = make_workflow([5, 4, 3, 2, 1], [(1, 1, 2), (2, 2, 3), (3, 1, 3), (4, 5, 4)])
+        order    = LinkGraph(workflow).topological_order()
+        self.assertEqual(order, [5, 1, 4, 2, 3])  #< ties keep the order of the workflow
+
+    def test_cycle(self):
+        workflow = make_workflow([1, 2, 3, 4], [(1, 1, 2), (2, 2, 3), (3, 3, 2), (4, 3, 4)])
+        graph    = LinkGraph(workflow)
+        self.assertEqual(graph.find_cycle(), [2, 3, 2])
+        with self.assertRaises(CycleError) as context:
+            graph.topological_order()
+        self.assertEqual(context.exception.nodes, [2, 3, 2])
+
+    def test_dangling_links(self):
+        workflow = make_workflow([1, 2], [(1, 1, 2), (2, 1, 99)])
+        workflow["nodes"][1]["inputs"].append({"link": 7})
+        graph = LinkGraph(workflow)
+        self.assertEqual(graph.dangling_links, [2, 7])
+        self.assertEqual(graph.successors, {1: [2], 2: []})
+
+    def test_long_chain(self):
+        count    = 20000
+        workflow = make_workflow(list(range(count, 0, -1)), [(index, index, index + 1) for index in range(1, count)])
+        self.assertEqual(LinkGraph(workflow).topological_order(), list(range(1, count + 1)))
+        self.assertEqual(LinkGraph(workflow).find_cycle(), [])
+
+    def test_order_errors_and_update(self):
+        workflow = make_workflow([1, 2, 3], [(1, 1, 2), (2, 2, 3)], orders={1: 0, 2: 2, 3: 1})
+        self.assertEqual(get_order_errors(workflow), [3])
+
+        updated = update_node_order(workflow)
+        self.assertEqual([node["order"] for node in updated["nodes"]], [0, 1, 2])
+        self.assertEqual(get_order_errors(updated), [])
+        self.assertIs(updated["nodes"][0], workflow["nodes"][0])            #< unchanged nodes are shared
+        self.assertEqual([node["order"] for node in workflow["nodes"]], [0, 2, 1])  #< the original is not modified
+        self.assertIs(update_node_order(updated), updated)
+
+
+if __name__ == "__main__":
+    unittest.main()
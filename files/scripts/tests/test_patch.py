@@ -0,0 +1,107 @@
+"""
+  File    : test_patch.py
+  Purpose : Tests of the JSON patches (RFC 6902) generated by '--patch' and rebuilt by 'apply'.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import glob
+import json
+import tempfile
+import unittest
+import subprocess
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+from make import PatchError, apply_json_patch, make_json_patch, parse_json_pointer
+
+# the directory with the templates and configurations of the released workflows
+SOURCE_DIR = os.path.join(SCRIPTS_DIR, "..", "..", "src")
+
+
+class JsonPatchTest(unittest.TestCase):
+
+    def assert_round_trip(self, base, target):
+        base_copy = json.loads(json.dumps(base))
+        patched   = apply_json_patch(base, make_json_patch(base, target))
+        self.assertEqual(json.dumps(patched), json.dumps(target))  #< (also checks the key order)
+        self.assertEqual(base, base_copy)                          #< the base is never modified
+
+    def test_round_trip(self):
+        base = {"nodes": [{"id": 1, "title": "A"}, {"id": 2}], "links": [[1, 1, 0, 2, 0, "IMAGE"]], "extra": {}}
+        self.assert_round_trip(base, {**base, "nodes": [{"id": 1, "title": "B"}, {"id": 2}, {"id": 3}]})
+        self.assert_round_trip(base, {**base, "nodes": [{"id": 1}], "links": []})
+        self.assert_round_trip(base, {"extra": {"new": None}, "nodes": base["nodes"], "links": base["links"]})
+        self.assert_round_trip(base, {**base, "links": {"not": "a list"}})
+
+    def test_shared_containers_are_skipped(self):
+        nodes = [{"id": index} for index in range(100)]
+        base  = {"nodes": nodes, "groups": []}
+        self.assertEqual(make_json_patch(base, {**base, "groups": [{"title": "G"}]}),
+                         [{"op": "add", "path": "/groups/0", "value": {"title": "G"}}])
+
+    def test_pointer_tokens_are_escaped(self):
+        self.assertEqual(parse_json_pointer("/a~1b/c~0d/0"), ["a/b", "c~d", "0"])
+        self.assert_round_trip({"a/b": 1, "c~d": 2}, {"a/b": 3, "c~d": 2})
+
+    def test_all_operations(self):
+        document = {"a": {"b": [1, 2, 3]}, "c": "x"}
+        patched  = apply_json_patch(document, [
+            {"op": "test"   , "path": "/c"     , "value": "x"},
+            {"op": "add"    , "path": "/a/b/-" , "value": 4},
+            {"op": "remove" , "path": "/a/b/0"},
+            {"op": "replace", "path": "/c"     , "value": "y"},
+            {"op": "copy"   , "from": "/a/b"   , "path": "/d"},
+            {"op": "move"   , "from": "/a/b/0" , "path": "/e"},
+        ])
+        self.assertEqual(patched, {"a": {"b": [3, 4]}, "c": "y", "d": [2, 3, 4], "e": 2})
+        self.assertEqual(document, {"a": {"b": [1, 2, 3]}, "c": "x"})
+
+    def test_copied_values_are_not_shared(self):
+        patched = apply_json_patch({"a": {"b": 1}}, [{"op": "copy", "from": "/a", "path": "/c"},
+                                                     {"op": "remove", "path": "/c/b"}])
+        self.assertEqual(patched, {"a": {"b": 1}, "c": {}})
+
+    def test_invalid_patches(self):
+        for patch in ([{"op": "test", "path": "/a", "value": 2}],
+                      [{"op": "remove", "path": "/missing"}],
+                      [{"op": "replace", "path": "/a/0", "value": 1}],
+                      [{"op": "unknown", "path": "/a"}],
+                      [{"op": "add", "path": "a", "value": 1}]):
+            with self.assertRaises(PatchError, msg=str(patch)):
+                apply_json_patch({"a": 1}, patch)
+
+
+class PatchCommandTest(unittest.TestCase):
+    """Builds the released workflows with '--patch' and checks that 'apply' rebuilds them byte by byte."""
+
+    def run_script(self, *args: str, cwd: str) -> None:
+        result = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "make.py"), *args, "--no-color"],
+                                cwd=cwd, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+    def test_apply_rebuilds_the_workflows(self):
+        source_dir = os.path.abspath(SOURCE_DIR)
+        with tempfile.TemporaryDirectory() as full_dir, tempfile.TemporaryDirectory() as patch_dir:
+            self.run_script("-s", source_dir, "--no-cache", cwd=full_dir)
+            self.run_script("-s", source_dir, "--no-cache", "--patch", cwd=patch_dir)
+
+            patch_paths = sorted(glob.glob(os.path.join(patch_dir, "*.patch.json")))
+            self.assertTrue(patch_paths)
+            for patch_path in patch_paths:
+                name          = os.path.basename(patch_path).removesuffix(".patch.json")
+                template_path = os.path.join(source_dir, f"template_{name.rsplit('_', 1)[1]}.json")
+                output_path   = os.path.join(patch_dir, name + ".json")
+                self.run_script("apply", template_path, patch_path, "-o", output_path, "--no-cache", cwd=patch_dir)
+                with open(output_path, "rb") as rebuilt, open(os.path.join(full_dir, name + ".json"), "rb") as full:
+                    self.assertEqual(rebuilt.read(), full.read(), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
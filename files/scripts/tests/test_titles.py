@@ -0,0 +1,49 @@
+"""
+  File    : test_titles.py
+  Purpose : Tests of the title patterns used by the node and group commands.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from make import TitleMatcher
+
+
+class TitleMatcherTest(unittest.TestCase):
+
+    def test_priority_follows_the_order_of_the_patterns(self):
+        matcher = TitleMatcher(["Resize *", "*Photo*", "/Re.*/", "Resize Photo"])
+        self.assertEqual(matcher.match("Resize Photo"), 0)
+        self.assertEqual(matcher.match("A Photo"), 1)
+        self.assertEqual(matcher.match("Reroute"), 2)
+        self.assertIsNone(matcher.match("Sampler"))
+
+    def test_glob_matches_its_literal_text(self):
+        matcher = TitleMatcher(["Upscale Image *4"])
+        self.assertEqual(matcher.match("Upscale Image *4"), 0)
+        self.assertEqual(matcher.match("Upscale Image x4"), 0)
+
+    def test_regex_with_backreference(self):
+        self.assertEqual(TitleMatcher([r"/(ab)\1/"]).match("abab"), 0)
+        matcher = TitleMatcher(["*Photo*", r"/(ab)\1/"])
+        self.assertEqual(matcher.match("abab"), 1)
+        self.assertEqual(matcher.match("Photo"), 0)
+        self.assertIsNone(matcher.match("abba"))
+
+    def test_regex_with_named_group(self):
+        matcher = TitleMatcher(["*Photo*", "/(?P<x>a+)b(?P=x)/", "/(?P<x>c)/"])
+        self.assertEqual(matcher.match("aabaa"), 1)
+        self.assertEqual(matcher.match("c"), 2)
+        self.assertIsNone(matcher.match("aaba"))
+
+
+if __name__ == "__main__":
+    unittest.main()
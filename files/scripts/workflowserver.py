@@ -0,0 +1,336 @@
+"""
+  File    : workflowserver.py
+  Purpose : Local HTTP server that builds Z-Image workflows on demand (make.py serve).
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import hashlib
+import argparse
+import threading
+import contextlib
+from io import StringIO
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import make
+import jsonio
+import console
+from console import capture_messages, fatal_error
+from make import (DEFAULT_SOURCE_DIR, DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, TEMPLATE_CACHE_DIR,
+                  BuildError, ConfigError, ConfigVars, build_workflow,
+                  find_source_files, get_file_states, get_mtime, get_template_name, hash_inputs,
+                  load_template, read_workflow_config)
+
+
+#----------------------------- WORKFLOW SERVER -----------------------------#
+
+class LRUCache:
+    """
+    A thread-safe cache that keeps a limited number of entries,
+    discarding the least recently used one when it's full.
+    """
+    def __init__(self, max_size: int = 256) -> None:
+        self.max_size = max_size
+        self.entries  = OrderedDict()
+        self.hits     = 0
+        self.misses   = 0
+        self._lock    = threading.Lock()
+
+    def get(self, key):
+        """Returns the value stored under `key`, or None if it's not in the cache."""
+        with self._lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        """Stores a value in the cache, discarding the oldest entries if needed."""
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+class WorkflowServer(ThreadingHTTPServer):
+    """
+    A local HTTP server that builds workflows on demand.
+
+    The templates and the configurations are parsed the first time they are
+    requested and stay in memory (they are reloaded only when their files
+    change); the generated workflows are stored in an LRU cache indexed by a
+    hash of all the inputs used to build them.
+
+    Endpoints:
+        GET  /           : Lists the available configs, templates and formats.
+        GET  /workflow   : Builds a workflow, the request is given as query parameters.
+        POST /workflow   : Builds a workflow, the request is given as a JSON object.
+
+    Request fields:
+        config   : The name of the configuration, e.g. "z-photo" (or "z-photo.txt").
+        template : The name of the template, e.g. "GGUF" (or "template_GGUF.json").
+        prompt   : Optional; the prompt of the workflow (overrides "{#PROMPT}").
+        style    : Optional; the name of the style to select.
+        overrides: Optional; a JSON object with variables to override {"#NAME": value}.
+        format   : Optional; the JSON format of the response (default: compact).
+    """
+    daemon_threads      = True
+    allow_reuse_address = True
+    request_queue_size  = 128  #< avoids refused connections under bursts of concurrent requests
+
+    def __init__(self, address: tuple[str, int], source_dir: str, cache_size: int = 256, verbose: bool = False) -> None:
+        super().__init__(address, WorkflowRequestHandler)
+        self.source_dir      = source_dir
+        self.verbose         = verbose
+        self.cache           = LRUCache(cache_size)
+        self._configs        = {}
+        self._configs_lock   = threading.Lock()
+        self._sources        = None
+        self._sources_mtime  = None
+        self._building       = {}
+        self._building_lock  = threading.Lock()
+
+    def get_source_files(self) -> tuple[dict[str, str], dict[str, str]]:
+        """
+        Returns the available templates and configs, indexed by name
+        (the listing is only read again when the source dir changes).
+        """
+        mtime = get_mtime(self.source_dir)
+        if self._sources is None or mtime != self._sources_mtime:
+            json_templates, text_configs = find_source_files(self.source_dir)
+            templates = {get_template_name(path): path for path in json_templates}
+            configs   = {os.path.basename(path).removesuffix(".txt"): path for path in text_configs}
+            self._sources, self._sources_mtime = (templates, configs), mtime
+        return self._sources
+
+    def get_config(self, config_filepath: str, template_filepath: str) -> ConfigVars:
+        """
+        Returns the configuration used to build a workflow from a template,
+        reading it again only if any of its files has been modified.
+
+        Each call returns its own copy, the cached configuration is never
+        modified (building a workflow expands variables and sets some others,
+        which would race between concurrent requests).
+        """
+        key = (config_filepath, template_filepath)
+        with self._configs_lock:
+            entry = self._configs.get(key)
+        if entry is not None:
+            config_vars, states = entry
+            if get_file_states(states.keys()) == states:
+                return config_vars.copy()
+        config_vars = read_workflow_config(template_filepath, config_filepath)
+        with self._configs_lock:
+            self._configs[key] = (config_vars, get_file_states(config_vars.sources))
+        return config_vars.copy()
+
+    def build(self, request: dict) -> tuple[bytes, bool]:
+        """
+        Builds the workflow for a request (see the class documentation).
+        Returns:
+            A tuple (body, cached) with the JSON encoded workflow and whether it
+            was retrieved from the cache.
+        Raises:
+            LookupError: If the config or the template doesn't exist.
+            ValueError : If the request is not valid.
+            BuildError : If the workflow can't be built.
+        """
+        templates, configs = self.get_source_files()
+        config_name   = str(request.get("config"  , "")).removesuffix(".txt")
+        template_name = get_template_name(str(request.get("template", "")))
+        format        = request.get("format") or "compact"
+        style         = request.get("style") or None
+        overrides     = dict(request.get("overrides") or {})
+        if request.get("prompt") is not None:
+            overrides["#PROMPT"] = request["prompt"]
+
+        if config_name not in configs:
+            raise LookupError(f"Unknown config '{config_name}'. Available: {', '.join(configs)}")
+        if template_name not in templates:
+            raise LookupError(f"Unknown template '{template_name}'. Available: {', '.join(templates)}")
+        if format not in jsonio.FORMATS:
+            raise ValueError(f"Invalid format '{format}'. Expected one of: {', '.join(jsonio.FORMATS)}")
+        if not all(isinstance(key, str) and isinstance(value, str) for key, value in overrides.items()):
+            raise ValueError("The overrides must be a JSON object of strings.")
+
+        # the key is the hash of everything used to build the workflow
+        # (the content of the template, the config and its included files, and the request)
+        template_filepath = templates[template_name]
+        config_vars       = self.get_config(configs[config_name], template_filepath)
+        inputs            = hash_inputs([template_filepath, *config_vars.sources])
+        key_data          = [inputs, config_name, template_name, format, style, sorted(overrides.items())]
+        key               = hashlib.sha256( jsonio.dumps_bytes(key_data, format="canonical") ).hexdigest()
+
+        body = self.cache.get(key)
+        if body is not None:
+            return body, True
+
+        # concurrent requests for the same workflow wait for the first one to build it
+        with self._building_lock:
+            building = self._building.get(key)
+            if building is None:
+                self._building[key] = threading.Event()
+        if building is not None:
+            building.wait()
+            body = self.cache.get(key)
+            if body is not None:
+                return body, True
+            return self.build(request)
+
+        try:
+            template = load_template(template_filepath)
+            if not template:
+                raise BuildError(f"Unable to load the template '{template_name}'.")
+            with capture_messages(StringIO()) if not self.verbose else contextlib.nullcontext():
+                workflow_json = build_workflow(template, config_vars, overrides=overrides, style=style, shared=True)
+            body = jsonio.dumps_bytes(workflow_json, format=format)
+            self.cache.put(key, body)
+        finally:
+            with self._building_lock:
+                self._building.pop(key).set()
+        return body, False
+
+
+class WorkflowRequestHandler(BaseHTTPRequestHandler):
+    """Handles the HTTP requests of a `WorkflowServer`."""
+    server: WorkflowServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/":
+            templates, configs = self.server.get_source_files()
+            self.send_json(200, {"configs"  : list(configs),
+                                 "templates": list(templates),
+                                 "formats"  : list(jsonio.FORMATS),
+                                 "cache"    : {"size"  : len(self.server.cache.entries),
+                                               "hits"  : self.server.cache.hits,
+                                               "misses": self.server.cache.misses}})
+        elif url.path == "/workflow":
+            request = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            overrides = {name: value for name, value in request.items() if name.startswith("#")}
+            if overrides:
+                request["overrides"] = overrides
+            self.send_workflow(request)
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint '{url.path}'."})
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/workflow":
+            self.send_json(404, {"error": f"Unknown endpoint '{url.path}'."})
+            return
+        try:
+            length  = int(self.headers.get("Content-Length") or 0)
+            request = jsonio.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, jsonio.JSONDecodeError):
+            self.send_json(400, {"error": "The request body must be a JSON object."})
+            return
+        if not isinstance(request, dict):
+            self.send_json(400, {"error": "The request body must be a JSON object."})
+            return
+        self.send_workflow(request)
+
+    def send_workflow(self, request: dict) -> None:
+        try:
+            body, cached = self.server.build(request)
+        except LookupError as e:
+            self.send_json(404, {"error": str(e.args[0])})
+        except (ValueError, TypeError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+        except (BuildError, ConfigError) as e:
+            self.send_json(422, {"error": str(e)})
+        except OSError as e:
+            self.send_json(500, {"error": str(e)})
+        else:
+            self.send_body(200, body, {"X-Cache": "HIT" if cached else "MISS"})
+
+    def send_json(self, status: int, obj) -> None:
+        self.send_body(status, jsonio.dumps_bytes(obj, format="compact"))
+
+    def send_body(self, status: int, body: bytes, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type"  , "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(args=None, parent_script=None):
+    """
+    Entry point of the `serve` command, which starts a local workflow server.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    prog = os.path.basename(sys.argv[0]) + " serve"  #< e.g. "make.py serve" or "zimage make serve"
+    if parent_script:
+        prog = parent_script + " " + os.path.basename(make.__file__).split('.')[0] + " serve"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Start a local HTTP server that builds Z-Image workflows on demand.",
+        formatter_class=argparse.RawTextHelpFormatter
+        )
+    parser.add_argument('--no-color'       , action='store_true', help="Disable colored output.")
+    parser.add_argument('-s','--source-dir', type=str,            help="The source dir containing templates and config files (default: /src)")
+    parser.add_argument('--host'           , type=str, default=DEFAULT_SERVER_HOST, help=f"The address to listen on (default: {DEFAULT_SERVER_HOST})")
+    parser.add_argument('-p','--port'      , type=int, default=DEFAULT_SERVER_PORT, help=f"The port to listen on (default: {DEFAULT_SERVER_PORT})")
+    parser.add_argument('--cache-size'     , type=int, default=256, metavar='N',
+                        help="Maximum number of generated workflows kept in memory (default: 256)")
+    parser.add_argument('--no-cache'       , action='store_true', help=f"Don't read or update the precompiled templates ({TEMPLATE_CACHE_DIR}/).")
+    parser.add_argument('-v','--verbose'   , action='store_true', help="Log every request.")
+    args = parser.parse_args(args=args)
+
+    if args.no_color:
+        console.disable_colors()
+    if args.cache_size < 1:
+        fatal_error("The cache size must be a positive integer.")
+
+    source_dir = os.path.realpath(os.path.join(os.getcwd(), args.source_dir or DEFAULT_SOURCE_DIR))
+    if not os.path.isdir(source_dir):
+        fatal_error(f"The source directory '{source_dir}' does not exist.")
+
+    try:
+        server = WorkflowServer((args.host, args.port), source_dir, cache_size=args.cache_size, verbose=args.verbose)
+    except OSError as e:
+        fatal_error(f"Unable to start the server on {args.host}:{args.port}.", str(e))
+
+    # parse all templates and configs before accepting the first request
+    templates, configs = server.get_source_files()
+    for template_path in templates.values():
+        template = load_template(template_path, cache_dir=None if args.no_cache else TEMPLATE_CACHE_DIR)
+        if template:
+            template.group_members()
+        for config_path in configs.values():
+            with capture_messages(StringIO()):
+                server.get_config(config_path, template_path)
+
+    print("")
+    print(f" Serving workflows from '{source_dir}'")
+    print(f" {console.GREEN}Listening on http://{args.host}:{server.server_address[1]}/{console.RESET} (press Ctrl+C to stop)")
+    print("")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("")
+    finally:
+        server.server_close()
+    return 0
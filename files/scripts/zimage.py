@@ -0,0 +1,101 @@
+"""
+  File    : zimage.py
+  Purpose : Single entry point for all the Z-Image workflow tools.
+  Author  : Martin Rizzo | <martinrizzo@gmail.com>
+  Date    : Dec 21, 2025
+  Repo    : https://github.com/martin-rizzo/AmazingZImageWorkflow
+  License : Unlicense
+ - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+                            Amazing Z-Image Workflow
+   Z-Image workflow with customizable image styles and GPU-friendly versions
+ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _
+"""
+import os
+import sys
+import importlib
+import importlib.util
+from console import error
+
+# the available subcommands: name -> (script implementing it, description)
+# (each script is imported only when its subcommand is run, so the heavy
+#  dependencies of one tool, e.g. torch or PIL, never slow down the others)
+COMMANDS = {
+    "make"    : ("make.py"          , "Build the workflows from the source templates and configuration files."),
+    "check"   : ("check-workflow.py", "Analyze ComfyUI workflow files (.json or .png) to check for issues."),
+    "gallery" : ("build-gallery.py" , "Generate a gallery of style images."),
+    "pth2safe": ("pth2safe.py"      , "Convert checkpoints stored in .pth format to .safetensors."),
+    "cost"    : ("estimate-cost.py" , "Estimate the relative render cost of workflows, by stage."),
+}
+
+#--------------------------------- HELPERS ---------------------------------#
+
+def print_usage(prog: str, file=sys.stdout) -> None:
+    """Prints the list of subcommands."""
+    print(f"usage: {prog} <command> [options]", file=file)
+    print("", file=file)
+    print("Tools to build and check the Z-Image workflows.", file=file)
+    print("", file=file)
+    print("commands:", file=file)
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<10} {description}", file=file)
+    print("", file=file)
+    print(f"Use '{prog} <command> --help' to see the options of each command.", file=file)
+
+
+def load_command(name: str):
+    """
+    Imports the script that implements a subcommand.
+    Args:
+        name: The name of the subcommand (see `COMMANDS`).
+    Returns:
+        The module of the script, its `main` function runs the subcommand.
+    """
+    script_name = COMMANDS[name][0]
+    module_name = os.path.splitext(script_name)[0]
+    if module_name.isidentifier():
+        # scripts that other modules import by name are imported normally,
+        # so there is only one instance of them (e.g. "make")
+        return importlib.import_module(module_name)
+
+    module_name = module_name.replace("-", "_")
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name)
+    spec   = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+#===========================================================================#
+#////////////////////////////////// MAIN ///////////////////////////////////#
+#===========================================================================#
+
+def main(args=None, parent_script=None):
+    """
+    Main entry point for the script.
+    Args:
+        args          (optional): List of arguments to parse. Default is None, which will use the command line arguments.
+        parent_script (optional): The name of the calling script if any. Used for customizing help output.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    prog = parent_script or os.path.splitext(os.path.basename(__file__))[0]
+
+    if not args or args[0] in ("-h", "--help"):
+        print_usage(prog)
+        return 0
+
+    command = args[0]
+    if command not in COMMANDS:
+        error(f"Unknown command '{command}'.")
+        print_usage(prog, file=sys.stderr)
+        return 2
+
+    # the usage of each tool is displayed as "zimage <command>"
+    # (its argument parser takes the program name from `sys.argv[0]`)
+    sys.argv[0] = f"{prog} {command}"
+    return load_command(command).main(args[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())